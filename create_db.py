@@ -28,7 +28,15 @@ from src.models.os_peca import OS_Peca
 from src.models.analise_oleo import AnaliseOleo
 from src.models.usuario import Usuario
 from src.models.plano_preventiva import PlanoPreventiva
+from src.models.sequencia_os import SequenciaOS
 from src.models.backlog_item import BacklogItem
+from src.models.importacao_job import ImportacaoJob
+from src.models.saldo_estoque import SaldoEstoque
+from src.models.inventario_sessao import InventarioSessao
+from src.models.inventario_contagem import InventarioContagem
+from src.models.leitura_pneu import LeituraPneu
+from src.models.previsao_desgaste_pneu import PrevisaoDesgastePneu
+from src.models.alerta import Alerta
 from alembic import command
 from alembic.config import Config
 from alembic.util import CommandError
@@ -0,0 +1,65 @@
+"""
+Configuração do gunicorn
+
+Variáveis de ambiente:
+    PORT             porta HTTP (padrão 5000)
+    WEB_CONCURRENCY  número de processos worker (padrão 2 x CPUs + 1)
+    GUNICORN_THREADS threads por worker; acima de 1 usa o worker gthread (padrão 1)
+    GUNICORN_TIMEOUT timeout de requisição em segundos (padrão 120)
+    ALERTAS_INTERVALO_SEGUNDOS reavaliação completa dos alertas no master (padrão 900, 0 desativa)
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', '1'))
+worker_class = 'gthread' if threads > 1 else 'sync'
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '120'))
+accesslog = '-'
+errorlog = '-'
+
+
+# Aplicação do processo master (preparação do banco e atualização dos alertas), criada uma única vez
+aplicacao_master = None
+
+
+def _descartar_conexoes(app, fechar=True):
+    from src.db import db
+
+    with app.app_context():
+        db.engine.dispose(close=fechar)
+
+
+def on_starting(server):
+    # Migrações e dados de exemplo uma única vez, no processo master, antes dos workers
+    global aplicacao_master
+    from src.config import Config
+    from src.main import create_app, preparar_banco
+    from src.utils.alertas import ALERTAS_INTERVALO_SEGUNDOS
+
+    config = Config()
+    if config.PREPARAR_BANCO_NA_INICIALIZACAO or ALERTAS_INTERVALO_SEGUNDOS > 0:
+        aplicacao_master = create_app(config)
+    if config.PREPARAR_BANCO_NA_INICIALIZACAO:
+        preparar_banco(aplicacao_master)
+        # Conexões abertas no master não devem ser herdadas pelos workers
+        _descartar_conexoes(aplicacao_master)
+
+
+def when_ready(server):
+    # Regras de alerta que dependem do tempo: uma única thread, no master (os workers
+    # são processos filhos e carregam a própria aplicação, sem herdar a thread). O pool
+    # é fechado após cada execução para que os forks não herdem conexões abertas
+    from src.utils.alertas import iniciar_atualizacao_periodica
+
+    if aplicacao_master and iniciar_atualizacao_periodica(aplicacao_master, descartar_conexoes=True):
+        server.log.info('Atualização periódica dos alertas iniciada')
+
+
+def post_fork(server, worker):
+    # Se o fork ocorreu durante uma execução da thread, o worker herda a conexão em uso:
+    # descarta o pool herdado sem fechá-la (close=False), pois ela ainda pertence ao master
+    if aplicacao_master:
+        _descartar_conexoes(aplicacao_master, fechar=False)
@@ -30,6 +30,8 @@ from src.models.estoque_local import EstoqueLocal
 from src.models.movimentacao_estoque import MovimentacaoEstoque
 from src.models.os_peca import OS_Peca
 from src.models.analise_oleo import AnaliseOleo
+from src.models.saldo_estoque import SaldoEstoque
+from src.utils.saldos_estoque import criar_saldos_iniciais
 
 from datetime import datetime, date, timedelta
 
@@ -677,6 +679,12 @@ def criar_dados_exemplo_completos():
         
         # Atualizar dados existentes
         atualizar_dados_existentes()
+        db.session.flush()
+        
+        # Saldo por estoque das peças que ainda não têm
+        saldos = criar_saldos_iniciais()
+        if saldos:
+            print(f"📝 Saldos de estoque criados para {saldos} peças")
         
         # Commit final
         db.session.commit()
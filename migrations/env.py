@@ -20,11 +20,19 @@ from src.db import db  # noqa: E402
 from src.models.equipamento import Equipamento  # noqa: F401,E402
 from src.models.mecanico import Mecanico  # noqa: F401,E402
 from src.models.ordem_servico import OrdemServico  # noqa: F401,E402
+from src.models.sequencia_os import SequenciaOS  # noqa: F401,E402
 from src.models.peca import Peca  # noqa: F401,E402
 from src.models.pneu import Pneu  # noqa: F401,E402
 from src.models.tipo_equipamento import TipoEquipamento  # noqa: F401,E402
 from src.models.tipo_manutencao import TipoManutencao  # noqa: F401,E402
 from src.models.usuario import Usuario  # noqa: F401,E402
+from src.models.importacao_job import ImportacaoJob  # noqa: F401,E402
+from src.models.saldo_estoque import SaldoEstoque  # noqa: F401,E402
+from src.models.inventario_sessao import InventarioSessao  # noqa: F401,E402
+from src.models.inventario_contagem import InventarioContagem  # noqa: F401,E402
+from src.models.leitura_pneu import LeituraPneu  # noqa: F401,E402
+from src.models.previsao_desgaste_pneu import PrevisaoDesgastePneu  # noqa: F401,E402
+from src.models.alerta import Alerta  # noqa: F401,E402
 from src.models.item import Item  # ✅ biblioteca de itens
 
 target_metadata = db.metadata
@@ -0,0 +1,40 @@
+"""add index ordens_servico (data_abertura, id)
+
+Revision ID: 3f1a2b7c9d10
+Revises: 154126f4fb1b
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1a2b7c9d10'
+down_revision: Union[str, Sequence[str], None] = '154126f4fb1b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX_NAME = 'ix_ordens_servico_data_abertura_id'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if 'ordens_servico' in inspector.get_table_names():
+        indexes = [idx['name'] for idx in inspector.get_indexes('ordens_servico')]
+        if INDEX_NAME not in indexes:
+            op.create_index(INDEX_NAME, 'ordens_servico', ['data_abertura', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if 'ordens_servico' in inspector.get_table_names():
+        indexes = [idx['name'] for idx in inspector.get_indexes('ordens_servico')]
+        if INDEX_NAME in indexes:
+            op.drop_index(INDEX_NAME, table_name='ordens_servico')
@@ -0,0 +1,39 @@
+"""create sequencias_os
+
+Revision ID: 8b2e4d6f1a35
+Revises: 3f1a2b7c9d10
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e4d6f1a35'
+down_revision: Union[str, Sequence[str], None] = '3f1a2b7c9d10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if not inspector.has_table('sequencias_os'):
+        op.create_table('sequencias_os',
+            sa.Column('ano', sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column('ultimo_numero', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('ano')
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if inspector.has_table('sequencias_os'):
+        op.drop_table('sequencias_os')
@@ -0,0 +1,47 @@
+"""ordens_servico.data_abertura NOT NULL
+
+A listagem paginada ordena por (data_abertura DESC, id DESC) e compara a
+linha (data_abertura, id) com o cursor; sem nulos na coluna, o índice
+ix_ordens_servico_data_abertura_id atende a ordem e o filtro.
+
+Revision ID: a5c2e8f1d374
+Revises: e3b8c1f4a927
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect, text
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a5c2e8f1d374'
+down_revision: Union[str, Sequence[str], None] = 'e3b8c1f4a927'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if 'ordens_servico' in inspector.get_table_names():
+        bind.execute(text(
+            "UPDATE ordens_servico SET data_abertura = COALESCE(created_at, CURRENT_TIMESTAMP) "
+            "WHERE data_abertura IS NULL"
+        ))
+        # No SQLite o batch recria a tabela; resolve_fks=False evita refletir as tabelas
+        # referenciadas, que podem não existir em um banco criado só pelas migrações
+        with op.batch_alter_table('ordens_servico', reflect_kwargs={'resolve_fks': False}) as batch_op:
+            batch_op.alter_column('data_abertura', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if 'ordens_servico' in inspector.get_table_names():
+        with op.batch_alter_table('ordens_servico', reflect_kwargs={'resolve_fks': False}) as batch_op:
+            batch_op.alter_column('data_abertura', existing_type=sa.DateTime(), nullable=True)
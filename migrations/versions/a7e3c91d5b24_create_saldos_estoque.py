@@ -0,0 +1,65 @@
+"""create saldos_estoque
+
+Revision ID: a7e3c91d5b24
+Revises: c4d9e2a7b610
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7e3c91d5b24'
+down_revision: Union[str, Sequence[str], None] = 'c4d9e2a7b610'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if not inspector.has_table('saldos_estoque'):
+        op.create_table('saldos_estoque',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('peca_id', sa.Integer(), nullable=False),
+            sa.Column('estoque_local_id', sa.Integer(), nullable=False),
+            sa.Column('quantidade', sa.Integer(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.CheckConstraint('quantidade >= 0', name='ck_saldos_estoque_quantidade'),
+            sa.ForeignKeyConstraint(['estoque_local_id'], ['estoques_local.id'], ),
+            sa.ForeignKeyConstraint(['peca_id'], ['pecas.id'], ),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('peca_id', 'estoque_local_id', name='uq_saldos_estoque_peca_local')
+        )
+        op.create_index('ix_saldos_estoque_estoque_local_id', 'saldos_estoque', ['estoque_local_id'])
+
+        # Saldo atual de cada peça no seu local (ou no almoxarifado central)
+        if inspector.has_table('pecas') and inspector.has_table('estoques_local'):
+            op.execute("""
+                INSERT INTO saldos_estoque (peca_id, estoque_local_id, quantidade, updated_at)
+                SELECT p.id,
+                       COALESCE(p.estoque_local_id,
+                                (SELECT id FROM estoques_local WHERE codigo = 'ALM_CENTRAL'),
+                                (SELECT MIN(id) FROM estoques_local)),
+                       p.quantidade,
+                       CURRENT_TIMESTAMP
+                FROM pecas p
+                WHERE p.quantidade > 0
+                  AND COALESCE(p.estoque_local_id,
+                               (SELECT id FROM estoques_local WHERE codigo = 'ALM_CENTRAL'),
+                               (SELECT MIN(id) FROM estoques_local)) IS NOT NULL
+            """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if inspector.has_table('saldos_estoque'):
+        op.drop_index('ix_saldos_estoque_estoque_local_id', table_name='saldos_estoque')
+        op.drop_table('saldos_estoque')
@@ -0,0 +1,39 @@
+"""add sulco_inicial_mm to pneus
+
+Revision ID: b4e7d1a9c360
+Revises: f1c6a9d3e852
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4e7d1a9c360'
+down_revision: Union[str, Sequence[str], None] = 'f1c6a9d3e852'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if 'pneus' in inspector.get_table_names():
+        columns = [col['name'] for col in inspector.get_columns('pneus')]
+        if 'sulco_inicial_mm' not in columns:
+            op.add_column('pneus', sa.Column('sulco_inicial_mm', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if 'pneus' in inspector.get_table_names():
+        columns = [col['name'] for col in inspector.get_columns('pneus')]
+        if 'sulco_inicial_mm' in columns:
+            op.drop_column('pneus', 'sulco_inicial_mm')
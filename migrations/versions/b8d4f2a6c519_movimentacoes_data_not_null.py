@@ -0,0 +1,54 @@
+"""movimentacoes_estoque.data_movimentacao NOT NULL
+
+O histórico paginado ordena por (data_movimentacao DESC, id DESC) e compara
+a linha (data_movimentacao, id) com o cursor; sem nulos na coluna, os
+índices (filtro, data_movimentacao, id) atendem a ordem e o filtro. As
+movimentações sem data (antes listadas por último) recebem a data da mais
+antiga, mantendo a posição no histórico.
+
+Revision ID: b8d4f2a6c519
+Revises: a5c2e8f1d374
+Create Date: 2026-10-19 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect, text
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d4f2a6c519'
+down_revision: Union[str, Sequence[str], None] = 'a5c2e8f1d374'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if 'movimentacoes_estoque' in inspector.get_table_names():
+        mais_antiga = bind.execute(text("SELECT MIN(data_movimentacao) FROM movimentacoes_estoque")).scalar()
+        if mais_antiga is not None:
+            bind.execute(text(
+                "UPDATE movimentacoes_estoque SET data_movimentacao = :data WHERE data_movimentacao IS NULL"
+            ), {'data': mais_antiga})
+        else:
+            bind.execute(text(
+                "UPDATE movimentacoes_estoque SET data_movimentacao = CURRENT_TIMESTAMP "
+                "WHERE data_movimentacao IS NULL"
+            ))
+        # resolve_fks=False: ver a5c2e8f1d374
+        with op.batch_alter_table('movimentacoes_estoque', reflect_kwargs={'resolve_fks': False}) as batch_op:
+            batch_op.alter_column('data_movimentacao', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if 'movimentacoes_estoque' in inspector.get_table_names():
+        with op.batch_alter_table('movimentacoes_estoque', reflect_kwargs={'resolve_fks': False}) as batch_op:
+            batch_op.alter_column('data_movimentacao', existing_type=sa.DateTime(), nullable=True)
@@ -0,0 +1,45 @@
+"""inventario_sessoes.created_at NOT NULL
+
+A listagem de sessões é paginada por (created_at DESC, id DESC) com
+comparação de linha no cursor, que exige a coluna sem nulos.
+
+Revision ID: c2e7a9d4f138
+Revises: b8d4f2a6c519
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect, text
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2e7a9d4f138'
+down_revision: Union[str, Sequence[str], None] = 'b8d4f2a6c519'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if inspector.has_table('inventario_sessoes'):
+        bind.execute(text(
+            "UPDATE inventario_sessoes SET created_at = COALESCE(fechada_em, CURRENT_TIMESTAMP) "
+            "WHERE created_at IS NULL"
+        ))
+        # resolve_fks=False: ver a5c2e8f1d374
+        with op.batch_alter_table('inventario_sessoes', reflect_kwargs={'resolve_fks': False}) as batch_op:
+            batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if inspector.has_table('inventario_sessoes'):
+        with op.batch_alter_table('inventario_sessoes', reflect_kwargs={'resolve_fks': False}) as batch_op:
+            batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=True)
@@ -0,0 +1,54 @@
+"""create importacao_jobs
+
+Revision ID: c4d9e2a7b610
+Revises: 8b2e4d6f1a35
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d9e2a7b610'
+down_revision: Union[str, Sequence[str], None] = '8b2e4d6f1a35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if not inspector.has_table('importacao_jobs'):
+        op.create_table('importacao_jobs',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('entidade', sa.String(length=30), nullable=False),
+            sa.Column('arquivo_nome', sa.String(length=255), nullable=False),
+            sa.Column('arquivo_caminho', sa.String(length=500), nullable=True),
+            sa.Column('status', sa.String(length=20), nullable=False),
+            sa.Column('total_linhas', sa.Integer(), nullable=True),
+            sa.Column('linhas_processadas', sa.Integer(), nullable=False),
+            sa.Column('adicionados', sa.Integer(), nullable=False),
+            sa.Column('atualizados', sa.Integer(), nullable=False),
+            sa.Column('ignorados', sa.Integer(), nullable=False),
+            sa.Column('erros', sa.Text(), nullable=True),
+            sa.Column('mensagem_erro', sa.Text(), nullable=True),
+            sa.Column('usuario_id', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('iniciado_em', sa.DateTime(), nullable=True),
+            sa.Column('finalizado_em', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if inspector.has_table('importacao_jobs'):
+        op.drop_table('importacao_jobs')
@@ -0,0 +1,61 @@
+"""create leituras_pneus and index pneus.numero_fogo
+
+Revision ID: c7f2e9a4b815
+Revises: b4e7d1a9c360
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7f2e9a4b815'
+down_revision: Union[str, Sequence[str], None] = 'b4e7d1a9c360'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if not inspector.has_table('leituras_pneus'):
+        op.create_table('leituras_pneus',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('pneu_id', sa.Integer(), nullable=False),
+            sa.Column('data_leitura', sa.DateTime(), nullable=False),
+            sa.Column('km_atual', sa.Float(), nullable=True),
+            sa.Column('km_rodados', sa.Float(), nullable=True),
+            sa.Column('medida_sulco_mm', sa.Float(), nullable=True),
+            sa.Column('origem', sa.String(length=20), nullable=False),
+            sa.Column('usuario_id', sa.Integer(), nullable=True),
+            sa.Column('observacoes', sa.String(length=200), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['pneu_id'], ['pneus.id'], ),
+            sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_leituras_pneus_pneu_data_id', 'leituras_pneus', ['pneu_id', 'data_leitura', 'id'])
+
+    # Leituras em lote identificam o pneu pelo número de fogo
+    if inspector.has_table('pneus'):
+        indices = {indice['name'] for indice in inspector.get_indexes('pneus')}
+        if 'ix_pneus_numero_fogo' not in indices:
+            op.create_index('ix_pneus_numero_fogo', 'pneus', ['numero_fogo'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if inspector.has_table('pneus'):
+        indices = {indice['name'] for indice in inspector.get_indexes('pneus')}
+        if 'ix_pneus_numero_fogo' in indices:
+            op.drop_index('ix_pneus_numero_fogo', table_name='pneus')
+    if inspector.has_table('leituras_pneus'):
+        op.drop_index('ix_leituras_pneus_pneu_data_id', table_name='leituras_pneus')
+        op.drop_table('leituras_pneus')
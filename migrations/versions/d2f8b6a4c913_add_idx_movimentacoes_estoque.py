@@ -0,0 +1,47 @@
+"""add indexes movimentacoes_estoque (filtro, data_movimentacao, id)
+
+Revision ID: d2f8b6a4c913
+Revises: a7e3c91d5b24
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f8b6a4c913'
+down_revision: Union[str, Sequence[str], None] = 'a7e3c91d5b24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    'ix_movimentacoes_estoque_data_id': ['data_movimentacao', 'id'],
+    'ix_movimentacoes_estoque_peca_data_id': ['peca_id', 'data_movimentacao', 'id'],
+    'ix_movimentacoes_estoque_tipo_data_id': ['tipo_movimentacao', 'data_movimentacao', 'id'],
+    'ix_movimentacoes_estoque_usuario_data_id': ['usuario_id', 'data_movimentacao', 'id'],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if 'movimentacoes_estoque' in inspector.get_table_names():
+        indexes = [idx['name'] for idx in inspector.get_indexes('movimentacoes_estoque')]
+        for nome, colunas in INDEXES.items():
+            if nome not in indexes:
+                op.create_index(nome, 'movimentacoes_estoque', colunas)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if 'movimentacoes_estoque' in inspector.get_table_names():
+        indexes = [idx['name'] for idx in inspector.get_indexes('movimentacoes_estoque')]
+        for nome in INDEXES:
+            if nome in indexes:
+                op.drop_index(nome, table_name='movimentacoes_estoque')
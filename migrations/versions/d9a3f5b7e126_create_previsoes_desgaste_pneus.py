@@ -0,0 +1,51 @@
+"""create previsoes_desgaste_pneus
+
+Revision ID: d9a3f5b7e126
+Revises: c7f2e9a4b815
+Create Date: 2026-10-18 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9a3f5b7e126'
+down_revision: Union[str, Sequence[str], None] = 'c7f2e9a4b815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if not inspector.has_table('previsoes_desgaste_pneus'):
+        op.create_table('previsoes_desgaste_pneus',
+            sa.Column('pneu_id', sa.Integer(), nullable=False),
+            sa.Column('leituras', sa.Integer(), nullable=False),
+            sa.Column('taxa_desgaste_mm_1000km', sa.Float(), nullable=False),
+            sa.Column('km_por_dia', sa.Float(), nullable=True),
+            sa.Column('sulco_ultima_leitura', sa.Float(), nullable=False),
+            sa.Column('km_ultima_leitura', sa.Float(), nullable=False),
+            sa.Column('km_restantes', sa.Float(), nullable=False),
+            sa.Column('km_limite', sa.Float(), nullable=False),
+            sa.Column('data_limite', sa.Date(), nullable=True),
+            sa.Column('ultima_leitura_em', sa.DateTime(), nullable=False),
+            sa.Column('calculado_em', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['pneu_id'], ['pneus.id'], ),
+            sa.PrimaryKeyConstraint('pneu_id')
+        )
+        op.create_index('ix_previsoes_desgaste_pneus_data_limite', 'previsoes_desgaste_pneus', ['data_limite'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if inspector.has_table('previsoes_desgaste_pneus'):
+        op.drop_index('ix_previsoes_desgaste_pneus_data_limite', table_name='previsoes_desgaste_pneus')
+        op.drop_table('previsoes_desgaste_pneus')
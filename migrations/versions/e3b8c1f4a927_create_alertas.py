@@ -0,0 +1,55 @@
+"""create alertas
+
+Revision ID: e3b8c1f4a927
+Revises: d9a3f5b7e126
+Create Date: 2026-10-19 01:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3b8c1f4a927'
+down_revision: Union[str, Sequence[str], None] = 'd9a3f5b7e126'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if not inspector.has_table('alertas'):
+        op.create_table('alertas',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('entidade', sa.String(length=30), nullable=False),
+            sa.Column('entidade_id', sa.Integer(), nullable=False),
+            sa.Column('tipo', sa.String(length=40), nullable=False),
+            sa.Column('severidade', sa.String(length=20), nullable=False),
+            sa.Column('mensagem', sa.String(length=300), nullable=False),
+            sa.Column('dados', sa.Text(), nullable=True),
+            sa.Column('equipamento_id', sa.Integer(), nullable=True),
+            sa.Column('mecanico_id', sa.Integer(), nullable=True),
+            sa.Column('criado_em', sa.DateTime(), nullable=False),
+            sa.Column('atualizado_em', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('entidade', 'entidade_id', 'tipo', name='uq_alertas_entidade_tipo')
+        )
+        op.create_index('ix_alertas_criado_em_id', 'alertas', ['criado_em', 'id'])
+        op.create_index('ix_alertas_severidade_criado_em_id', 'alertas', ['severidade', 'criado_em', 'id'])
+        op.create_index('ix_alertas_mecanico_criado_em_id', 'alertas', ['mecanico_id', 'criado_em', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if inspector.has_table('alertas'):
+        op.drop_index('ix_alertas_mecanico_criado_em_id', table_name='alertas')
+        op.drop_index('ix_alertas_severidade_criado_em_id', table_name='alertas')
+        op.drop_index('ix_alertas_criado_em_id', table_name='alertas')
+        op.drop_table('alertas')
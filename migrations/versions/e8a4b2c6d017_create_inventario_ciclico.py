@@ -0,0 +1,72 @@
+"""create inventario_sessoes and inventario_contagens
+
+Revision ID: e8a4b2c6d017
+Revises: d2f8b6a4c913
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8a4b2c6d017'
+down_revision: Union[str, Sequence[str], None] = 'd2f8b6a4c913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if not inspector.has_table('inventario_sessoes'):
+        op.create_table('inventario_sessoes',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('descricao', sa.String(length=200), nullable=True),
+            sa.Column('estoque_local_id', sa.Integer(), nullable=False),
+            sa.Column('criterios', sa.Text(), nullable=True),
+            sa.Column('status', sa.String(length=20), nullable=False),
+            sa.Column('total_itens', sa.Integer(), nullable=False),
+            sa.Column('itens_contados', sa.Integer(), nullable=False),
+            sa.Column('itens_ajustados', sa.Integer(), nullable=True),
+            sa.Column('usuario_id', sa.Integer(), nullable=True),
+            sa.Column('fechada_por_id', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('fechada_em', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['estoque_local_id'], ['estoques_local.id'], ),
+            sa.ForeignKeyConstraint(['fechada_por_id'], ['usuarios.id'], ),
+            sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    if not inspector.has_table('inventario_contagens'):
+        op.create_table('inventario_contagens',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('sessao_id', sa.Integer(), nullable=False),
+            sa.Column('peca_id', sa.Integer(), nullable=False),
+            sa.Column('quantidade_sistema', sa.Integer(), nullable=True),
+            sa.Column('quantidade_contada', sa.Integer(), nullable=True),
+            sa.Column('contado_por_id', sa.Integer(), nullable=True),
+            sa.Column('contado_em', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['contado_por_id'], ['usuarios.id'], ),
+            sa.ForeignKeyConstraint(['peca_id'], ['pecas.id'], ),
+            sa.ForeignKeyConstraint(['sessao_id'], ['inventario_sessoes.id'], ),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('sessao_id', 'peca_id', name='uq_inventario_contagens_sessao_peca')
+        )
+        op.create_index('ix_inventario_contagens_peca_id', 'inventario_contagens', ['peca_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if inspector.has_table('inventario_contagens'):
+        op.drop_index('ix_inventario_contagens_peca_id', table_name='inventario_contagens')
+        op.drop_table('inventario_contagens')
+    if inspector.has_table('inventario_sessoes'):
+        op.drop_table('inventario_sessoes')
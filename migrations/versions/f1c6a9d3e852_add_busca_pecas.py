@@ -0,0 +1,112 @@
+"""add search indexes for pecas (pg_trgm/tsvector or SQLite FTS5)
+
+Revision ID: f1c6a9d3e852
+Revises: e8a4b2c6d017
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+from sqlalchemy import inspect, text
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c6a9d3e852'
+down_revision: Union[str, Sequence[str], None] = 'e8a4b2c6d017'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# PostgreSQL: mesmas expressões usadas em src/utils/busca_pecas.py
+INDICES_POSTGRESQL = {
+    'ix_pecas_codigo_trgm': "pecas USING gin (codigo gin_trgm_ops)",
+    'ix_pecas_nome_trgm': "pecas USING gin (nome gin_trgm_ops)",
+    'ix_pecas_fornecedor_trgm': "pecas USING gin (fornecedor gin_trgm_ops)",
+    'ix_itens_descricao_item_trgm': "itens USING gin (descricao_item gin_trgm_ops)",
+    'ix_pecas_busca_tsv': "pecas USING gin (to_tsvector('simple', coalesce(codigo, '') || ' ' "
+                          "|| coalesce(nome, '') || ' ' || coalesce(fornecedor, '')))",
+    'ix_itens_busca_tsv': "itens USING gin (to_tsvector('simple', coalesce(descricao_item, '')))",
+}
+
+# SQLite: tabela FTS5 com uma linha por peça (rowid = pecas.id), mantida por triggers
+TABELA_FTS = 'pecas_busca'
+
+SELECT_PECA = """
+    SELECT {p}.id, {p}.codigo, {p}.nome, {p}.fornecedor,
+           (SELECT descricao_item FROM itens WHERE numero_item = {p}.codigo)
+"""
+
+TRIGGERS_SQLITE = {
+    'trg_pecas_busca_ins': f"""
+        AFTER INSERT ON pecas BEGIN
+            INSERT INTO {TABELA_FTS} (rowid, codigo, nome, fornecedor, descricao_item) {SELECT_PECA.format(p='NEW')};
+        END""",
+    'trg_pecas_busca_upd': f"""
+        AFTER UPDATE OF codigo, nome, fornecedor ON pecas BEGIN
+            DELETE FROM {TABELA_FTS} WHERE rowid = OLD.id;
+            INSERT INTO {TABELA_FTS} (rowid, codigo, nome, fornecedor, descricao_item) {SELECT_PECA.format(p='NEW')};
+        END""",
+    'trg_pecas_busca_del': f"""
+        AFTER DELETE ON pecas BEGIN
+            DELETE FROM {TABELA_FTS} WHERE rowid = OLD.id;
+        END""",
+    'trg_itens_busca_ins': f"""
+        AFTER INSERT ON itens BEGIN
+            UPDATE {TABELA_FTS} SET descricao_item = NEW.descricao_item
+            WHERE rowid IN (SELECT id FROM pecas WHERE codigo = NEW.numero_item);
+        END""",
+    'trg_itens_busca_upd': f"""
+        AFTER UPDATE OF numero_item, descricao_item ON itens BEGIN
+            UPDATE {TABELA_FTS} SET descricao_item = NULL
+            WHERE rowid IN (SELECT id FROM pecas WHERE codigo = OLD.numero_item);
+            UPDATE {TABELA_FTS} SET descricao_item = NEW.descricao_item
+            WHERE rowid IN (SELECT id FROM pecas WHERE codigo = NEW.numero_item);
+        END""",
+    'trg_itens_busca_del': f"""
+        AFTER DELETE ON itens BEGIN
+            UPDATE {TABELA_FTS} SET descricao_item = NULL
+            WHERE rowid IN (SELECT id FROM pecas WHERE codigo = OLD.numero_item);
+        END""",
+}
+
+
+def _fts5_disponivel(bind):
+    return bind.execute(text("SELECT sqlite_compileoption_used('ENABLE_FTS5')")).scalar() == 1
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if not (inspector.has_table('pecas') and inspector.has_table('itens')):
+        return
+
+    if bind.dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for nome, definicao in INDICES_POSTGRESQL.items():
+            op.execute(f'CREATE INDEX IF NOT EXISTS {nome} ON {definicao}')
+
+    elif bind.dialect.name == 'sqlite' and _fts5_disponivel(bind):
+        if not inspector.has_table(TABELA_FTS):
+            op.execute(f"""
+                CREATE VIRTUAL TABLE {TABELA_FTS} USING fts5(
+                    codigo, nome, fornecedor, descricao_item,
+                    tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+                )
+            """)
+            op.execute(f"INSERT INTO {TABELA_FTS} (rowid, codigo, nome, fornecedor, descricao_item) "
+                       f"{SELECT_PECA.format(p='pecas')} FROM pecas")
+        for nome, corpo in TRIGGERS_SQLITE.items():
+            op.execute(f'CREATE TRIGGER IF NOT EXISTS {nome} {corpo}')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        for nome in INDICES_POSTGRESQL:
+            op.execute(f'DROP INDEX IF EXISTS {nome}')
+    elif bind.dialect.name == 'sqlite':
+        for nome in TRIGGERS_SQLITE:
+            op.execute(f'DROP TRIGGER IF EXISTS {nome}')
+        op.execute(f'DROP TABLE IF EXISTS {TABELA_FTS}')
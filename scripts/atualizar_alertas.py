@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+"""
+Reavalia todas as regras de alerta e atualiza a tabela `alertas`.
+
+As alterações feitas pela API já reavaliam os alertas das linhas alteradas,
+a inicialização da aplicação faz a carga completa e o gunicorn repete a
+reavaliação a cada ALERTAS_INTERVALO_SEGUNDOS (regras que dependem da
+passagem do tempo: OS atrasada ou parada, previsão de desgaste). Este script
+serve para rodar a reavaliação sob demanda, no cron ou como processo
+separado (--intervalo), com ALERTAS_INTERVALO_SEGUNDOS=0 no gunicorn.
+
+Exemplo:
+    DATABASE_URL=postgresql://... JWT_SECRET_KEY=x python scripts/atualizar_alertas.py
+    DATABASE_URL=postgresql://... JWT_SECRET_KEY=x python scripts/atualizar_alertas.py --entidade pneu
+    DATABASE_URL=postgresql://... JWT_SECRET_KEY=x python scripts/atualizar_alertas.py --intervalo 900
+"""
+import argparse
+import os
+import sys
+import time
+
+if sys.version_info < (3, 8):
+    raise RuntimeError("Python 3.8+ is required to run this script.")
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.main import create_app
+from src.db import db
+from src.utils.alertas import REGRAS, atualizar_alertas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entidade', choices=list(REGRAS), action='append',
+                        help='reavaliar só esta entidade (pode repetir); padrão: todas')
+    parser.add_argument('--intervalo', type=int, default=0,
+                        help='repetir a cada N segundos (processo worker); padrão: uma vez')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        while True:
+            # Um commit por entidade
+            for entidade, (ativos, resolvidos) in atualizar_alertas(args.entidade).items():
+                print(f'✅ {entidade}: {ativos} alertas ativos, {resolvidos} resolvidos', flush=True)
+            if args.intervalo <= 0:
+                break
+            db.session.remove()
+            time.sleep(args.intervalo)
+
+
+if __name__ == '__main__':
+    main()
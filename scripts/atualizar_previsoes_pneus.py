@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+"""
+Recalcula as previsões de desgaste dos pneus em uso.
+
+As leituras gravadas pela API já atualizam a previsão dos pneus lidos; este
+script cobre o que entrou por fora dela (carga inicial, importações,
+correções no banco) recalculando apenas os pneus com leituras mais novas
+que a previsão. --todos recalcula todos os pneus em uso (ex.: após mudar
+PNEU_SULCO_LIMITE_MM).
+
+Exemplo:
+    DATABASE_URL=postgresql://... JWT_SECRET_KEY=x python scripts/atualizar_previsoes_pneus.py
+    DATABASE_URL=postgresql://... JWT_SECRET_KEY=x python scripts/atualizar_previsoes_pneus.py --todos
+"""
+import argparse
+import os
+import sys
+
+if sys.version_info < (3, 8):
+    raise RuntimeError("Python 3.8+ is required to run this script.")
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import select
+
+from src.main import create_app
+from src.db import db
+from src.models.pneu import Pneu
+from src.utils.previsao_pneus import LOTE_PNEUS, atualizar_previsoes, pneus_desatualizados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--todos', action='store_true', help='recalcular todos os pneus em uso')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if args.todos:
+            pneu_ids = list(db.session.scalars(select(Pneu.id).where(Pneu.status == 'em_uso').order_by(Pneu.id)))
+        else:
+            pneu_ids = pneus_desatualizados()
+
+        gravadas = 0
+        # Um commit por lote
+        for inicio in range(0, len(pneu_ids), LOTE_PNEUS):
+            gravadas += atualizar_previsoes(pneu_ids[inicio:inicio + LOTE_PNEUS])
+            db.session.commit()
+        print(f'✅ {len(pneu_ids)} pneus recalculados, {gravadas} com previsão')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+"""
+Benchmark dos endpoints de listagem e relatório da API.
+
+Chama, via Flask test client, cada rota GET sem parâmetros de URL dos
+blueprints e registra latência (mínima, mediana, p95) e número de consultas
+SQL por requisição. O resultado é gravado em JSON e pode ser comparado com
+uma execução anterior (--comparar) para detectar regressões entre commits.
+
+Exemplo:
+    python scripts/gerar_dados_sinteticos.py --criar-schema --escala 0.05
+    python scripts/benchmark_endpoints.py --saida benchmark_base.json
+    # ... alterações ...
+    python scripts/benchmark_endpoints.py --comparar benchmark_base.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+if sys.version_info < (3, 8):
+    raise RuntimeError("Python 3.8+ is required to run this script.")
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import event
+
+from src.main import create_app
+from src.db import db
+from src.utils.cache import CACHES_POR_TABELAS
+
+USUARIO_PADRAO = 'benchmark'
+SENHA_PADRAO = 'benchmark123'
+
+# Rotas GET que não são listagens/relatórios
+ROTAS_IGNORADAS = {
+    '/api', '/api/health', '/api/auth/me', '/api/auth/profile', '/api/auth/validate',
+    '/api/usuarios/perfil', '/api/usuarios/niveis-acesso', '/api/importacao/template-pecas',
+}
+
+
+def descobrir_endpoints(app):
+    """Rotas GET da API sem parâmetros de URL, em ordem alfabética"""
+    endpoints = []
+    for regra in app.url_map.iter_rules():
+        if 'GET' not in regra.methods or regra.arguments or not regra.rule.startswith('/api'):
+            continue
+        if regra.rule in ROTAS_IGNORADAS:
+            continue
+        endpoints.append(regra.rule)
+    return sorted(endpoints)
+
+
+def _commit_atual():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+
+def medir(app, endpoints, usuario, senha, repeticoes, aquecimento):
+    client = app.test_client()
+    resposta = client.post('/api/auth/login', json={'username': usuario, 'senha': senha})
+    if resposta.status_code != 200:
+        raise SystemExit(f"Falha no login do usuário '{usuario}': {resposta.get_json()}")
+    headers = {'Authorization': f"Bearer {resposta.get_json()['token']}"}
+
+    contador = {'consultas': 0}
+    with app.app_context():
+        engine = db.engine
+
+    def _contar(*args, **kwargs):
+        contador['consultas'] += 1
+    event.listen(engine, 'before_cursor_execute', _contar)
+
+    resultados = {}
+    try:
+        for endpoint in endpoints:
+            for _ in range(aquecimento):
+                client.get(endpoint, headers=headers)
+
+            latencias, consultas, status, tamanho = [], [], None, 0
+            for _ in range(repeticoes):
+                # Mede o cálculo completo, não o acerto em cache (dashboard, relatórios de pneus)
+                for cache, _tabelas in CACHES_POR_TABELAS:
+                    cache.invalidar()
+                contador['consultas'] = 0
+                inicio = time.perf_counter()
+                resposta = client.get(endpoint, headers=headers)
+                latencias.append((time.perf_counter() - inicio) * 1000)
+                consultas.append(contador['consultas'])
+                status = resposta.status_code
+                tamanho = len(resposta.get_data())
+
+            resultados[endpoint] = {
+                'status': status,
+                'latencia_min_ms': round(min(latencias), 2),
+                'latencia_mediana_ms': round(statistics.median(latencias), 2),
+                'latencia_p95_ms': round(_percentil(latencias, 95), 2),
+                'consultas': max(consultas),
+                'bytes': tamanho,
+            }
+            r = resultados[endpoint]
+            print(f"{endpoint:45} {status}  {r['latencia_mediana_ms']:9.1f} ms  {r['consultas']:6d} consultas")
+    finally:
+        event.remove(engine, 'before_cursor_execute', _contar)
+
+    return resultados
+
+
+def comparar(atual, base, tolerancia):
+    """Imprime a variação em relação à base e retorna os endpoints que regrediram"""
+    regressoes = []
+    print(f"\n{'endpoint':45} {'mediana base':>12} {'atual':>10} {'var.':>7}  {'consultas':>15}")
+    for endpoint, r in atual.items():
+        anterior = base.get(endpoint)
+        if not anterior:
+            print(f"{endpoint:45} {'(novo)':>12}")
+            continue
+        variacao = (r['latencia_mediana_ms'] / anterior['latencia_mediana_ms'] - 1) if anterior['latencia_mediana_ms'] else 0
+        consultas = f"{anterior['consultas']} -> {r['consultas']}"
+        print(f"{endpoint:45} {anterior['latencia_mediana_ms']:12.1f} {r['latencia_mediana_ms']:10.1f} "
+              f"{variacao:+7.0%}  {consultas:>15}")
+        if variacao > tolerancia or r['consultas'] > anterior['consultas']:
+            regressoes.append(endpoint)
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--usuario', default=USUARIO_PADRAO)
+    parser.add_argument('--senha', default=SENHA_PADRAO)
+    parser.add_argument('--repeticoes', type=int, default=5, help='medições por endpoint')
+    parser.add_argument('--aquecimento', type=int, default=1, help='requisições descartadas antes de medir')
+    parser.add_argument('--filtro', default=None, help='medir apenas endpoints que contenham este texto')
+    parser.add_argument('--saida', default='benchmark_resultado.json', help='arquivo JSON de resultado')
+    parser.add_argument('--comparar', default=None, help='JSON de uma execução anterior')
+    parser.add_argument('--tolerancia', type=float, default=0.2,
+                        help='aumento relativo de latência mediana aceito na comparação (0.2 = 20%%)')
+    args = parser.parse_args()
+
+    app = create_app()
+    endpoints = descobrir_endpoints(app)
+    if args.filtro:
+        endpoints = [e for e in endpoints if args.filtro in e]
+
+    resultados = medir(app, endpoints, args.usuario, args.senha, args.repeticoes, args.aquecimento)
+
+    with app.app_context():
+        banco = db.engine.url.render_as_string(hide_password=True)
+    saida = {
+        'commit': _commit_atual(),
+        'executado_em': datetime.utcnow().isoformat(),
+        'banco': banco,
+        'repeticoes': args.repeticoes,
+        'endpoints': resultados,
+    }
+    with open(args.saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(saida, arquivo, indent=2, ensure_ascii=False)
+    print(f"\n💾 Resultado gravado em {args.saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as arquivo:
+            base = json.load(arquivo)
+        regressoes = comparar(resultados, base.get('endpoints', {}), args.tolerancia)
+        if regressoes:
+            print(f"\n⚠️  {len(regressoes)} endpoint(s) com regressão: {', '.join(regressoes)}")
+            sys.exit(1)
+        print("\n✅ Nenhuma regressão acima da tolerância")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,306 @@
+#!/usr/bin/env python
+"""
+Gera uma frota sintética reprodutível para testes de carga.
+
+Os volumes padrão aproximam a escala de produção; use --escala para reduzir
+(ex.: --escala 0.01) ou ajuste cada volume individualmente. A mesma semente
+gera sempre os mesmos dados. As linhas são inseridas em lotes com
+INSERT em massa (executemany), sem instanciar objetos ORM.
+
+Exemplo:
+    DATABASE_URL=sqlite:///instance/bench.db JWT_SECRET_KEY=x \\
+        python scripts/gerar_dados_sinteticos.py --criar-schema --escala 0.05
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+if sys.version_info < (3, 8):
+    raise RuntimeError("Python 3.8+ is required to run this script.")
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import insert, select
+
+from src.main import create_app
+from src.db import db
+from src.models.usuario import Usuario
+from src.models.tipo_equipamento import TipoEquipamento
+from src.models.tipo_manutencao import TipoManutencao
+from src.models.grupo_item import GrupoItem
+from src.models.estoque_local import EstoqueLocal
+from src.models.item import Item
+from src.models.equipamento import Equipamento
+from src.models.mecanico import Mecanico
+from src.models.peca import Peca
+from src.models.pneu import Pneu
+from src.models.ordem_servico import OrdemServico
+from src.models.movimentacao_estoque import MovimentacaoEstoque
+from src.models.analise_oleo import AnaliseOleo
+from src.utils.saldos_estoque import criar_saldos_iniciais
+
+USUARIO_BENCHMARK = 'benchmark'
+SENHA_BENCHMARK = 'benchmark123'
+
+VOLUMES_PADRAO = {
+    'equipamentos': 2000,
+    'mecanicos': 150,
+    'pecas': 10000,
+    'pneus': 20000,
+    'ordens_servico': 200000,
+    'movimentacoes_estoque': 1000000,
+    'analises_oleo': 50000,
+}
+
+FABRICANTES = ['Caterpillar', 'Komatsu', 'Volvo', 'Scania', 'Liebherr', 'Hitachi', 'John Deere']
+TIPOS_EQUIPAMENTO = ['Caminhão Fora de Estrada', 'Escavadeira', 'Carregadeira', 'Trator de Esteira',
+                     'Motoniveladora', 'Perfuratriz', 'Caminhão Pipa']
+LOCALIZACOES = ['Mina Norte', 'Mina Sul', 'Britagem', 'Oficina Central', 'Pátio de Estéril']
+TIPOS_MANUTENCAO = [('Preventiva', 'PREV'), ('Corretiva Mecânica', 'CORR_MEC'),
+                    ('Corretiva Elétrica', 'CORR_ELE'), ('Caldeiraria', 'CALD'), ('Inspeção', 'INSP')]
+GRUPOS = ['Filtros', 'Rolamentos', 'Correias', 'Lubrificantes', 'Elétricos', 'Hidráulicos', 'Pneus']
+MARCAS_PNEU = ['Michelin', 'Bridgestone', 'Goodyear', 'Pirelli', 'Continental']
+FORNECEDORES = ['Fornecedor A', 'Fornecedor B', 'Fornecedor C', 'Fornecedor D']
+POSICOES = ['DE', 'DD', 'TEE', 'TEI', 'TDI', 'TDE']
+STATUS_OS = ['aberta', 'em_execucao', 'aguardando_pecas', 'concluida', 'concluida', 'concluida', 'cancelada']
+PRIORIDADES = ['baixa', 'media', 'alta', 'critica']
+
+
+def _em_lotes(gerador, tamanho_lote):
+    lote = []
+    for linha in gerador:
+        lote.append(linha)
+        if len(lote) >= tamanho_lote:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def inserir_em_massa(modelo, linhas, tamanho_lote):
+    """Insere as linhas (dicts) em lotes e retorna a quantidade inserida"""
+    tabela = modelo.__table__
+    total = 0
+    inicio = time.perf_counter()
+    for lote in _em_lotes(linhas, tamanho_lote):
+        db.session.execute(insert(tabela), lote)
+        db.session.commit()
+        total += len(lote)
+    print(f"  {tabela.name}: {total} linhas em {time.perf_counter() - inicio:.1f}s")
+    return total
+
+
+def _ultimos_ids(modelo, quantidade):
+    """Ids das `quantidade` linhas inseridas por último"""
+    if quantidade <= 0:
+        return []
+    coluna_id = modelo.__table__.c.id
+    ids = db.session.execute(select(coluna_id).order_by(coluna_id.desc()).limit(quantidade)).scalars().all()
+    return sorted(ids)
+
+
+def _data_aleatoria(rng, inicio, dias):
+    return inicio + timedelta(seconds=rng.randrange(dias * 86400))
+
+
+def gerar_cadastros(sufixo):
+    """Tabelas auxiliares pequenas: tipos, grupos, estoques, item de pneu e usuário do benchmark"""
+    if not Usuario.query.filter_by(username=USUARIO_BENCHMARK).first():
+        usuario = Usuario(username=USUARIO_BENCHMARK, email='benchmark@cmms.local',
+                          nome_completo='Usuário Benchmark', cargo='Benchmark', nivel_acesso='ADM')
+        usuario.set_password(SENHA_BENCHMARK)
+        db.session.add(usuario)
+
+    for nome in TIPOS_EQUIPAMENTO:
+        db.session.add(TipoEquipamento(nome=f'{nome} {sufixo}'))
+    for nome, codigo in TIPOS_MANUTENCAO:
+        db.session.add(TipoManutencao(nome=f'{nome} {sufixo}', codigo=f'{codigo}_{sufixo}'))
+    for nome in GRUPOS:
+        db.session.add(GrupoItem(nome=f'{nome} {sufixo}', codigo=f'{nome[:4].upper()}_{sufixo}'))
+    for i, local in enumerate(LOCALIZACOES):
+        db.session.add(EstoqueLocal(nome=f'Almoxarifado {local} {sufixo}', codigo=f'ALM{i}_{sufixo}', localizacao=local))
+    db.session.add(Item(numero_item=f'PNEU-{sufixo}', descricao_item='Pneu fora de estrada', grupo_itens='Pneus'))
+    db.session.commit()
+
+
+def gerar(volumes, semente=42, tamanho_lote=10000):
+    rng = random.Random(semente)
+    # Sufixo derivado da semente: gerações com sementes diferentes não colidem nos campos únicos
+    sufixo = f'S{semente}'
+    hoje = datetime.utcnow().replace(microsecond=0)
+    inicio_historico = hoje - timedelta(days=3 * 365)
+
+    print(f"🚜 Gerando frota sintética (semente {semente})")
+    gerar_cadastros(sufixo)
+
+    usuario_id = Usuario.query.filter_by(username=USUARIO_BENCHMARK).first().id
+    tipos_equipamento_ids = [t.id for t in TipoEquipamento.query.filter(TipoEquipamento.nome.like(f'% {sufixo}'))]
+    tipos_manutencao_ids = [t.id for t in TipoManutencao.query.filter(TipoManutencao.codigo.like(f'%_{sufixo}'))]
+    grupos_ids = [g.id for g in GrupoItem.query.filter(GrupoItem.codigo.like(f'%_{sufixo}'))]
+    estoques_ids = [e.id for e in EstoqueLocal.query.filter(EstoqueLocal.codigo.like(f'%_{sufixo}'))]
+    item_pneu_id = Item.query.filter_by(numero_item=f'PNEU-{sufixo}').first().id
+
+    inserir_em_massa(Equipamento, (
+        {
+            'codigo_interno': f'EQ-{sufixo}-{i:06d}',
+            'nome': f'{rng.choice(TIPOS_EQUIPAMENTO)} {i}',
+            'tipo_equipamento_id': rng.choice(tipos_equipamento_ids),
+            'modelo': f'M{rng.randint(100, 999)}',
+            'fabricante': rng.choice(FABRICANTES),
+            'numero_serie': f'SN-{sufixo}-{i:08d}',
+            'status': rng.choices(['ativo', 'manutencao', 'inativo'], [85, 10, 5])[0],
+            'localizacao': rng.choice(LOCALIZACOES),
+            'horimetro_atual': round(rng.uniform(0, 60000), 1),
+            'data_aquisicao': (inicio_historico - timedelta(days=rng.randrange(3650))).date(),
+            'valor_aquisicao': round(rng.uniform(2e5, 8e6), 2),
+        } for i in range(volumes['equipamentos'])
+    ), tamanho_lote)
+    equipamentos_ids = _ultimos_ids(Equipamento, volumes['equipamentos'])
+
+    inserir_em_massa(Mecanico, (
+        {
+            'nome_completo': f'Mecânico {sufixo} {i}',
+            'cpf': f'{sufixo}{i:09d}'[-14:],
+            'especialidade': rng.choice(['Mecânica', 'Elétrica', 'Hidráulica', 'Caldeiraria']),
+            'nivel_experiencia': rng.choice(['junior', 'pleno', 'senior']),
+            'salario': round(rng.uniform(3000, 12000), 2),
+            'data_admissao': date(2015, 1, 1) + timedelta(days=rng.randrange(3000)),
+            'status': rng.choices(['ativo', 'inativo', 'ferias'], [90, 5, 5])[0],
+        } for i in range(volumes['mecanicos'])
+    ), tamanho_lote)
+    mecanicos_ids = _ultimos_ids(Mecanico, volumes['mecanicos'])
+
+    inserir_em_massa(Peca, (
+        {
+            'codigo': f'PC-{sufixo}-{i:07d}',
+            'nome': f'Peça {rng.choice(GRUPOS)} {i}',
+            'grupo_item_id': rng.choice(grupos_ids),
+            'unidade': rng.choice(['UN', 'PC', 'L', 'KG', 'M']),
+            'quantidade': rng.randint(0, 500),
+            'min_estoque': rng.randint(0, 50),
+            'max_estoque': rng.randint(100, 1000),
+            'preco_unitario': round(rng.uniform(1, 5000), 2),
+            'estoque_local_id': rng.choice(estoques_ids),
+            'fornecedor': rng.choice(FORNECEDORES),
+        } for i in range(volumes['pecas'])
+    ), tamanho_lote)
+    pecas_ids = _ultimos_ids(Peca, volumes['pecas'])
+    criar_saldos_iniciais()
+    db.session.commit()
+
+    def _pneu(i):
+        em_uso = rng.random() < 0.6
+        km_instalacao = round(rng.uniform(0, 50000), 0)
+        return {
+            'numero_serie': f'PN-{sufixo}-{i:08d}',
+            'numero_fogo': f'F-{sufixo}-{i:07d}',
+            'marca': rng.choice(MARCAS_PNEU),
+            'modelo': f'XD{rng.randint(1, 9)}',
+            'medida': rng.choice(['27.00R49', '40.00R57', '18.00R33', '24.00R35']),
+            'medida_sulco_mm': round(rng.uniform(5, 90), 1),
+            'tipo': rng.choices(['novo', 'recapado'], [70, 30])[0],
+            'status': 'em_uso' if em_uso else rng.choice(['estoque', 'descarte', 'recapagem']),
+            'equipamento_id': rng.choice(equipamentos_ids) if em_uso and equipamentos_ids else None,
+            'item_id': item_pneu_id,
+            'posicao': rng.choice(POSICOES) if em_uso else None,
+            'data_compra': (inicio_historico + timedelta(days=rng.randrange(900))).date(),
+            'valor_compra': round(rng.uniform(8000, 120000), 2),
+            'km_instalacao': km_instalacao,
+            'km_atual': km_instalacao + round(rng.uniform(0, 80000), 0),
+            'vida_util_estimada': rng.choice([60000, 80000, 100000]),
+            'fornecedor': rng.choice(FORNECEDORES),
+            'fornecedor_recapagem': rng.choice(FORNECEDORES) if rng.random() < 0.3 else None,
+        }
+    inserir_em_massa(Pneu, (_pneu(i) for i in range(volumes['pneus'])), tamanho_lote)
+
+    def _ordem_servico(i):
+        abertura = _data_aleatoria(rng, inicio_historico, 3 * 365)
+        status = rng.choice(STATUS_OS)
+        inicio = abertura + timedelta(hours=rng.randint(1, 72)) if status != 'aberta' else None
+        encerramento = inicio + timedelta(hours=rng.randint(1, 96)) if status == 'concluida' else None
+        custo_mao_obra = round(rng.uniform(100, 20000), 2) if encerramento else 0.0
+        custo_pecas = round(rng.uniform(0, 50000), 2) if encerramento else 0.0
+        return {
+            # Numeração própria para não consumir o contador de OS do ano
+            'numero_os': f'SIM-{sufixo}-{i:07d}',
+            'equipamento_id': rng.choice(equipamentos_ids),
+            'mecanico_id': rng.choice(mecanicos_ids) if status != 'aberta' and mecanicos_ids else None,
+            'tipo_manutencao_id': rng.choice(tipos_manutencao_ids),
+            'tipo': rng.choices(['preventiva', 'corretiva'], [40, 60])[0],
+            'prioridade': rng.choice(PRIORIDADES),
+            'status': status,
+            'descricao_problema': f'Ocorrência sintética {i}',
+            'data_abertura': abertura,
+            'data_inicio': inicio,
+            'data_encerramento': encerramento,
+            'tempo_execucao_horas': round((encerramento - inicio).total_seconds() / 3600, 2) if encerramento else None,
+            'custo_mao_obra': custo_mao_obra,
+            'custo_pecas': custo_pecas,
+            'custo_total': custo_mao_obra + custo_pecas,
+        }
+    inserir_em_massa(OrdemServico, (_ordem_servico(i) for i in range(volumes['ordens_servico'])), tamanho_lote)
+
+    def _movimentacao(i):
+        tipo = rng.choices(['entrada', 'saida', 'transferencia'], [35, 60, 5])[0]
+        return {
+            'peca_id': rng.choice(pecas_ids),
+            'usuario_id': usuario_id,
+            'tipo_movimentacao': tipo,
+            'quantidade': rng.randint(1, 50),
+            'motivo': 'Compra' if tipo == 'entrada' else 'Consumo em manutenção' if tipo == 'saida' else 'Transferência',
+            'numero_nf': f'NF{rng.randint(1, 999999):06d}' if tipo == 'entrada' else None,
+            'equipamento_id': rng.choice(equipamentos_ids) if tipo == 'saida' else None,
+            'estoque_origem_id': rng.choice(estoques_ids) if tipo == 'transferencia' else None,
+            'estoque_destino_id': rng.choice(estoques_ids) if tipo == 'transferencia' else None,
+            'data_movimentacao': _data_aleatoria(rng, inicio_historico, 3 * 365),
+        }
+    inserir_em_massa(MovimentacaoEstoque, (_movimentacao(i) for i in range(volumes['movimentacoes_estoque'])), tamanho_lote)
+
+    def _analise_oleo(i):
+        coleta = _data_aleatoria(rng, inicio_historico, 3 * 365)
+        status = rng.choices(['coletado', 'em_analise', 'concluido'], [5, 10, 85])[0]
+        return {
+            'equipamento_id': rng.choice(equipamentos_ids),
+            'numero_amostra': f'AM-{sufixo}-{i:07d}',
+            'data_coleta': coleta,
+            'horimetro_coleta': round(rng.uniform(0, 60000), 1),
+            'tipo_oleo': rng.choice(['Motor 15W40', 'Hidráulico ISO 68', 'Transmissão 30', 'Diferencial 85W140']),
+            'laboratorio': rng.choice(['Lab A', 'Lab B']),
+            'data_resultado_lab': coleta + timedelta(days=rng.randint(2, 10)) if status == 'concluido' else None,
+            'status': status,
+            'prioridade': rng.choices(['baixa', 'normal', 'alta', 'critica'], [20, 60, 15, 5])[0],
+        }
+    inserir_em_massa(AnaliseOleo, (_analise_oleo(i) for i in range(volumes['analises_oleo'])), tamanho_lote)
+
+    print("✅ Frota sintética gerada")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--semente', type=int, default=42, help='semente do gerador aleatório')
+    parser.add_argument('--escala', type=float, default=1.0, help='multiplicador aplicado a todos os volumes')
+    parser.add_argument('--lote', type=int, default=10000, help='linhas por INSERT em massa')
+    parser.add_argument('--criar-schema', action='store_true',
+                        help='executar db.create_all() antes (bancos descartáveis; em produção use as migrações)')
+    for tabela, padrao in VOLUMES_PADRAO.items():
+        parser.add_argument(f"--{tabela.replace('_', '-')}", type=int, default=None,
+                            help=f'quantidade de {tabela} (padrão {padrao} x escala)')
+    args = parser.parse_args()
+
+    volumes = {}
+    for tabela, padrao in VOLUMES_PADRAO.items():
+        valor = getattr(args, tabela)
+        volumes[tabela] = valor if valor is not None else int(padrao * args.escala)
+
+    app = create_app()
+    with app.app_context():
+        if args.criar_schema:
+            db.create_all()
+        gerar(volumes, semente=args.semente, tamanho_lote=args.lote)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,7 +2,6 @@
 """Importar itens de Example/itens.csv para a tabela pecas."""
 import os
 import sys
-import pandas as pd
 from flask import Flask
 
 if sys.version_info < (3, 8):
@@ -11,9 +10,25 @@ if sys.version_info < (3, 8):
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.db import db
+# Todos os modelos, para que os relacionamentos entre eles sejam resolvidos
+from src.models.equipamento import Equipamento
+from src.models.mecanico import Mecanico
+from src.models.ordem_servico import OrdemServico
 from src.models.peca import Peca
+from src.models.pneu import Pneu
+from src.models.tipo_equipamento import TipoEquipamento
+from src.models.tipo_manutencao import TipoManutencao
 from src.models.grupo_item import GrupoItem
 from src.models.estoque_local import EstoqueLocal
+from src.models.movimentacao_estoque import MovimentacaoEstoque
+from src.models.os_peca import OS_Peca
+from src.models.analise_oleo import AnaliseOleo
+from src.models.usuario import Usuario
+from src.models.plano_preventiva import PlanoPreventiva
+from src.models.sequencia_os import SequenciaOS
+from src.models.backlog_item import BacklogItem
+from src.utils.importacao import importar_arquivo
+from src.utils.importacao_entidades import PECAS
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 INSTANCE_DIR = os.path.join(BASE_DIR, 'instance')
@@ -27,51 +42,9 @@ db.init_app(app)
 
 
 def import_csv(path='Example/itens.csv'):
-    df = pd.read_csv(path, sep=',', engine='python', on_bad_lines='skip')
     with app.app_context():
-        for _, row in df.iterrows():
-            numero_item = str(row['numero_item']).strip()
-            descricao_item = str(row['descricao_item']).strip()
-            grupo_nome = str(row['grupo_itens']).strip()
-            unidade = str(row.get('unidade_de_medida_de_estoque') or row.get('unidade_medida_estoque')).strip()
-
-            grupo_item = GrupoItem.query.filter_by(nome=grupo_nome).first()
-            if not grupo_item:
-                grupo_item = GrupoItem(
-                    nome=grupo_nome,
-                    codigo=grupo_nome[:10].upper().replace(' ', '_'),
-                    descricao='Grupo importado automaticamente'
-                )
-                db.session.add(grupo_item)
-                db.session.flush()
-
-            peca = Peca.query.filter_by(codigo=numero_item).first()
-            if not peca:
-                peca = Peca(
-                    codigo=numero_item,
-                    nome=descricao_item,
-                    grupo_item_id=grupo_item.id,
-                    unidade=unidade,
-                    quantidade=0
-                )
-            else:
-                peca.nome = descricao_item
-                peca.grupo_item_id = grupo_item.id
-                peca.unidade = unidade
-
-            if pd.notna(row.get('ultimo_preco_compra')):
-                peca.ultimo_preco_compra = float(row['ultimo_preco_compra'])
-                peca.preco_unitario = float(row['ultimo_preco_compra'])
-            if pd.notna(row.get('ultimo_preco_avaliacao')):
-                peca.ultimo_preco_avaliacao = float(row['ultimo_preco_avaliacao'])
-            if pd.notna(row.get('estoque_baixo')):
-                peca.min_estoque = int(row['estoque_baixo'])
-            if pd.notna(row.get('data_registro')):
-                peca.data_registro = pd.to_datetime(row['data_registro'])
-
-            db.session.add(peca)
-        db.session.commit()
+        return importar_arquivo(PECAS, path)
 
 
 if __name__ == '__main__':
-    import_csv()
+    print(import_csv())
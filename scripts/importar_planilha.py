@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""
+Importa uma planilha (CSV/XLSX/XLS) para um cadastro, em lotes.
+
+Usa o mesmo motor da API (/api/importacao/<entidade>): validação vetorizada,
+INSERT ... ON CONFLICT por lote e um commit por lote. Indicado para cargas
+iniciais grandes de um site novo.
+
+Exemplo:
+    DATABASE_URL=postgresql://... python scripts/importar_planilha.py equipamentos frota.xlsx
+    python scripts/importar_planilha.py --listar
+"""
+import argparse
+import os
+import sys
+import time
+
+if sys.version_info < (3, 8):
+    raise RuntimeError("Python 3.8+ is required to run this script.")
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.main import create_app
+from src.utils.importacao import TAMANHO_LOTE_IMPORTACAO, importar_arquivo
+from src.utils.importacao_entidades import ENTIDADES_IMPORTACAO
+from src.utils.planilhas import ErroImportacao
+
+
+def listar_entidades():
+    for nome, especificacao in ENTIDADES_IMPORTACAO.items():
+        colunas = especificacao.colunas_planilha()
+        print(f"{nome} (chave: {especificacao.chave})")
+        print(f"  obrigatórias: {', '.join(colunas['obrigatorias'])}")
+        print(f"  opcionais:    {', '.join(colunas['opcionais'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('entidade', nargs='?', choices=sorted(ENTIDADES_IMPORTACAO))
+    parser.add_argument('arquivo', nargs='?')
+    parser.add_argument('--lote', type=int, default=TAMANHO_LOTE_IMPORTACAO, help='linhas por lote (um commit por lote)')
+    parser.add_argument('--listar', action='store_true', help='listar entidades e colunas aceitas')
+    args = parser.parse_args()
+
+    if args.listar:
+        listar_entidades()
+        return
+    if not args.entidade or not args.arquivo:
+        parser.error('informe a entidade e o arquivo (ou --listar)')
+
+    app = create_app()
+    inicio = time.perf_counter()
+
+    def _progresso(relatorio):
+        decorrido = time.perf_counter() - inicio
+        print(f"  {relatorio['total_linhas']} linhas ({relatorio['total_linhas'] / decorrido:.0f}/s)", end='\r')
+
+    with app.app_context():
+        try:
+            relatorio = importar_arquivo(ENTIDADES_IMPORTACAO[args.entidade], args.arquivo,
+                                         tamanho_lote=args.lote, ao_concluir_lote=_progresso)
+        except ErroImportacao as e:
+            raise SystemExit(f"❌ {e}")
+
+    print(f"\n✅ {relatorio['total_linhas']} linhas em {time.perf_counter() - inicio:.1f}s: "
+          f"{relatorio['adicionados']} adicionados, {relatorio['atualizados']} atualizados, "
+          f"{relatorio['ignorados']} ignorados")
+    for erro in relatorio['erros']:
+        print(f"   {erro}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+"""
+Particionamento mensal de movimentacoes_estoque (opcional, só PostgreSQL).
+
+O livro de movimentações só recebe inserções e cresce dezenas de milhares
+de linhas por mês. Particionado por faixa de data_movimentacao, as
+consultas do histórico (sempre ordenadas e, em geral, filtradas por data)
+leem apenas as partições dos meses envolvidos, e meses antigos podem ser
+arquivados com DETACH PARTITION.
+
+--converter recria a tabela como particionada, em uma única transação
+(a tabela fica bloqueada durante a cópia): uma partição por mês desde a
+movimentação mais antiga, uma partição DEFAULT para datas fora das faixas,
+chave primária (id, data_movimentacao), os mesmos índices do modelo e as
+mesmas chaves estrangeiras. Depois disso, rodar o script mensalmente (cron)
+cria as partições dos próximos meses.
+
+Exemplo:
+    DATABASE_URL=postgresql://... JWT_SECRET_KEY=x python scripts/particionar_movimentacoes.py --converter
+    DATABASE_URL=postgresql://... JWT_SECRET_KEY=x python scripts/particionar_movimentacoes.py --meses-futuros 6
+"""
+import argparse
+import os
+import sys
+from datetime import date, datetime
+
+if sys.version_info < (3, 8):
+    raise RuntimeError("Python 3.8+ is required to run this script.")
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import text
+
+from src.main import create_app
+from src.db import db
+from src.models.movimentacao_estoque import MovimentacaoEstoque
+
+TABELA = MovimentacaoEstoque.__tablename__
+TABELA_ANTIGA = f'{TABELA}_nao_particionada'
+PARTICAO_PADRAO = f'{TABELA}_padrao'
+
+
+def _inicio_mes(data):
+    return date(data.year, data.month, 1)
+
+
+def _proximo_mes(mes):
+    return date(mes.year + mes.month // 12, mes.month % 12 + 1, 1)
+
+
+def _somar_meses(mes, meses):
+    for _ in range(meses):
+        mes = _proximo_mes(mes)
+    return mes
+
+
+def particionada(conn):
+    return conn.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:tabela)"),
+                        {'tabela': TABELA}).scalar() == 'p'
+
+
+def criar_particoes(conn, inicio, fim):
+    """Cria as partições mensais de `inicio` a `fim` (inclusive) que ainda não existem"""
+    criadas = []
+    mes = _inicio_mes(inicio)
+    while mes <= fim:
+        proximo = _proximo_mes(mes)
+        nome = f'{TABELA}_{mes:%Y%m}'
+        if conn.execute(text('SELECT to_regclass(:nome)'), {'nome': nome}).scalar() is None:
+            conn.execute(text(
+                f"CREATE TABLE {nome} PARTITION OF {TABELA} "
+                f"FOR VALUES FROM ('{mes.isoformat()}') TO ('{proximo.isoformat()}')"
+            ))
+            criadas.append(nome)
+        mes = proximo
+    return criadas
+
+
+def converter(conn, meses_futuros):
+    """Recria a tabela como particionada por mês, copiando as linhas existentes"""
+    conn.execute(text("SET LOCAL statement_timeout = 0"))
+    conn.execute(text(f"LOCK TABLE {TABELA} IN ACCESS EXCLUSIVE MODE"))
+
+    # A chave de partição não pode ser nula
+    conn.execute(text(
+        f"UPDATE {TABELA} SET data_movimentacao = timezone('utc', now()) WHERE data_movimentacao IS NULL"
+    ))
+    conn.execute(text(f"ALTER TABLE {TABELA} RENAME TO {TABELA_ANTIGA}"))
+
+    # A sequência do id passa para a nova tabela (não pode ser removida com a antiga)
+    sequencia = conn.execute(text("SELECT pg_get_serial_sequence(:tabela, 'id')"),
+                             {'tabela': TABELA_ANTIGA}).scalar()
+    if sequencia:
+        conn.execute(text(f"ALTER SEQUENCE {sequencia} OWNED BY NONE"))
+    chaves_estrangeiras = conn.execute(text(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = CAST(:tabela AS regclass) AND contype = 'f'"
+    ), {'tabela': TABELA_ANTIGA}).all()
+
+    conn.execute(text(
+        f"CREATE TABLE {TABELA} (LIKE {TABELA_ANTIGA} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+        f"PARTITION BY RANGE (data_movimentacao)"
+    ))
+    conn.execute(text(f"ALTER TABLE {TABELA} ALTER COLUMN data_movimentacao SET NOT NULL"))
+
+    mais_antiga = conn.execute(text(f"SELECT MIN(data_movimentacao) FROM {TABELA_ANTIGA}")).scalar()
+    hoje = _inicio_mes(datetime.utcnow())
+    criadas = criar_particoes(conn, mais_antiga or hoje, _somar_meses(hoje, meses_futuros))
+    conn.execute(text(f"CREATE TABLE {PARTICAO_PADRAO} PARTITION OF {TABELA} DEFAULT"))
+
+    copiadas = conn.execute(text(f"INSERT INTO {TABELA} SELECT * FROM {TABELA_ANTIGA}")).rowcount
+    conn.execute(text(f"DROP TABLE {TABELA_ANTIGA}"))
+
+    # Restrições e índices depois da cópia (mais rápido); nomes liberados com o DROP
+    conn.execute(text(f"ALTER TABLE {TABELA} ADD CONSTRAINT {TABELA}_pkey PRIMARY KEY (id, data_movimentacao)"))
+    for nome, definicao in chaves_estrangeiras:
+        conn.execute(text(f"ALTER TABLE {TABELA} ADD CONSTRAINT {nome} {definicao}"))
+    for indice in MovimentacaoEstoque.__table__.indexes:
+        indice.create(conn)
+    if sequencia:
+        conn.execute(text(f"ALTER SEQUENCE {sequencia} OWNED BY {TABELA}.id"))
+    return copiadas, criadas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--converter', action='store_true',
+                        help='converter a tabela atual em particionada (uma vez; bloqueia a tabela durante a cópia)')
+    parser.add_argument('--meses-futuros', type=int, default=3, help='partições a manter criadas além do mês atual')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if db.engine.dialect.name != 'postgresql':
+            raise SystemExit('❌ Particionamento disponível apenas no PostgreSQL')
+
+        with db.engine.begin() as conn:
+            if not particionada(conn):
+                if not args.converter:
+                    raise SystemExit(f'❌ {TABELA} não é particionada. Use --converter para convertê-la')
+                copiadas, criadas = converter(conn, args.meses_futuros)
+                print(f'✅ {TABELA} particionada: {copiadas} movimentações copiadas, {len(criadas)} partições mensais')
+                return
+
+            hoje = _inicio_mes(datetime.utcnow())
+            criadas = criar_particoes(conn, hoje, _somar_meses(hoje, args.meses_futuros))
+            print(f"✅ Partições criadas: {', '.join(criadas)}" if criadas else '✅ Partições já existentes')
+
+
+if __name__ == '__main__':
+    main()
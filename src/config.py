@@ -0,0 +1,56 @@
+"""
+Configuração da aplicação a partir de variáveis de ambiente
+"""
+
+import os
+
+
+def _env_int(nome, padrao):
+    valor = os.environ.get(nome)
+    return int(valor) if valor not in (None, '') else padrao
+
+
+def _env_bool(nome, padrao):
+    valor = os.environ.get(nome)
+    if valor in (None, ''):
+        return padrao
+    return valor.strip().lower() in ('1', 'true', 'yes', 'sim', 'on')
+
+
+def opcoes_engine(database_url):
+    """
+    Monta SQLALCHEMY_ENGINE_OPTIONS a partir do ambiente:
+
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_RECYCLE (segundos),
+    DB_POOL_PRE_PING (true/false) e DB_STATEMENT_TIMEOUT (ms, só PostgreSQL).
+    """
+    if not database_url or database_url.startswith('sqlite'):
+        # SQLite usa pools próprios que não aceitam essas opções
+        return {}
+
+    opcoes = {
+        'pool_size': _env_int('DB_POOL_SIZE', 5),
+        'max_overflow': _env_int('DB_MAX_OVERFLOW', 10),
+        'pool_recycle': _env_int('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': _env_bool('DB_POOL_PRE_PING', True),
+    }
+
+    statement_timeout = _env_int('DB_STATEMENT_TIMEOUT', 0)
+    if statement_timeout and database_url.startswith('postgres'):
+        opcoes['connect_args'] = {'options': f'-c statement_timeout={statement_timeout}'}
+
+    return opcoes
+
+
+class Config:
+    """Configuração padrão lida do ambiente no momento da criação da app"""
+
+    def __init__(self):
+        self.SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-key')
+        self.SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
+        self.SQLALCHEMY_TRACK_MODIFICATIONS = False
+        self.SQLALCHEMY_ENGINE_OPTIONS = opcoes_engine(self.SQLALCHEMY_DATABASE_URI)
+        # Origens permitidas no CORS, separadas por vírgula
+        self.FRONTEND_URL = os.environ.get('FRONTEND_URL', '')
+        # Aplicar migrações e dados de exemplo ao iniciar o servidor
+        self.PREPARAR_BANCO_NA_INICIALIZACAO = _env_bool('PREPARAR_BANCO_NA_INICIALIZACAO', True)
@@ -7,9 +7,12 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 logging.basicConfig(level=logging.INFO)
 
-from flask import Flask, render_template, jsonify, send_from_directory
+from flask import Flask, Response, render_template, jsonify, send_from_directory
 from flask_cors import CORS
 
+from src.config import Config
+from src.utils.metricas import registrar_metricas, exportar_metricas
+
 # Importar modelos
 from src.db import db
 
@@ -31,111 +34,131 @@ from src.routes.importacao import importacao_bp
 from src.routes.impressao import impressao_bp
 from src.routes.planos_preventiva import planos_preventiva_bp
 from src.routes.backlog import backlog_bp
-
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-
-# Chave secreta configurável via variável de ambiente
-SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-key')
-app.config['SECRET_KEY'] = SECRET_KEY
-
-# Configurar CORS com origens permitidas definidas via variável de ambiente
-# Use uma lista separada por vírgulas em FRONTEND_URL para adicionar múltiplas origens
-FRONTEND_URL = os.environ.get("FRONTEND_URL", "")
-allowed_origins = [url.strip() for url in FRONTEND_URL.split(",") if url.strip()]
-if allowed_origins:
-    CORS(app, supports_credentials=True, origins=allowed_origins)
-
-# Registrar blueprints
-app.register_blueprint(auth_bp, url_prefix='/api')
-app.register_blueprint(dashboard_bp, url_prefix='/api')
-app.register_blueprint(equipamentos_bp, url_prefix='/api')
-app.register_blueprint(ordens_servico_bp, url_prefix='/api')
-app.register_blueprint(estoque_bp, url_prefix='/api')
-app.register_blueprint(pneus_bp, url_prefix='/api')
-app.register_blueprint(mecanicos_bp, url_prefix='/api')
-app.register_blueprint(usuarios_bp, url_prefix='/api')
-app.register_blueprint(tipos_equipamento_bp, url_prefix='/api')
-app.register_blueprint(tipos_manutencao_bp, url_prefix='/api')
-app.register_blueprint(grupos_item_bp, url_prefix='/api')
-app.register_blueprint(item_bp, url_prefix='/api/itens')
-app.register_blueprint(analise_oleo_bp, url_prefix='/api')
-app.register_blueprint(importacao_bp, url_prefix='/api')
-app.register_blueprint(impressao_bp, url_prefix='/api')
-app.register_blueprint(planos_preventiva_bp, url_prefix='/api')
-app.register_blueprint(backlog_bp, url_prefix='/api')
-
-# Configurar banco de dados PostgreSQL
-if "DATABASE_URL" in os.environ:
-    logging.info("Variável DATABASE_URL encontrada.")
-else:
-    logging.warning("Variável DATABASE_URL não encontrada.")
-
-database_url = os.environ.get("DATABASE_URL")
-if not database_url:
-    raise RuntimeError("DATABASE_URL não configurada. Defina a variável de ambiente com a URL do PostgreSQL.")
-
-parsed_url = urlparse(database_url)
-host = parsed_url.hostname or "(host desconhecido)"
-logging.info("🐘 Tentando conectar ao PostgreSQL em %s", host)
-app.config["SQLALCHEMY_DATABASE_URI"] = database_url
-
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
-
-# Rotas para servir arquivos estáticos do frontend
-@app.route("/", defaults={"path": ""})
-@app.route("/<path:path>")
-def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-        return "Static folder not configured", 404
-
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
+from src.routes.alertas import alertas_bp
+
+BLUEPRINTS = [
+    (auth_bp, '/api'),
+    (dashboard_bp, '/api'),
+    (equipamentos_bp, '/api'),
+    (ordens_servico_bp, '/api'),
+    (estoque_bp, '/api'),
+    (pneus_bp, '/api'),
+    (mecanicos_bp, '/api'),
+    (usuarios_bp, '/api'),
+    (tipos_equipamento_bp, '/api'),
+    (tipos_manutencao_bp, '/api'),
+    (grupos_item_bp, '/api'),
+    (item_bp, '/api/itens'),
+    (analise_oleo_bp, '/api'),
+    (importacao_bp, '/api'),
+    (impressao_bp, '/api'),
+    (planos_preventiva_bp, '/api'),
+    (backlog_bp, '/api'),
+    (alertas_bp, '/api'),
+]
+
+
+def create_app(config=None):
+    """
+    Cria a aplicação Flask.
+
+    `config` pode ser um objeto de configuração ou um dict; por padrão a
+    configuração é lida das variáveis de ambiente (ver src/config.py).
+    """
+    app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+
+    if config is None:
+        config = Config()
+    if isinstance(config, dict):
+        app.config.update(config)
     else:
-        index_path = os.path.join(static_folder_path, "index.html")
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, "index.html")
+        app.config.from_object(config)
+
+    # Configurar CORS com origens permitidas definidas via variável de ambiente
+    # Use uma lista separada por vírgulas em FRONTEND_URL para adicionar múltiplas origens
+    allowed_origins = [url.strip() for url in app.config.get('FRONTEND_URL', '').split(",") if url.strip()]
+    if allowed_origins:
+        CORS(app, supports_credentials=True, origins=allowed_origins)
+
+    # Registrar blueprints
+    for blueprint, url_prefix in BLUEPRINTS:
+        app.register_blueprint(blueprint, url_prefix=url_prefix)
+
+    # Configurar banco de dados PostgreSQL
+    database_url = app.config.get("SQLALCHEMY_DATABASE_URI")
+    if not database_url:
+        raise RuntimeError("DATABASE_URL não configurada. Defina a variável de ambiente com a URL do PostgreSQL.")
+
+    parsed_url = urlparse(database_url)
+    host = parsed_url.hostname or "(host desconhecido)"
+    logging.info("🐘 Tentando conectar ao PostgreSQL em %s", host)
+    db.init_app(app)
+
+    # Contagem de SQL e tempo por requisição, log de requisições lentas
+    registrar_metricas(app)
+
+    registrar_rotas_base(app)
+    return app
+
+
+def registrar_rotas_base(app):
+    """Rotas que não pertencem a nenhum blueprint: frontend, healthcheck e índice da API"""
+    # Rotas para servir arquivos estáticos do frontend
+    @app.route("/", defaults={"path": ""})
+    @app.route("/<path:path>")
+    def serve(path):
+        static_folder_path = app.static_folder
+        if static_folder_path is None:
+            return "Static folder not configured", 404
+
+        if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
+            return send_from_directory(static_folder_path, path)
         else:
-            return "index.html not found", 404
-
-# Healthcheck endpoint
-@app.route("/api/health")
-@app.route("/health")
-def health():
-    return jsonify({"status": "ok"}), 200
-
-# API index for discovery
-@app.route("/api", methods=["GET"])
-def api_index():
-    return jsonify({
-        "message": "CMMS API funcionando",
-        "version": "2.0.0",
-        "endpoints": {
-            "auth": "/api/auth/login",
-            "dashboard": "/api/dashboard",
-            "equipamentos": "/api/equipamentos",
-            "ordens_servico": "/api/ordens-servico",
-            "estoque": "/api/estoque/pecas",
-            "pneus": "/api/pneus",
-            "mecanicos": "/api/mecanicos",
-            "usuarios": "/api/usuarios",
-            "tipos_equipamento": "/api/tipos-equipamento",
-            "tipos_manutencao": "/api/tipos-manutencao",
-            "grupos_item": "/api/grupos-item",
-            "itens": "/api/itens",
-            "analise_oleo": "/api/analise-oleo",
-            "importacao": "/api/importacao/pecas",
-            "impressao": "/api/ordens-servico/{id}/imprimir"
-        }
-    })
-
-
-if __name__ == '__main__':
-    port = int(os.environ.get('PORT', 5000))
-    logging.info("🌐 Servidor CMMS rodando na porta %s", port)
-
-    # Verificar esquema e popular dados de exemplo
+            index_path = os.path.join(static_folder_path, "index.html")
+            if os.path.exists(index_path):
+                return send_from_directory(static_folder_path, "index.html")
+            else:
+                return "index.html not found", 404
+
+    # Healthcheck endpoint
+    @app.route("/api/health")
+    @app.route("/health")
+    def health():
+        return jsonify({"status": "ok"}), 200
+
+    # Métricas por blueprint no formato Prometheus
+    @app.route("/api/metrics")
+    def metrics():
+        return Response(exportar_metricas(), mimetype="text/plain; version=0.0.4")
+
+    # API index for discovery
+    @app.route("/api", methods=["GET"])
+    def api_index():
+        return jsonify({
+            "message": "CMMS API funcionando",
+            "version": "2.0.0",
+            "endpoints": {
+                "auth": "/api/auth/login",
+                "dashboard": "/api/dashboard",
+                "equipamentos": "/api/equipamentos",
+                "ordens_servico": "/api/ordens-servico",
+                "estoque": "/api/estoque/pecas",
+                "pneus": "/api/pneus",
+                "mecanicos": "/api/mecanicos",
+                "usuarios": "/api/usuarios",
+                "tipos_equipamento": "/api/tipos-equipamento",
+                "tipos_manutencao": "/api/tipos-manutencao",
+                "grupos_item": "/api/grupos-item",
+                "itens": "/api/itens",
+                "analise_oleo": "/api/analise-oleo",
+                "importacao": "/api/importacao/pecas",
+                "impressao": "/api/ordens-servico/{id}/imprimir"
+            }
+        })
+
+
+def preparar_banco(app):
+    """Verifica o esquema, popula dados de exemplo e reavalia os alertas"""
     with app.app_context():
         from init_db import ensure_schema, criar_dados_exemplo
 
@@ -149,4 +172,25 @@ if __name__ == '__main__':
         except Exception:
             logging.exception("❌ Falha ao criar dados de exemplo")
 
-    app.run(host='0.0.0.0', port=port, debug=False)
+        # Carga inicial (ou recuperação) da tabela de alertas, antes de atender requisições
+        try:
+            from src.utils.alertas import atualizar_alertas
+            atualizar_alertas()
+        except Exception:
+            db.session.rollback()
+            logging.exception("❌ Falha ao atualizar os alertas")
+
+
+if __name__ == '__main__':
+    # Servidor de desenvolvimento; em produção use `gunicorn -c gunicorn.conf.py wsgi:app`
+    app = create_app()
+    port = int(os.environ.get('PORT', 5000))
+    logging.info("🌐 Servidor CMMS rodando na porta %s", port)
+
+    if app.config.get('PREPARAR_BANCO_NA_INICIALIZACAO', True):
+        preparar_banco(app)
+
+    from src.utils.alertas import iniciar_atualizacao_periodica
+    iniciar_atualizacao_periodica(app)
+
+    app.run(host='0.0.0.0', port=port, debug=False, threaded=True)
@@ -0,0 +1,55 @@
+from src.db import db
+from datetime import datetime
+import json
+
+
+class Alerta(db.Model):
+    """
+    Alerta ativo de uma entidade (pneu, ordem de serviço, peça), gravado
+    pelas regras de src/utils/alertas.py. Uma linha por (entidade, id,
+    tipo); é removida quando a condição deixa de valer.
+    """
+    __tablename__ = 'alertas'
+    __table_args__ = (
+        db.UniqueConstraint('entidade', 'entidade_id', 'tipo', name='uq_alertas_entidade_tipo'),
+        # Feed paginado por cursor (criado_em, id), com ou sem filtro
+        db.Index('ix_alertas_criado_em_id', 'criado_em', 'id'),
+        db.Index('ix_alertas_severidade_criado_em_id', 'severidade', 'criado_em', 'id'),
+        db.Index('ix_alertas_mecanico_criado_em_id', 'mecanico_id', 'criado_em', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    entidade = db.Column(db.String(30), nullable=False)  # pneu, ordem_servico, peca
+    entidade_id = db.Column(db.Integer, nullable=False)
+    tipo = db.Column(db.String(40), nullable=False)
+    severidade = db.Column(db.String(20), nullable=False)  # critica, alta, media
+    mensagem = db.Column(db.String(300), nullable=False)
+    dados = db.Column(db.Text, nullable=True)  # JSON com os detalhes exibidos junto do alerta
+    # Referências sem chave estrangeira: o alerta não impede excluir o equipamento/mecânico
+    equipamento_id = db.Column(db.Integer, nullable=True)
+    mecanico_id = db.Column(db.Integer, nullable=True)
+    criado_em = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    atualizado_em = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def get_dados(self):
+        if self.dados:
+            try:
+                return json.loads(self.dados)
+            except json.JSONDecodeError:
+                return {}
+        return {}
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'entidade': self.entidade,
+            'entidade_id': self.entidade_id,
+            'tipo': self.tipo,
+            'severidade': self.severidade,
+            'mensagem': self.mensagem,
+            'dados': self.get_dados(),
+            'equipamento_id': self.equipamento_id,
+            'mecanico_id': self.mecanico_id,
+            'criado_em': self.criado_em.isoformat() if self.criado_em else None,
+            'atualizado_em': self.atualizado_em.isoformat() if self.atualizado_em else None
+        }
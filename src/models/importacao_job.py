@@ -0,0 +1,80 @@
+from src.db import db
+from datetime import datetime
+import json
+
+
+class ImportacaoJob(db.Model):
+    """Importação de planilha processada em segundo plano"""
+    __tablename__ = 'importacao_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    entidade = db.Column(db.String(30), nullable=False)  # pecas, ...
+    arquivo_nome = db.Column(db.String(255), nullable=False)
+    arquivo_caminho = db.Column(db.String(500), nullable=True)  # upload armazenado até o fim do processamento
+    status = db.Column(db.String(20), nullable=False, default='pendente')  # pendente, processando, concluido, erro
+
+    # Progresso (atualizado a cada lote gravado)
+    total_linhas = db.Column(db.Integer, nullable=True)
+    linhas_processadas = db.Column(db.Integer, nullable=False, default=0)
+    adicionados = db.Column(db.Integer, nullable=False, default=0)
+    atualizados = db.Column(db.Integer, nullable=False, default=0)
+    ignorados = db.Column(db.Integer, nullable=False, default=0)
+    erros = db.Column(db.Text, nullable=True)  # JSON com a lista de erros do relatório
+    mensagem_erro = db.Column(db.Text, nullable=True)  # falha que interrompeu o job
+
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    iniciado_em = db.Column(db.DateTime, nullable=True)
+    finalizado_em = db.Column(db.DateTime, nullable=True)
+
+    def set_erros(self, erros):
+        self.erros = json.dumps(erros, ensure_ascii=False) if erros else None
+
+    def get_erros(self):
+        if self.erros:
+            try:
+                return json.loads(self.erros)
+            except json.JSONDecodeError:
+                return []
+        return []
+
+    @property
+    def linhas_por_segundo(self):
+        if not self.iniciado_em:
+            return None
+        fim = self.finalizado_em or datetime.utcnow()
+        segundos = (fim - self.iniciado_em).total_seconds()
+        return round(self.linhas_processadas / segundos, 1) if segundos > 0 else None
+
+    @property
+    def progresso(self):
+        """Percentual de linhas processadas (None enquanto o total não é conhecido; o total é estimado até o fim)"""
+        if self.status == 'concluido':
+            return 100.0
+        if not self.total_linhas:
+            return None
+        return min(round(100.0 * self.linhas_processadas / self.total_linhas, 1), 100.0)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'entidade': self.entidade,
+            'arquivo_nome': self.arquivo_nome,
+            'status': self.status,
+            'total_linhas': self.total_linhas,
+            'linhas_processadas': self.linhas_processadas,
+            'progresso': self.progresso,
+            'linhas_por_segundo': self.linhas_por_segundo,
+            'relatorio': {
+                'total_linhas': self.linhas_processadas,
+                'adicionados': self.adicionados,
+                'atualizados': self.atualizados,
+                'ignorados': self.ignorados,
+                'erros': self.get_erros()
+            },
+            'mensagem_erro': self.mensagem_erro,
+            'usuario_id': self.usuario_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'iniciado_em': self.iniciado_em.isoformat() if self.iniciado_em else None,
+            'finalizado_em': self.finalizado_em.isoformat() if self.finalizado_em else None
+        }
@@ -0,0 +1,21 @@
+from src.db import db
+
+
+class InventarioContagem(db.Model):
+    """
+    Peça de uma sessão de inventário cíclico. quantidade_sistema é o saldo
+    no local no momento da contagem; o ajuste do fechamento é a diferença
+    entre as duas, então movimentações feitas depois da contagem são mantidas.
+    """
+    __tablename__ = 'inventario_contagens'
+    __table_args__ = (
+        db.UniqueConstraint('sessao_id', 'peca_id', name='uq_inventario_contagens_sessao_peca'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    sessao_id = db.Column(db.Integer, db.ForeignKey('inventario_sessoes.id'), nullable=False)
+    peca_id = db.Column(db.Integer, db.ForeignKey('pecas.id'), nullable=False, index=True)
+    quantidade_sistema = db.Column(db.Integer, nullable=True)
+    quantidade_contada = db.Column(db.Integer, nullable=True)  # None = ainda não contada
+    contado_por_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=True)
+    contado_em = db.Column(db.DateTime, nullable=True)
@@ -0,0 +1,58 @@
+from src.db import db
+from datetime import datetime
+import json
+
+
+class InventarioSessao(db.Model):
+    """
+    Sessão de inventário cíclico: uma fatia das peças de um estoque (local),
+    contada em lotes e ajustada de uma vez no fechamento
+    (src/utils/inventario_ciclico.py).
+    """
+    __tablename__ = 'inventario_sessoes'
+
+    id = db.Column(db.Integer, primary_key=True)
+    descricao = db.Column(db.String(200), nullable=True)
+    estoque_local_id = db.Column(db.Integer, db.ForeignKey('estoques_local.id'), nullable=False)
+    criterios = db.Column(db.Text, nullable=True)  # JSON com os filtros usados na seleção das peças
+    status = db.Column(db.String(20), nullable=False, default='aberta')  # aberta, fechada, cancelada
+
+    total_itens = db.Column(db.Integer, nullable=False, default=0)
+    itens_contados = db.Column(db.Integer, nullable=False, default=0)
+    itens_ajustados = db.Column(db.Integer, nullable=True)  # preenchido no fechamento
+
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=True)
+    fechada_por_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # cursor da listagem
+    fechada_em = db.Column(db.DateTime, nullable=True)
+
+    # Relacionamentos
+    estoque_local = db.relationship('EstoqueLocal', lazy=True)
+
+    def set_criterios(self, criterios):
+        self.criterios = json.dumps(criterios, ensure_ascii=False) if criterios else None
+
+    def get_criterios(self):
+        if self.criterios:
+            try:
+                return json.loads(self.criterios)
+            except json.JSONDecodeError:
+                return {}
+        return {}
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'descricao': self.descricao,
+            'estoque_local_id': self.estoque_local_id,
+            'estoque_local': self.estoque_local.nome if self.estoque_local else None,
+            'criterios': self.get_criterios(),
+            'status': self.status,
+            'total_itens': self.total_itens,
+            'itens_contados': self.itens_contados,
+            'itens_ajustados': self.itens_ajustados,
+            'usuario_id': self.usuario_id,
+            'fechada_por_id': self.fechada_por_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'fechada_em': self.fechada_em.isoformat() if self.fechada_em else None
+        }
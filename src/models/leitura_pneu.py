@@ -0,0 +1,41 @@
+from src.db import db
+from datetime import datetime
+
+
+class LeituraPneu(db.Model):
+    """
+    Histórico de leituras de km e sulco de um pneu (só inserção). Cada linha
+    guarda o estado do pneu após a leitura: a grandeza não medida repete o
+    valor vigente, então toda linha é um ponto (km, sulco) da curva de
+    desgaste. km_rodados é calculado com o km de instalação da época.
+    """
+    __tablename__ = 'leituras_pneus'
+    __table_args__ = (
+        # Histórico de um pneu por data (mais recentes primeiro)
+        db.Index('ix_leituras_pneus_pneu_data_id', 'pneu_id', 'data_leitura', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    pneu_id = db.Column(db.Integer, db.ForeignKey('pneus.id'), nullable=False)
+    data_leitura = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    km_atual = db.Column(db.Float, nullable=True)
+    km_rodados = db.Column(db.Float, nullable=True)
+    medida_sulco_mm = db.Column(db.Float, nullable=True)
+    origem = db.Column(db.String(20), nullable=False, default='individual')  # individual, lote
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=True)
+    observacoes = db.Column(db.String(200), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'pneu_id': self.pneu_id,
+            'data_leitura': self.data_leitura.isoformat() if self.data_leitura else None,
+            'km_atual': self.km_atual,
+            'km_rodados': self.km_rodados,
+            'medida_sulco_mm': self.medida_sulco_mm,
+            'origem': self.origem,
+            'usuario_id': self.usuario_id,
+            'observacoes': self.observacoes,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
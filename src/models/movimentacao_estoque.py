@@ -3,6 +3,14 @@ from datetime import datetime
 
 class MovimentacaoEstoque(db.Model):
     __tablename__ = 'movimentacoes_estoque'
+    __table_args__ = (
+        # Histórico paginado por cursor (data_movimentacao, id), com ou sem filtro; a
+        # coluna é NOT NULL para que ORDER BY data_movimentacao DESC, id DESC use os índices
+        db.Index('ix_movimentacoes_estoque_data_id', 'data_movimentacao', 'id'),
+        db.Index('ix_movimentacoes_estoque_peca_data_id', 'peca_id', 'data_movimentacao', 'id'),
+        db.Index('ix_movimentacoes_estoque_tipo_data_id', 'tipo_movimentacao', 'data_movimentacao', 'id'),
+        db.Index('ix_movimentacoes_estoque_usuario_data_id', 'usuario_id', 'data_movimentacao', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     peca_id = db.Column(db.Integer, db.ForeignKey('pecas.id'), nullable=False)
@@ -23,7 +31,7 @@ class MovimentacaoEstoque(db.Model):
     estoque_destino_id = db.Column(db.Integer, db.ForeignKey('estoques_local.id'), nullable=True)
     
     observacoes = db.Column(db.Text, nullable=True)
-    data_movimentacao = db.Column(db.DateTime, default=datetime.utcnow)
+    data_movimentacao = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     
     # Relacionamentos
     peca = db.relationship('Peca', backref='movimentacoes', lazy=True)
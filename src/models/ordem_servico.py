@@ -3,6 +3,11 @@ from datetime import datetime
 
 class OrdemServico(db.Model):
     __tablename__ = 'ordens_servico'
+    __table_args__ = (
+        # Suporte à paginação por cursor (data_abertura, id) da listagem: a coluna é
+        # NOT NULL para que ORDER BY data_abertura DESC, id DESC percorra o índice
+        db.Index('ix_ordens_servico_data_abertura_id', 'data_abertura', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     numero_os = db.Column(db.String(50), unique=True, nullable=False)
@@ -19,7 +24,7 @@ class OrdemServico(db.Model):
     status = db.Column(db.String(30), nullable=False, default='aberta')  # aberta, em_execucao, aguardando_pecas, concluida, cancelada
     descricao_problema = db.Column(db.Text, nullable=False)
     descricao_solucao = db.Column(db.Text, nullable=True)
-    data_abertura = db.Column(db.DateTime, default=datetime.utcnow)
+    data_abertura = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     data_inicio = db.Column(db.DateTime, nullable=True)
     data_prevista = db.Column(db.DateTime, nullable=True)
     data_encerramento = db.Column(db.DateTime, nullable=True)
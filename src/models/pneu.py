@@ -6,11 +6,12 @@ class Pneu(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     numero_serie = db.Column(db.String(50), unique=True, nullable=False)
-    numero_fogo = db.Column(db.String(50), nullable=True)  # Novo campo
+    numero_fogo = db.Column(db.String(50), nullable=True, index=True)  # Novo campo
     marca = db.Column(db.String(50), nullable=False)
     modelo = db.Column(db.String(50), nullable=False)
     medida = db.Column(db.String(30), nullable=False)  # Ex: 385/65R22.5
     medida_sulco_mm = db.Column(db.Float, nullable=True)  # Medida atual do sulco em mm
+    sulco_inicial_mm = db.Column(db.Float, nullable=True)  # Sulco na montagem/recapagem, base do km por mm
     tipo = db.Column(db.String(20), nullable=False)  # novo, recapado
     status = db.Column(db.String(20), nullable=False, default='estoque')  # estoque, em_uso, descarte, recapagem
     equipamento_id = db.Column(db.Integer, db.ForeignKey('equipamentos.id'), nullable=True)
@@ -32,6 +33,7 @@ class Pneu(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     item = db.relationship('Item')
+    equipamento = db.relationship('Equipamento', backref='pneus', lazy=True)
     
     def to_dict(self):
         km_rodados = 0
@@ -50,6 +52,7 @@ class Pneu(db.Model):
             'modelo': self.modelo,
             'medida': self.medida,
             'medida_sulco_mm': self.medida_sulco_mm,
+            'sulco_inicial_mm': self.sulco_inicial_mm,
             'tipo': self.tipo,
             'status': self.status,
             'equipamento_id': self.equipamento_id,
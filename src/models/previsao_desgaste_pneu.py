@@ -0,0 +1,38 @@
+from src.db import db
+from datetime import datetime
+
+
+class PrevisaoDesgastePneu(db.Model):
+    """
+    Previsão de desgaste de um pneu em uso, recalculada a partir das
+    leituras da vida atual (src/utils/previsao_pneus.py). Só existe para
+    pneus com leituras suficientes para o ajuste.
+    """
+    __tablename__ = 'previsoes_desgaste_pneus'
+
+    pneu_id = db.Column(db.Integer, db.ForeignKey('pneus.id'), primary_key=True)
+    leituras = db.Column(db.Integer, nullable=False)  # Leituras usadas no ajuste
+    taxa_desgaste_mm_1000km = db.Column(db.Float, nullable=False)
+    km_por_dia = db.Column(db.Float, nullable=True)  # Nulo sem leituras em datas diferentes
+    sulco_ultima_leitura = db.Column(db.Float, nullable=False)
+    km_ultima_leitura = db.Column(db.Float, nullable=False)
+    km_restantes = db.Column(db.Float, nullable=False)  # Até o sulco limite legal
+    km_limite = db.Column(db.Float, nullable=False)  # km do pneu previsto ao atingir o limite
+    data_limite = db.Column(db.Date, nullable=True, index=True)
+    ultima_leitura_em = db.Column(db.DateTime, nullable=False)
+    calculado_em = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'pneu_id': self.pneu_id,
+            'leituras': self.leituras,
+            'taxa_desgaste_mm_1000km': self.taxa_desgaste_mm_1000km,
+            'km_por_dia': self.km_por_dia,
+            'sulco_ultima_leitura': self.sulco_ultima_leitura,
+            'km_ultima_leitura': self.km_ultima_leitura,
+            'km_restantes': self.km_restantes,
+            'km_limite': self.km_limite,
+            'data_limite': self.data_limite.isoformat() if self.data_limite else None,
+            'ultima_leitura_em': self.ultima_leitura_em.isoformat() if self.ultima_leitura_em else None,
+            'calculado_em': self.calculado_em.isoformat() if self.calculado_em else None
+        }
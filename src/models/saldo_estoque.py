@@ -0,0 +1,35 @@
+from src.db import db
+from datetime import datetime
+
+
+class SaldoEstoque(db.Model):
+    """
+    Saldo de uma peça em um estoque (local). Alterado apenas pelas
+    movimentações (src/utils/saldos_estoque.py), com UPDATE atômico;
+    Peca.quantidade guarda o total de todos os locais.
+    """
+    __tablename__ = 'saldos_estoque'
+    __table_args__ = (
+        db.UniqueConstraint('peca_id', 'estoque_local_id', name='uq_saldos_estoque_peca_local'),
+        db.CheckConstraint('quantidade >= 0', name='ck_saldos_estoque_quantidade'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    peca_id = db.Column(db.Integer, db.ForeignKey('pecas.id'), nullable=False)
+    estoque_local_id = db.Column(db.Integer, db.ForeignKey('estoques_local.id'), nullable=False, index=True)
+    quantidade = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relacionamentos
+    peca = db.relationship('Peca', backref=db.backref('saldos', lazy=True), lazy=True)
+    estoque_local = db.relationship('EstoqueLocal', lazy=True)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'peca_id': self.peca_id,
+            'estoque_local_id': self.estoque_local_id,
+            'estoque_local': self.estoque_local.nome if self.estoque_local else None,
+            'quantidade': self.quantidade,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
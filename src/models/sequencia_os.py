@@ -0,0 +1,15 @@
+from src.db import db
+
+
+class SequenciaOS(db.Model):
+    """Contador do último número de OS emitido em cada ano"""
+    __tablename__ = 'sequencias_os'
+
+    ano = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    ultimo_numero = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            'ano': self.ano,
+            'ultimo_numero': self.ultimo_numero
+        }
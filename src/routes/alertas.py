@@ -0,0 +1,104 @@
+from flask import Blueprint, request, jsonify
+from src.db import db
+from src.models.alerta import Alerta
+from src.utils.alertas import REGRAS, SEVERIDADES
+from src.utils.auth import token_required
+from src.utils.paginacao import CursorInvalido, aplicar_keyset_desc, ler_limite, paginar_keyset
+from src.utils.serializacao import RespostaJSON, campos_do_modelo, selecionar
+from sqlalchemy import func
+import json
+
+alertas_bp = Blueprint('alertas', __name__)
+
+# Filtros aceitos no feed (parâmetro da query string -> coluna)
+FILTROS_ALERTAS = {
+    'entidade': Alerta.entidade,
+    'entidade_id': Alerta.entidade_id,
+    'tipo': Alerta.tipo,
+    'severidade': Alerta.severidade,
+    'equipamento_id': Alerta.equipamento_id,
+    'mecanico_id': Alerta.mecanico_id,
+}
+
+
+@alertas_bp.route('/alertas', methods=['GET'])
+@token_required
+def get_alertas(current_user):
+    """
+    Feed dos alertas ativos de pneus, ordens de serviço e peças (mais
+    recentes primeiro), já calculados na tabela `alertas`. Filtros:
+    entidade, entidade_id, tipo, severidade (aceita lista separada por
+    vírgula), equipamento_id e mecanico_id. Paginado por cursor
+    (criado_em, id): `limit` (padrão 50) e `cursor`.
+    """
+    try:
+        try:
+            limite = ler_limite(request.args.get('limit'))
+        except CursorInvalido as e:
+            return jsonify({'error': str(e)}), 400
+
+        entidade = request.args.get('entidade')
+        if entidade and entidade not in REGRAS:
+            return jsonify({'error': f"Entidade inválida. Use {', '.join(REGRAS)}"}), 400
+
+        query = Alerta.query
+        for nome, coluna in FILTROS_ALERTAS.items():
+            valor = request.args.get(nome)
+            if not valor:
+                continue
+            if nome == 'severidade':
+                severidades = valor.split(',')
+                if any(severidade not in SEVERIDADES for severidade in severidades):
+                    return jsonify({'error': f"Severidade inválida. Use {', '.join(SEVERIDADES)}"}), 400
+                query = query.filter(coluna.in_(severidades))
+            else:
+                query = query.filter(coluna == valor)
+
+        try:
+            query = aplicar_keyset_desc(selecionar(query, campos_do_modelo(Alerta)), Alerta.criado_em, Alerta.id,
+                                        request.args.get('cursor'))
+        except CursorInvalido as e:
+            return jsonify({'error': str(e)}), 400
+        linhas, next_cursor = paginar_keyset(query, limite, lambda alerta: (alerta.criado_em, alerta.id))
+
+        alertas = []
+        for linha in linhas:
+            alerta = dict(linha._mapping)
+            alerta['dados'] = json.loads(alerta['dados']) if alerta['dados'] else {}
+            alertas.append(alerta)
+
+        return RespostaJSON({
+            'alertas': alertas,
+            'total': len(alertas),
+            'limit': limite,
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
+        }, 200)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@alertas_bp.route('/alertas/resumo', methods=['GET'])
+@token_required
+def get_resumo_alertas(current_user):
+    """Quantidade de alertas ativos por entidade e severidade (uma consulta agrupada)"""
+    try:
+        linhas = db.session.query(Alerta.entidade, Alerta.severidade, func.count(Alerta.id))\
+            .group_by(Alerta.entidade, Alerta.severidade).all()
+
+        por_entidade = {entidade: {severidade: 0 for severidade in SEVERIDADES} for entidade in REGRAS}
+        por_severidade = {severidade: 0 for severidade in SEVERIDADES}
+        for entidade, severidade, total in linhas:
+            por_entidade.setdefault(entidade, {}).setdefault(severidade, 0)
+            por_entidade[entidade][severidade] += total
+            por_severidade[severidade] = por_severidade.get(severidade, 0) + total
+
+        return jsonify({
+            'total': sum(por_severidade.values()),
+            'por_severidade': por_severidade,
+            'por_entidade': por_entidade
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
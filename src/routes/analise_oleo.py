@@ -3,10 +3,56 @@ from src.db import db
 from src.models.analise_oleo import AnaliseOleo
 from src.models.equipamento import Equipamento
 from src.utils.auth import token_required, pcm_or_above_required
+from src.utils.ag_grid import RequisicaoGridInvalida, consultar_grid
+from src.utils.serializacao import RespostaJSON, campos_do_modelo, selecionar
+from sqlalchemy.orm import contains_eager
 from datetime import datetime
+import json
 
 analise_oleo_bp = Blueprint('analise_oleo', __name__)
 
+# Colunas disponíveis para filtro/ordenação/agrupamento no grid de análises
+COLUNAS_GRID_ANALISES = {
+    'id': AnaliseOleo.id,
+    'equipamento_id': AnaliseOleo.equipamento_id,
+    'equipamento_nome': Equipamento.nome,
+    'equipamento_codigo': Equipamento.codigo_interno,
+    'numero_amostra': AnaliseOleo.numero_amostra,
+    'data_coleta': AnaliseOleo.data_coleta,
+    'horimetro_coleta': AnaliseOleo.horimetro_coleta,
+    'tipo_oleo': AnaliseOleo.tipo_oleo,
+    'laboratorio': AnaliseOleo.laboratorio,
+    'data_resultado_lab': AnaliseOleo.data_resultado_lab,
+    'status': AnaliseOleo.status,
+    'prioridade': AnaliseOleo.prioridade,
+    'responsavel_coleta': AnaliseOleo.responsavel_coleta,
+    'responsavel_analise': AnaliseOleo.responsavel_analise,
+    'created_at': AnaliseOleo.created_at,
+    'updated_at': AnaliseOleo.updated_at,
+}
+
+# Colunas da listagem: campos de AnaliseOleo.to_dict() e do equipamento (prefixo _equipamento_)
+CAMPOS_LISTA_ANALISES = {
+    **campos_do_modelo(AnaliseOleo),
+    '_equipamento_id': Equipamento.id,
+    '_equipamento_nome': Equipamento.nome,
+    '_equipamento_codigo_interno': Equipamento.codigo_interno,
+}
+
+
+def _analise_dict_projetada(linha):
+    """Equivalente a AnaliseOleo.to_dict() a partir de uma linha de CAMPOS_LISTA_ANALISES"""
+    analise = dict(linha._mapping)
+    equipamento = {chave[len('_equipamento_'):]: analise.pop(chave)
+                   for chave in list(analise) if chave.startswith('_equipamento_')}
+    try:
+        parametros = json.loads(analise['parametros_analisados']) if analise['parametros_analisados'] else {}
+    except json.JSONDecodeError:
+        parametros = {}
+    analise['parametros_analisados'] = parametros
+    analise['equipamento'] = equipamento if equipamento['id'] is not None else None
+    return analise
+
 @analise_oleo_bp.route('/analise-oleo', methods=['GET'])
 @token_required
 def get_analises_oleo(current_user):
@@ -17,14 +63,16 @@ def get_analises_oleo(current_user):
         equipamento_id = request.args.get('equipamento_id')
         search = request.args.get('search')
         
-        query = AnaliseOleo.query
+        # Equipamento na mesma consulta, apenas com as colunas da listagem
+        query = db.session.query(AnaliseOleo)\
+            .outerjoin(Equipamento, AnaliseOleo.equipamento_id == Equipamento.id)
         
         if status:
-            query = query.filter_by(status=status)
+            query = query.filter(AnaliseOleo.status == status)
         if prioridade:
-            query = query.filter_by(prioridade=prioridade)
+            query = query.filter(AnaliseOleo.prioridade == prioridade)
         if equipamento_id:
-            query = query.filter_by(equipamento_id=equipamento_id)
+            query = query.filter(AnaliseOleo.equipamento_id == equipamento_id)
         if search:
             query = query.filter(
                 AnaliseOleo.numero_amostra.contains(search) |
@@ -33,16 +81,37 @@ def get_analises_oleo(current_user):
             )
         
         # Ordenar por data de coleta (mais recentes primeiro)
-        analises = query.order_by(AnaliseOleo.data_coleta.desc()).all()
+        linhas = selecionar(query, CAMPOS_LISTA_ANALISES).order_by(AnaliseOleo.data_coleta.desc())
+        analises = [_analise_dict_projetada(linha) for linha in linhas]
         
-        return jsonify({
-            'analises_oleo': [analise.to_dict() for analise in analises],
+        return RespostaJSON({
+            'analises_oleo': analises,
             'total': len(analises)
-        }), 200
+        }, 200)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@analise_oleo_bp.route('/analise-oleo/grid', methods=['POST'])
+@token_required
+def get_analises_oleo_grid(current_user):
+    """Bloco de análises de óleo para o Server-Side Row Model do AG-Grid"""
+    try:
+        query = db.session.query(AnaliseOleo)\
+            .outerjoin(Equipamento, AnaliseOleo.equipamento_id == Equipamento.id)
+
+        resultado = consultar_grid(
+            query, request.get_json(silent=True), COLUNAS_GRID_ANALISES,
+            lambda analise: analise.to_dict(), AnaliseOleo.id,
+            opcoes=(contains_eager(AnaliseOleo.equipamento),)
+        )
+        return RespostaJSON(resultado, 200)
+
+    except RequisicaoGridInvalida as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @analise_oleo_bp.route('/analise-oleo/<int:analise_id>', methods=['GET'])
 @token_required
 def get_analise_oleo(current_user, analise_id):
@@ -2,7 +2,7 @@ from flask import Blueprint, request, jsonify
 from werkzeug.security import check_password_hash
 from src.db import db
 from src.models.usuario import Usuario
-from src.utils.auth import token_required, get_user_permissions, SECRET_KEY
+from src.utils.auth import token_required, get_user_permissions, invalidar_usuario_cache, SECRET_KEY
 import jwt
 import logging
 from datetime import datetime, timedelta
@@ -32,6 +32,7 @@ def login():
 
         usuario.ultimo_login = datetime.utcnow()
         db.session.commit()
+        invalidar_usuario_cache(usuario.id)
 
         token = jwt.encode({
             'user_id': usuario.id,
@@ -95,6 +96,7 @@ def change_password(current_user):
 
         current_user.set_password(nova_senha)
         db.session.commit()
+        invalidar_usuario_cache(current_user.id)
 
         return jsonify({'message': 'Senha alterada com sucesso'}), 200
 
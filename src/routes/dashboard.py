@@ -6,109 +6,149 @@ from src.models.peca import Peca
 from src.models.mecanico import Mecanico
 from src.models.pneu import Pneu
 from src.utils.auth import token_required
-from sqlalchemy import func, extract
+from src.utils.cache import dashboard_cache
+from src.utils.serializacao import contar_se
+from sqlalchemy import func, case
 from datetime import datetime, timedelta
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
+STATUS_OS_ABERTAS = ['aberta', 'em_execucao', 'aguardando_pecas']
+
+OS_POR_STATUS = [
+    ('aberta', 'Abertas'),
+    ('em_execucao', 'Em Execução'),
+    ('aguardando_pecas', 'Aguardando Peças'),
+    ('concluida', 'Concluídas'),
+    ('cancelada', 'Canceladas')
+]
+
+
+def _inicio_mes(data):
+    return data.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _mes_anterior(data):
+    return _inicio_mes(data - timedelta(days=1))
+
+
+def _truncar_mes(coluna):
+    """Equivalente a date_trunc('month', coluna) no dialeto em uso"""
+    if db.engine.dialect.name == 'postgresql':
+        return func.date_trunc('month', coluna)
+    return func.strftime('%Y-%m-01 00:00:00', coluna)
+
+
+def _evolucao_mensal_os(agora, meses=6):
+    """Histograma de OS abertas nos últimos `meses` meses em uma única query"""
+    inicios = [_inicio_mes(agora)]
+    for _ in range(meses - 1):
+        inicios.append(_mes_anterior(inicios[-1]))
+    inicios.reverse()
+
+    mes = _truncar_mes(OrdemServico.data_abertura)
+    contagens = db.session.query(mes.label('mes'), func.count(OrdemServico.id))\
+        .filter(OrdemServico.data_abertura >= inicios[0])\
+        .group_by(mes).all()
+
+    por_mes = {}
+    for inicio, count in contagens:
+        if isinstance(inicio, str):
+            inicio = datetime.fromisoformat(inicio)
+        por_mes[(inicio.year, inicio.month)] = count
+
+    return [
+        {'mes': inicio.strftime('%B'), 'count': por_mes.get((inicio.year, inicio.month), 0)}
+        for inicio in inicios
+    ]
+
+
+def calcular_dashboard():
+    """Calcula os KPIs e gráficos do dashboard com consultas agregadas"""
+    agora = datetime.utcnow()
+    data_limite = agora - timedelta(days=30)
+
+    equipamentos = db.session.query(
+        func.count(Equipamento.id),
+        contar_se(Equipamento.status == 'ativo'),
+        contar_se(Equipamento.status == 'manutencao')
+    ).one()
+
+    ordens = db.session.query(
+        func.count(OrdemServico.id),
+        contar_se(OrdemServico.status.in_(STATUS_OS_ABERTAS)),
+        *[contar_se(OrdemServico.status == status) for status, _ in OS_POR_STATUS],
+        contar_se(OrdemServico.tipo == 'preventiva'),
+        contar_se(OrdemServico.tipo == 'corretiva'),
+        func.sum(case((OrdemServico.data_encerramento >= data_limite, OrdemServico.custo_total), else_=0))
+    ).one()
+    total_os, os_abertas = ordens[0], ordens[1]
+    contagem_status = dict(zip([status for status, _ in OS_POR_STATUS], ordens[2:7]))
+    os_preventivas, os_corretivas, custo_mensal = ordens[7], ordens[8], ordens[9]
+
+    pecas = db.session.query(
+        func.count(Peca.id),
+        contar_se(Peca.quantidade <= Peca.min_estoque)
+    ).one()
+
+    pneus = db.session.query(
+        func.count(Pneu.id),
+        contar_se(Pneu.status == 'em_uso')
+    ).one()
+
+    total_mecanicos = db.session.query(func.count(Mecanico.id)).filter(Mecanico.status == 'ativo').scalar()
+
+    # Equipamentos com mais OS
+    equipamentos_mais_os = db.session.query(
+        Equipamento.nome,
+        Equipamento.codigo_interno,
+        func.count(OrdemServico.id).label('total_os')
+    ).join(OrdemServico).group_by(Equipamento.id).order_by(func.count(OrdemServico.id).desc()).limit(5).all()
+
+    return {
+        'kpis': {
+            'total_equipamentos': equipamentos[0],
+            'equipamentos_ativos': equipamentos[1] or 0,
+            'equipamentos_manutencao': equipamentos[2] or 0,
+            'total_os': total_os,
+            'os_abertas': os_abertas or 0,
+            'os_concluidas': contagem_status['concluida'] or 0,
+            'total_pecas': pecas[0],
+            'pecas_baixo_estoque': pecas[1] or 0,
+            'total_mecanicos': total_mecanicos,
+            'total_pneus': pneus[0],
+            'pneus_em_uso': pneus[1] or 0,
+            'custo_mensal': custo_mensal or 0
+        },
+        'graficos': {
+            'evolucao_os': _evolucao_mensal_os(agora),
+            'os_por_status': [
+                {'status': rotulo, 'count': contagem_status[status] or 0}
+                for status, rotulo in OS_POR_STATUS
+            ],
+            'equipamentos_mais_os': [
+                {
+                    'nome': eq.nome,
+                    'codigo': eq.codigo_interno,
+                    'total_os': eq.total_os
+                } for eq in equipamentos_mais_os
+            ],
+            'os_por_tipo': [
+                {'tipo': 'Preventiva', 'count': os_preventivas or 0},
+                {'tipo': 'Corretiva', 'count': os_corretivas or 0}
+            ]
+        }
+    }
+
+
 @dashboard_bp.route('/dashboard', methods=['GET'])
 @token_required
 def get_dashboard(current_user):
     try:
-        # KPIs principais
-        total_equipamentos = Equipamento.query.count()
-        equipamentos_ativos = Equipamento.query.filter_by(status='ativo').count()
-        equipamentos_manutencao = Equipamento.query.filter_by(status='manutencao').count()
-        
-        total_os = OrdemServico.query.count()
-        os_abertas = OrdemServico.query.filter(OrdemServico.status.in_(['aberta', 'em_execucao', 'aguardando_pecas'])).count()
-        os_concluidas = OrdemServico.query.filter_by(status='concluida').count()
-        
-        total_pecas = Peca.query.count()
-        pecas_baixo_estoque = Peca.query.filter(Peca.quantidade <= Peca.min_estoque).count()
-        
-        total_mecanicos = Mecanico.query.filter_by(status='ativo').count()
-        
-        total_pneus = Pneu.query.count()
-        pneus_em_uso = Pneu.query.filter_by(status='em_uso').count()
-        
-        # Custo mensal (últimos 30 dias)
-        data_limite = datetime.utcnow() - timedelta(days=30)
-        custo_mensal = db.session.query(func.sum(OrdemServico.custo_total)).filter(
-            OrdemServico.data_encerramento >= data_limite
-        ).scalar() or 0
-        
-        # Evolução mensal de OS (últimos 6 meses)
-        evolucao_os = []
-        for i in range(6):
-            mes_atual = datetime.utcnow() - timedelta(days=30*i)
-            mes_anterior = mes_atual - timedelta(days=30)
-            
-            count = OrdemServico.query.filter(
-                OrdemServico.data_abertura >= mes_anterior,
-                OrdemServico.data_abertura < mes_atual
-            ).count()
-            
-            evolucao_os.append({
-                'mes': mes_atual.strftime('%B'),
-                'count': count
-            })
-        
-        evolucao_os.reverse()
-        
-        # OS por status
-        os_por_status = [
-            {'status': 'Abertas', 'count': OrdemServico.query.filter_by(status='aberta').count()},
-            {'status': 'Em Execução', 'count': OrdemServico.query.filter_by(status='em_execucao').count()},
-            {'status': 'Aguardando Peças', 'count': OrdemServico.query.filter_by(status='aguardando_pecas').count()},
-            {'status': 'Concluídas', 'count': OrdemServico.query.filter_by(status='concluida').count()},
-            {'status': 'Canceladas', 'count': OrdemServico.query.filter_by(status='cancelada').count()}
-        ]
-        
-        # Equipamentos com mais OS
-        equipamentos_mais_os = db.session.query(
-            Equipamento.nome,
-            Equipamento.codigo_interno,
-            func.count(OrdemServico.id).label('total_os')
-        ).join(OrdemServico).group_by(Equipamento.id).order_by(func.count(OrdemServico.id).desc()).limit(5).all()
-        
-        equipamentos_ranking = [
-            {
-                'nome': eq.nome,
-                'codigo': eq.codigo_interno,
-                'total_os': eq.total_os
-            } for eq in equipamentos_mais_os
-        ]
-        
-        # OS por tipo
-        os_por_tipo = [
-            {'tipo': 'Preventiva', 'count': OrdemServico.query.filter_by(tipo='preventiva').count()},
-            {'tipo': 'Corretiva', 'count': OrdemServico.query.filter_by(tipo='corretiva').count()}
-        ]
-        
-        return jsonify({
-            'kpis': {
-                'total_equipamentos': total_equipamentos,
-                'equipamentos_ativos': equipamentos_ativos,
-                'equipamentos_manutencao': equipamentos_manutencao,
-                'total_os': total_os,
-                'os_abertas': os_abertas,
-                'os_concluidas': os_concluidas,
-                'total_pecas': total_pecas,
-                'pecas_baixo_estoque': pecas_baixo_estoque,
-                'total_mecanicos': total_mecanicos,
-                'total_pneus': total_pneus,
-                'pneus_em_uso': pneus_em_uso,
-                'custo_mensal': custo_mensal
-            },
-            'graficos': {
-                'evolucao_os': evolucao_os,
-                'os_por_status': os_por_status,
-                'equipamentos_mais_os': equipamentos_ranking,
-                'os_por_tipo': os_por_tipo
-            }
-        }), 200
-        
+        # Os KPIs não dependem do usuário: um único cache por processo, invalidado
+        # quando este processo altera OS, peças, pneus ou equipamentos; nos outros
+        # workers a defasagem é limitada pelo DASHBOARD_CACHE_TTL
+        return jsonify(dashboard_cache.get_or_set('dashboard', calcular_dashboard)), 200
+
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-
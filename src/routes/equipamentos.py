@@ -3,6 +3,9 @@ from src.db import db
 from src.models.equipamento import Equipamento
 from src.models.tipo_equipamento import TipoEquipamento
 from src.utils.auth import token_required, supervisor_or_admin_required
+from src.utils.ag_grid import RequisicaoGridInvalida, consultar_grid
+from src.utils.serializacao import RespostaJSON, campos_do_modelo, projetar
+from sqlalchemy.orm import contains_eager
 from datetime import datetime
 import logging
 
@@ -11,6 +14,33 @@ logging.basicConfig(level=logging.INFO)
 
 equipamentos_bp = Blueprint('equipamentos', __name__)
 
+# Colunas disponíveis para filtro/ordenação/agrupamento no grid de equipamentos
+COLUNAS_GRID_EQUIPAMENTOS = {
+    'id': Equipamento.id,
+    'codigo_interno': Equipamento.codigo_interno,
+    'nome': Equipamento.nome,
+    'tipo': Equipamento.tipo,
+    'tipo_equipamento_id': Equipamento.tipo_equipamento_id,
+    'tipo_equipamento': TipoEquipamento.nome,
+    'tipo_equipamento_nome': TipoEquipamento.nome,
+    'modelo': Equipamento.modelo,
+    'fabricante': Equipamento.fabricante,
+    'numero_serie': Equipamento.numero_serie,
+    'status': Equipamento.status,
+    'localizacao': Equipamento.localizacao,
+    'horimetro_atual': Equipamento.horimetro_atual,
+    'data_aquisicao': Equipamento.data_aquisicao,
+    'valor_aquisicao': Equipamento.valor_aquisicao,
+    'created_at': Equipamento.created_at,
+    'updated_at': Equipamento.updated_at,
+}
+
+# Colunas da listagem: mesmos campos de Equipamento.to_dict()
+CAMPOS_LISTA_EQUIPAMENTOS = {
+    **campos_do_modelo(Equipamento),
+    'tipo_equipamento': TipoEquipamento.nome,
+}
+
 @equipamentos_bp.route('/equipamentos', methods=['GET'])
 @token_required
 def get_equipamentos(current_user):
@@ -34,25 +64,48 @@ def get_equipamentos(current_user):
                 (Equipamento.fabricante.contains(search))
             )
         
-        equipamentos = query.all()
+        equipamentos = projetar(query, CAMPOS_LISTA_EQUIPAMENTOS)
         
         # Incluir informações do tipo de equipamento
-        result = []
-        for eq in equipamentos:
-            eq_dict = eq.to_dict()
-            if eq.tipo_equipamento_obj:
-                eq_dict['tipo_equipamento_nome'] = eq.tipo_equipamento_obj.nome
-            result.append(eq_dict)
+        for eq_dict in equipamentos:
+            if eq_dict['tipo_equipamento'] is not None:
+                eq_dict['tipo_equipamento_nome'] = eq_dict['tipo_equipamento']
         
-        return jsonify({
-            'equipamentos': result,
-            'total': len(result)
-        }), 200
+        return RespostaJSON({
+            'equipamentos': equipamentos,
+            'total': len(equipamentos)
+        }, 200)
         
     except Exception:
         logger.exception("Erro ao carregar equipamentos")
         return jsonify({'error': 'Erro interno do servidor'}), 500
 
+@equipamentos_bp.route('/equipamentos/grid', methods=['POST'])
+@token_required
+def get_equipamentos_grid(current_user):
+    """Bloco de equipamentos para o Server-Side Row Model do AG-Grid"""
+    try:
+        query = db.session.query(Equipamento)\
+            .outerjoin(TipoEquipamento, Equipamento.tipo_equipamento_id == TipoEquipamento.id)
+
+        def serializar(eq):
+            eq_dict = eq.to_dict()
+            if eq.tipo_equipamento_obj:
+                eq_dict['tipo_equipamento_nome'] = eq.tipo_equipamento_obj.nome
+            return eq_dict
+
+        resultado = consultar_grid(
+            query, request.get_json(silent=True), COLUNAS_GRID_EQUIPAMENTOS, serializar, Equipamento.id,
+            opcoes=(contains_eager(Equipamento.tipo_equipamento_obj),)
+        )
+        return RespostaJSON(resultado, 200)
+
+    except RequisicaoGridInvalida as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception:
+        logger.exception("Erro ao carregar grid de equipamentos")
+        return jsonify({'error': 'Erro interno do servidor'}), 500
+
 @equipamentos_bp.route('/equipamentos/<int:equipamento_id>', methods=['GET'])
 @token_required
 def get_equipamento(current_user, equipamento_id):
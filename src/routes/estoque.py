@@ -4,11 +4,291 @@ from src.models.peca import Peca
 from src.models.item import Item
 from src.models.movimentacao_estoque import MovimentacaoEstoque
 from src.models.estoque_local import EstoqueLocal
+from src.models.grupo_item import GrupoItem
+from src.models.saldo_estoque import SaldoEstoque
+from src.models.equipamento import Equipamento
+from src.models.mecanico import Mecanico
+from src.models.usuario import Usuario
+from src.models.inventario_sessao import InventarioSessao
+from src.models.inventario_contagem import InventarioContagem
 from src.utils.auth import token_required, supervisor_or_admin_required, almoxarife_or_above_required
-from datetime import datetime
+from src.utils.ag_grid import RequisicaoGridInvalida, consultar_grid
+from src.utils.busca_pecas import LIMITE_MAXIMO_BUSCA, LIMITE_PADRAO_BUSCA, buscar_pecas
+from src.utils.exportacao import FormatoInvalido, exportar, ler_formato
+from src.utils.inventario_ciclico import (
+    ContagensInvalidas, ErroInventario, bloquear_sessao, cancelar_sessao, criar_sessao, fechar_sessao,
+    registrar_contagens
+)
+from src.utils.paginacao import CursorInvalido, aplicar_keyset_desc, aplicar_keyset_id, ler_limite, paginar_keyset
+from src.utils.saldos_estoque import (
+    CAMPOS_LANCAMENTO, ErroMovimentacao, MovimentacoesInvalidas, ajustar_por_contagem, estoque_padrao_id,
+    registrar_movimentacao, registrar_movimentacoes
+)
+from src.utils.serializacao import RespostaJSON, campos_do_modelo, selecionar
+from sqlalchemy import case, func
+from sqlalchemy.orm import aliased, contains_eager, joinedload
+from datetime import datetime, timedelta
 
 estoque_bp = Blueprint('estoque', __name__)
 
+EstoqueOrigem = aliased(EstoqueLocal)
+EstoqueDestino = aliased(EstoqueLocal)
+LocalPeca = aliased(EstoqueLocal)
+
+# Colunas da listagem de movimentações (sem carregar peça/usuário/... por linha);
+# a peça vem completa, com os campos de Peca.to_dict() (prefixo _peca_)
+CAMPOS_LISTA_MOVIMENTACOES = {
+    **campos_do_modelo(MovimentacaoEstoque),
+    **{f'_peca_{nome}': coluna for nome, coluna in campos_do_modelo(Peca).items()},
+    '_peca_grupo_item': GrupoItem.nome,
+    '_peca_estoque_local': LocalPeca.nome,
+    'usuario': Usuario.nome_completo,
+    'equipamento': Equipamento.nome,
+    'mecanico': Mecanico.nome_completo,
+    'estoque_origem': EstoqueOrigem.nome,
+    'estoque_destino': EstoqueDestino.nome,
+}
+
+# Colunas dos arquivos exportados (na ordem das colunas)
+CAMPOS_EXPORTACAO_MOVIMENTACOES = {
+    'id': MovimentacaoEstoque.id,
+    'data_movimentacao': MovimentacaoEstoque.data_movimentacao,
+    'tipo_movimentacao': MovimentacaoEstoque.tipo_movimentacao,
+    'peca_codigo': Peca.codigo,
+    'peca_nome': Peca.nome,
+    'unidade': Peca.unidade,
+    'quantidade': MovimentacaoEstoque.quantidade,
+    'estoque_origem': EstoqueOrigem.nome,
+    'estoque_destino': EstoqueDestino.nome,
+    'motivo': MovimentacaoEstoque.motivo,
+    'numero_nf': MovimentacaoEstoque.numero_nf,
+    'usuario': Usuario.nome_completo,
+    'equipamento': Equipamento.nome,
+    'mecanico': Mecanico.nome_completo,
+    'setor': MovimentacaoEstoque.setor,
+    'ordem_servico_id': MovimentacaoEstoque.ordem_servico_id,
+    'observacoes': MovimentacaoEstoque.observacoes,
+}
+
+CAMPOS_EXPORTACAO_INVENTARIO = {
+    'codigo': Peca.codigo,
+    'nome': Peca.nome,
+    'grupo_item': GrupoItem.nome,
+    'estoque_local': EstoqueLocal.nome,
+    'localizacao': Peca.localizacao,
+    'unidade': Peca.unidade,
+    'quantidade': Peca.quantidade,
+    'min_estoque': Peca.min_estoque,
+    'max_estoque': Peca.max_estoque,
+    'preco_unitario': Peca.preco_unitario,
+    'valor_total': Peca.quantidade * func.coalesce(Peca.preco_unitario, 0),
+    'status_estoque': case((Peca.quantidade <= Peca.min_estoque, 'baixo'), else_='normal'),
+    'ultima_inventariacao_data': Peca.ultima_inventariacao_data,
+    'ultima_inventariacao_usuario': Peca.ultima_inventariacao_usuario,
+}
+
+# Colunas das peças de uma sessão de inventário
+CAMPOS_ITENS_INVENTARIO = {
+    'id': InventarioContagem.id,
+    'peca_id': InventarioContagem.peca_id,
+    'codigo': Peca.codigo,
+    'nome': Peca.nome,
+    'unidade': Peca.unidade,
+    'localizacao': Peca.localizacao,
+    'quantidade_sistema': InventarioContagem.quantidade_sistema,
+    'quantidade_contada': InventarioContagem.quantidade_contada,
+    'contado_em': InventarioContagem.contado_em,
+    'contado_por_id': InventarioContagem.contado_por_id,
+}
+
+# Colunas disponíveis para filtro/ordenação/agrupamento no grid de peças
+COLUNAS_GRID_PECAS = {
+    'id': Peca.id,
+    'codigo': Peca.codigo,
+    'nome': Peca.nome,
+    'categoria': Peca.categoria,
+    'descricao': Peca.descricao,
+    'unidade': Peca.unidade,
+    'quantidade': Peca.quantidade,
+    'min_estoque': Peca.min_estoque,
+    'quantidade_minima': Peca.min_estoque,
+    'max_estoque': Peca.max_estoque,
+    'quantidade_maxima': Peca.max_estoque,
+    'preco_unitario': Peca.preco_unitario,
+    'valor_unitario': Peca.preco_unitario,
+    'fornecedor': Peca.fornecedor,
+    'localizacao': Peca.localizacao,
+    'grupo_item_id': Peca.grupo_item_id,
+    'grupo_item': GrupoItem.nome,
+    'grupo_nome': GrupoItem.nome,
+    'estoque_local_id': Peca.estoque_local_id,
+    'estoque_local': EstoqueLocal.nome,
+    'ultima_inventariacao_data': Peca.ultima_inventariacao_data,
+    'created_at': Peca.created_at,
+    'updated_at': Peca.updated_at,
+    'ultima_movimentacao': Peca.updated_at,
+    'descricao_item': Item.descricao_item,
+}
+
+
+def _item_dict(item):
+    return {
+        'numero_item': item.numero_item,
+        'descricao_item': item.descricao_item,
+        'grupo_itens': item.grupo_itens,
+        'unidade_medida': item.unidade_medida,
+        'ultimo_preco_avaliacao': float(item.ultimo_preco_avaliacao) if item.ultimo_preco_avaliacao is not None else None,
+        'ultimo_preco_compra': float(item.ultimo_preco_compra) if item.ultimo_preco_compra is not None else None,
+        'estoque_baixo': item.estoque_baixo,
+        'data_registro': item.data_registro.isoformat() if item.data_registro else None
+    }
+
+
+# Colunas da listagem de peças: campos de Peca.to_dict() e do item vinculado (prefixo _item_)
+CAMPOS_LISTA_PECAS = {
+    **campos_do_modelo(Peca),
+    'grupo_item': GrupoItem.nome,
+    'estoque_local': EstoqueLocal.nome,
+    '_item_numero_item': Item.numero_item,
+    '_item_descricao_item': Item.descricao_item,
+    '_item_grupo_itens': Item.grupo_itens,
+    '_item_unidade_medida': Item.unidade_medida,
+    '_item_ultimo_preco_avaliacao': Item.ultimo_preco_avaliacao,
+    '_item_ultimo_preco_compra': Item.ultimo_preco_compra,
+    '_item_estoque_baixo': Item.estoque_baixo,
+    '_item_data_registro': Item.data_registro,
+}
+
+
+def _completar_peca_dict(peca):
+    """Completa o dict de colunas da peça (mais grupo_item e estoque_local) com os campos derivados de Peca.to_dict()"""
+    quantidade = peca['quantidade']
+    min_estoque = peca['min_estoque']
+    peca['grupo_nome'] = peca['grupo_item']
+    peca['quantidade_minima'] = min_estoque
+    peca['quantidade_maxima'] = peca['max_estoque']
+    peca['valor_unitario'] = peca['preco_unitario']
+    peca['ultima_movimentacao'] = peca['updated_at']
+    peca['status'] = (
+        'Zerado' if quantidade == 0
+        else 'Baixo' if quantidade <= min_estoque
+        else 'Disponível'
+    )
+    peca['status_estoque'] = 'baixo' if quantidade <= min_estoque else 'normal'
+    return peca
+
+
+def _peca_dict_projetada(linha):
+    """Equivalente a Peca.to_dict() (mais o item) a partir de uma linha de CAMPOS_LISTA_PECAS"""
+    peca = dict(linha._mapping)
+    item = {chave[len('_item_'):]: peca.pop(chave) for chave in list(peca) if chave.startswith('_item_')}
+    _completar_peca_dict(peca)
+
+    if item['numero_item'] is not None:
+        for campo in ('ultimo_preco_avaliacao', 'ultimo_preco_compra'):
+            if item[campo] is not None:
+                item[campo] = float(item[campo])
+        peca['item'] = item
+    return peca
+
+
+def _agregados_pecas():
+    """Colunas agregadas dos relatórios de estoque (uma linha por grupo)"""
+    return (
+        func.count(Peca.id).label('total_pecas'),
+        func.coalesce(func.sum(Peca.quantidade), 0).label('total_quantidade'),
+        func.coalesce(func.sum(Peca.quantidade * func.coalesce(Peca.preco_unitario, 0)), 0).label('valor_total'),
+        func.coalesce(func.sum(case((Peca.quantidade <= Peca.min_estoque, 1), else_=0)), 0)
+            .label('pecas_baixo_estoque'),
+        func.coalesce(func.sum(case((Peca.ultima_inventariacao_data.is_(None), 1), else_=0)), 0)
+            .label('pecas_sem_inventario'),
+    )
+
+
+def _agrupar_pecas(query, coluna_fk, modelo, nome, sem_nome):
+    """Agrega as peças de `query` por `coluna_fk`, com o nome do registro de `modelo`"""
+    linhas = query.outerjoin(modelo, coluna_fk == modelo.id)\
+        .with_entities(coluna_fk, modelo.nome, *_agregados_pecas())\
+        .group_by(coluna_fk, modelo.nome)\
+        .order_by(modelo.nome)\
+        .all()
+    return [
+        {
+            f'{nome}_id': linha[0],
+            nome: linha[1] or sem_nome,
+            'total_pecas': linha.total_pecas,
+            'total_quantidade': linha.total_quantidade,
+            'valor_total_estoque': round(linha.valor_total, 2),
+            'pecas_baixo_estoque': linha.pecas_baixo_estoque,
+            'pecas_sem_inventario': linha.pecas_sem_inventario
+        }
+        for linha in linhas
+    ]
+
+
+def _agrupar_saldos_por_local(query, estoque_local_id=None):
+    """
+    Agrega os saldos (peça × local) das peças de `query` por estoque: a
+    quantidade e o valor de cada local vêm de `saldos_estoque`, não do
+    total da peça nem do seu local padrão.
+    """
+    valor = SaldoEstoque.quantidade * func.coalesce(Peca.preco_unitario, 0)
+    query = query.join(SaldoEstoque, SaldoEstoque.peca_id == Peca.id)\
+        .outerjoin(EstoqueLocal, SaldoEstoque.estoque_local_id == EstoqueLocal.id)
+    if estoque_local_id:
+        query = query.filter(SaldoEstoque.estoque_local_id == estoque_local_id)
+    linhas = query.with_entities(
+        SaldoEstoque.estoque_local_id,
+        EstoqueLocal.nome,
+        func.count(SaldoEstoque.id).label('total_pecas'),
+        func.coalesce(func.sum(SaldoEstoque.quantidade), 0).label('total_quantidade'),
+        func.coalesce(func.sum(valor), 0).label('valor_total'),
+        func.coalesce(func.sum(case((Peca.quantidade <= Peca.min_estoque, 1), else_=0)), 0)
+            .label('pecas_baixo_estoque'),
+        func.coalesce(func.sum(case((Peca.ultima_inventariacao_data.is_(None), 1), else_=0)), 0)
+            .label('pecas_sem_inventario'),
+    ).group_by(SaldoEstoque.estoque_local_id, EstoqueLocal.nome)\
+        .order_by(EstoqueLocal.nome)\
+        .all()
+    return [
+        {
+            'estoque_local_id': linha[0],
+            'estoque_local': linha[1],
+            'total_pecas': linha.total_pecas,
+            'total_quantidade': linha.total_quantidade,
+            'valor_total_estoque': round(linha.valor_total, 2),
+            'pecas_baixo_estoque': linha.pecas_baixo_estoque,
+            'pecas_sem_inventario': linha.pecas_sem_inventario
+        }
+        for linha in linhas
+    ]
+
+
+def _detalhe_pecas(query):
+    """
+    Peças de `query` (projeção de CAMPOS_LISTA_PECAS) ordenadas por id:
+    todas, ou uma página por cursor quando `limit` ou `cursor` é informado
+    (então com `next_cursor` e `has_more`). CursorInvalido se forem inválidos.
+    """
+    query = query.outerjoin(GrupoItem, Peca.grupo_item_id == GrupoItem.id)\
+        .outerjoin(EstoqueLocal, Peca.estoque_local_id == EstoqueLocal.id)\
+        .outerjoin(Item, Peca.codigo == Item.numero_item)
+    query = selecionar(query, CAMPOS_LISTA_PECAS)
+
+    cursor = request.args.get('cursor')
+    if cursor is None and request.args.get('limit') is None:
+        return {'pecas': [_peca_dict_projetada(linha) for linha in query.order_by(Peca.id)]}
+
+    limite = ler_limite(request.args.get('limit'))
+    linhas, next_cursor = paginar_keyset(aplicar_keyset_id(query, Peca.id, cursor), limite,
+                                         lambda linha: (None, linha.id))
+    return {
+        'pecas': [_peca_dict_projetada(linha) for linha in linhas],
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None
+    }
+
+
 @estoque_bp.route('/estoque/pecas', methods=['GET'])
 @token_required
 def get_pecas(current_user):
@@ -18,7 +298,10 @@ def get_pecas(current_user):
         baixo_estoque = request.args.get('baixo_estoque')
         search = request.args.get('search')
         
-        query = db.session.query(Peca, Item).outerjoin(Item, Peca.codigo == Item.numero_item)
+        query = db.session.query(Peca)\
+            .outerjoin(GrupoItem, Peca.grupo_item_id == GrupoItem.id)\
+            .outerjoin(EstoqueLocal, Peca.estoque_local_id == EstoqueLocal.id)\
+            .outerjoin(Item, Peca.codigo == Item.numero_item)
         
         if categoria:
             query = query.filter(Peca.categoria == categoria)
@@ -36,26 +319,58 @@ def get_pecas(current_user):
                 )
             )
 
-        results = query.all()
+        pecas = [_peca_dict_projetada(linha) for linha in selecionar(query, CAMPOS_LISTA_PECAS)]
 
-        pecas = []
-        for peca, item in results:
+        return RespostaJSON({'pecas': pecas, 'total': len(pecas)}, 200)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@estoque_bp.route('/estoque/pecas/busca', methods=['GET'])
+@token_required
+def buscar_pecas_typeahead(current_user):
+    """
+    Busca de peças para autocompletar: `q` (mínimo 2 caracteres) no código,
+    nome, fornecedor e descrição do item; `limit` (padrão 10, máximo 50)
+    peças ordenadas por relevância
+    """
+    try:
+        try:
+            limite = ler_limite(request.args.get('limit'), padrao=LIMITE_PADRAO_BUSCA, maximo=LIMITE_MAXIMO_BUSCA)
+        except CursorInvalido as e:
+            return jsonify({'error': str(e)}), 400
+
+        pecas = buscar_pecas(request.args.get('q'), limite)
+        return RespostaJSON({'pecas': pecas, 'total': len(pecas)}, 200)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@estoque_bp.route('/estoque/pecas/grid', methods=['POST'])
+@token_required
+def get_pecas_grid(current_user):
+    """Bloco de peças para o Server-Side Row Model do AG-Grid"""
+    try:
+        query = db.session.query(Peca, Item)\
+            .outerjoin(GrupoItem, Peca.grupo_item_id == GrupoItem.id)\
+            .outerjoin(EstoqueLocal, Peca.estoque_local_id == EstoqueLocal.id)\
+            .outerjoin(Item, Peca.codigo == Item.numero_item)
+
+        def serializar(linha):
+            peca, item = linha
             peca_dict = peca.to_dict()
             if item:
-                peca_dict['item'] = {
-                    'numero_item': item.numero_item,
-                    'descricao_item': item.descricao_item,
-                    'grupo_itens': item.grupo_itens,
-                    'unidade_medida': item.unidade_medida,
-                    'ultimo_preco_avaliacao': float(item.ultimo_preco_avaliacao) if item.ultimo_preco_avaliacao is not None else None,
-                    'ultimo_preco_compra': float(item.ultimo_preco_compra) if item.ultimo_preco_compra is not None else None,
-                    'estoque_baixo': item.estoque_baixo,
-                    'data_registro': item.data_registro.isoformat() if item.data_registro else None
-                }
-            pecas.append(peca_dict)
-
-        return jsonify({'pecas': pecas, 'total': len(pecas)}), 200
-        
+                peca_dict['item'] = _item_dict(item)
+            return peca_dict
+
+        resultado = consultar_grid(
+            query, request.get_json(silent=True), COLUNAS_GRID_PECAS, serializar, Peca.id,
+            opcoes=(contains_eager(Peca.grupo_item_obj), contains_eager(Peca.estoque_local_obj))
+        )
+        return RespostaJSON(resultado, 200)
+
+    except RequisicaoGridInvalida as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -68,6 +383,28 @@ def get_peca(current_user, peca_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@estoque_bp.route('/estoque/pecas/<int:peca_id>/saldos', methods=['GET'])
+@token_required
+def get_saldos_peca(current_user, peca_id):
+    """Saldo da peça em cada estoque (local)"""
+    try:
+        peca = Peca.query.get_or_404(peca_id)
+        saldos = (
+            SaldoEstoque.query
+            .options(contains_eager(SaldoEstoque.estoque_local))
+            .join(SaldoEstoque.estoque_local)
+            .filter(SaldoEstoque.peca_id == peca_id)
+            .order_by(EstoqueLocal.nome)
+            .all()
+        )
+        return jsonify({
+            'peca_id': peca.id,
+            'quantidade_total': peca.quantidade,
+            'saldos': [saldo.to_dict() for saldo in saldos]
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @estoque_bp.route('/estoque/pecas', methods=['POST'])
 @token_required
 def create_peca(current_user):
@@ -98,16 +435,24 @@ def create_peca(current_user):
             categoria=data['categoria'],
             descricao=data.get('descricao'),
             unidade=data['unidade'],
-            quantidade=data.get('quantidade', 0),
+            quantidade=0,
             min_estoque=quantidade_minima,
             max_estoque=quantidade_maxima,
             preco_unitario=valor_unitario,
+            estoque_local_id=data.get('estoque_local_id'),
             localizacao=data.get('localizacao'),
             fornecedor=data.get('fornecedor'),
             observacoes=data.get('observacoes')
         )
         
         db.session.add(peca)
+        db.session.flush()
+
+        # Quantidade inicial entra pelo livro de movimentações
+        quantidade_inicial = int(data.get('quantidade') or 0)
+        if quantidade_inicial > 0:
+            registrar_movimentacao(peca, 'entrada', quantidade_inicial, current_user.id, 'Saldo inicial')
+
         db.session.commit()
         
         return jsonify({
@@ -115,6 +460,9 @@ def create_peca(current_user):
             'peca': peca.to_dict()
         }), 201
         
+    except ErroMovimentacao as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -140,7 +488,10 @@ def update_peca(current_user, peca_id):
         if 'unidade' in data:
             peca.unidade = data['unidade']
         if 'quantidade' in data:
-            peca.quantidade = data['quantidade']
+            # Quantidade absoluta do saldo em um local (padrão: o estoque da peça): o saldo
+            # é bloqueado e a diferença lançada como entrada/saída, como em uma contagem
+            ajustar_por_contagem(peca, data.get('estoque_local_id') or estoque_padrao_id(peca),
+                                 data['quantidade'], current_user.id, motivo='Ajuste manual de quantidade')
         if 'quantidade_minima' in data or 'min_estoque' in data:
             peca.min_estoque = data.get('quantidade_minima', data.get('min_estoque'))
         if 'quantidade_maxima' in data or 'max_estoque' in data:
@@ -162,6 +513,9 @@ def update_peca(current_user, peca_id):
             'peca': peca.to_dict()
         }), 200
         
+    except ErroMovimentacao as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -181,30 +535,32 @@ def movimentar_estoque(current_user, peca_id):
         quantidade = data.get('quantidade', 0)
         motivo = data.get('motivo', '')
         
-        if not tipo_movimentacao or quantidade <= 0:
+        if not tipo_movimentacao or not quantidade or quantidade <= 0:
             return jsonify({'error': 'Tipo de movimentação e quantidade são obrigatórios'}), 400
-        
-        if tipo_movimentacao == 'entrada':
-            peca.quantidade += quantidade
-        elif tipo_movimentacao == 'saida':
-            if peca.quantidade < quantidade:
-                return jsonify({'error': 'Quantidade insuficiente em estoque'}), 400
-            peca.quantidade -= quantidade
-        else:
+        if tipo_movimentacao not in ('entrada', 'saida'):
             return jsonify({'error': 'Tipo de movimentação inválido'}), 400
         
-        peca.updated_at = datetime.utcnow()
+        try:
+            movimentacao = registrar_movimentacao(
+                peca, tipo_movimentacao, quantidade, current_user.id, motivo or 'Movimentação manual',
+                estoque_origem_id=data.get('estoque_local_id') if tipo_movimentacao == 'saida' else None,
+                estoque_destino_id=data.get('estoque_local_id') if tipo_movimentacao == 'entrada' else None
+            )
+        except ErroMovimentacao as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 400
         db.session.commit()
         
         return jsonify({
             'message': f'Movimentação de {tipo_movimentacao} realizada com sucesso',
             'peca': peca.to_dict(),
             'movimentacao': {
+                'id': movimentacao.id,
                 'tipo': tipo_movimentacao,
-                'quantidade': quantidade,
+                'quantidade': movimentacao.quantidade,
                 'motivo': motivo,
                 'usuario': current_user.nome_completo,
-                'data': datetime.utcnow().isoformat()
+                'data': movimentacao.data_movimentacao.isoformat()
             }
         }), 200
         
@@ -230,12 +586,19 @@ def get_categorias(current_user):
 @estoque_bp.route('/estoque/relatorio', methods=['GET'])
 @token_required
 def get_relatorio_estoque(current_user):
+    """
+    Relatório geral do estoque. Totais e categorias agregados no banco; as
+    peças com baixo estoque vêm todas, ou paginadas com `limit` (padrão 50)
+    ou `cursor`.
+    """
     try:
-        # Relatório geral do estoque
-        total_pecas = Peca.query.count()
-        pecas_baixo_estoque = Peca.query.filter(Peca.quantidade <= Peca.min_estoque).count()
-        valor_total_estoque = db.session.query(db.func.sum(Peca.quantidade * Peca.preco_unitario)).scalar() or 0
-        
+        try:
+            baixo_estoque = _detalhe_pecas(db.session.query(Peca).filter(Peca.quantidade <= Peca.min_estoque))
+        except CursorInvalido as e:
+            return jsonify({'error': str(e)}), 400
+
+        resumo = db.session.query(*_agregados_pecas()).one()
+
         # Peças por categoria
         categorias = db.session.query(
             Peca.categoria,
@@ -251,58 +614,134 @@ def get_relatorio_estoque(current_user):
             } for cat in categorias
         ]
         
-        # Peças com baixo estoque
-        pecas_baixo = Peca.query.filter(Peca.quantidade <= Peca.min_estoque).all()
-        
-        return jsonify({
+        resposta = {
             'resumo': {
-                'total_pecas': total_pecas,
-                'pecas_baixo_estoque': pecas_baixo_estoque,
-                'valor_total_estoque': valor_total_estoque
+                'total_pecas': resumo.total_pecas,
+                'pecas_baixo_estoque': resumo.pecas_baixo_estoque,
+                'valor_total_estoque': round(resumo.valor_total, 2)
             },
             'categorias': categorias_resumo,
-            'pecas_baixo_estoque': [peca.to_dict() for peca in pecas_baixo]
-        }), 200
+            'pecas_baixo_estoque': baixo_estoque.pop('pecas')
+        }
+        resposta.update(baixo_estoque)
+        return RespostaJSON(resposta, 200)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+def _consultar_movimentacoes():
+    """
+    Movimentações com os filtros da query string (peca_id, tipo_movimentacao,
+    usuario_id, data_inicio, data_fim) e os joins de CAMPOS_LISTA_MOVIMENTACOES.
+    ValueError se uma data for inválida.
+    """
+    peca_id = request.args.get('peca_id')
+    tipo_movimentacao = request.args.get('tipo_movimentacao')
+    usuario_id = request.args.get('usuario_id')
+    data_inicio = request.args.get('data_inicio')
+    data_fim = request.args.get('data_fim')
+
+    if data_inicio:
+        data_inicio = datetime.strptime(data_inicio, '%Y-%m-%d')
+    if data_fim:
+        # Inclui o dia inteiro
+        data_fim = datetime.strptime(data_fim, '%Y-%m-%d') + timedelta(days=1)
+
+    # Nomes relacionados na mesma consulta, apenas com as colunas da listagem
+    query = db.session.query(MovimentacaoEstoque)\
+        .join(Peca, MovimentacaoEstoque.peca_id == Peca.id)\
+        .outerjoin(GrupoItem, Peca.grupo_item_id == GrupoItem.id)\
+        .outerjoin(LocalPeca, Peca.estoque_local_id == LocalPeca.id)\
+        .outerjoin(Usuario, MovimentacaoEstoque.usuario_id == Usuario.id)\
+        .outerjoin(Equipamento, MovimentacaoEstoque.equipamento_id == Equipamento.id)\
+        .outerjoin(Mecanico, MovimentacaoEstoque.mecanico_id == Mecanico.id)\
+        .outerjoin(EstoqueOrigem, MovimentacaoEstoque.estoque_origem_id == EstoqueOrigem.id)\
+        .outerjoin(EstoqueDestino, MovimentacaoEstoque.estoque_destino_id == EstoqueDestino.id)
+
+    if peca_id:
+        query = query.filter(MovimentacaoEstoque.peca_id == peca_id)
+    if tipo_movimentacao:
+        query = query.filter(MovimentacaoEstoque.tipo_movimentacao == tipo_movimentacao)
+    if usuario_id:
+        query = query.filter(MovimentacaoEstoque.usuario_id == usuario_id)
+    if data_inicio:
+        query = query.filter(MovimentacaoEstoque.data_movimentacao >= data_inicio)
+    if data_fim:
+        query = query.filter(MovimentacaoEstoque.data_movimentacao < data_fim)
+    return query
+
+
 @estoque_bp.route('/estoque/movimentacoes', methods=['GET'])
 @token_required
 def get_movimentacoes_estoque(current_user):
-    """Listar movimentações de estoque"""
+    """
+    Listar movimentações de estoque (mais recentes primeiro). Com `limit`
+    ou `cursor` (o `next_cursor` da página anterior) a listagem é paginada
+    por cursor (data_movimentacao, id); sem eles vem o histórico completo.
+    """
     try:
-        # Filtros opcionais
-        peca_id = request.args.get('peca_id')
-        tipo_movimentacao = request.args.get('tipo_movimentacao')
-        usuario_id = request.args.get('usuario_id')
-        data_inicio = request.args.get('data_inicio')
-        data_fim = request.args.get('data_fim')
+        # Paginação por cursor (opcional): ativada quando limit ou cursor é informado
+        cursor = request.args.get('cursor')
+        paginado = cursor is not None or request.args.get('limit') is not None
+
+        try:
+            query = _consultar_movimentacoes()
+        except ValueError:
+            return jsonify({'error': 'Data inválida. Use o formato AAAA-MM-DD'}), 400
         
-        query = MovimentacaoEstoque.query
+        query = selecionar(query, CAMPOS_LISTA_MOVIMENTACOES)
+        next_cursor = None
+        if paginado:
+            try:
+                limite = ler_limite(request.args.get('limit'))
+                query = aplicar_keyset_desc(query, MovimentacaoEstoque.data_movimentacao, MovimentacaoEstoque.id,
+                                            cursor)
+            except CursorInvalido as e:
+                return jsonify({'error': str(e)}), 400
+            linhas, next_cursor = paginar_keyset(query, limite, lambda mov: (mov.data_movimentacao, mov.id))
+        else:
+            linhas = query.order_by(MovimentacaoEstoque.data_movimentacao.desc(), MovimentacaoEstoque.id.desc()).all()
         
-        if peca_id:
-            query = query.filter_by(peca_id=peca_id)
-        if tipo_movimentacao:
-            query = query.filter_by(tipo_movimentacao=tipo_movimentacao)
-        if usuario_id:
-            query = query.filter_by(usuario_id=usuario_id)
-        if data_inicio:
-            query = query.filter(MovimentacaoEstoque.data_movimentacao >= datetime.strptime(data_inicio, '%Y-%m-%d'))
-        if data_fim:
-            query = query.filter(MovimentacaoEstoque.data_movimentacao <= datetime.strptime(data_fim, '%Y-%m-%d'))
-        
-        movimentacoes = query.order_by(MovimentacaoEstoque.data_movimentacao.desc()).all()
+        movimentacoes = []
+        for linha in linhas:
+            mov = dict(linha._mapping)
+            peca = {chave[len('_peca_'):]: mov.pop(chave) for chave in list(mov) if chave.startswith('_peca_')}
+            mov['peca'] = _completar_peca_dict(peca)
+            movimentacoes.append(mov)
         
-        return jsonify({
-            'movimentacoes': [mov.to_dict() for mov in movimentacoes],
+        if paginado:
+            return RespostaJSON({
+                'movimentacoes': movimentacoes,
+                'total': len(movimentacoes),
+                'limit': limite,
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None
+            }, 200)
+
+        return RespostaJSON({
+            'movimentacoes': movimentacoes,
             'total': len(movimentacoes)
-        }), 200
+        }, 200)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@estoque_bp.route('/estoque/movimentacoes/exportar', methods=['GET'])
+@token_required
+def exportar_movimentacoes_estoque(current_user):
+    """Exportar movimentações (mesmos filtros da listagem) em CSV, NDJSON ou XLSX, em streaming"""
+    try:
+        formato = ler_formato(request.args.get('formato'))
+        query = _consultar_movimentacoes()
+    except FormatoInvalido as e:
+        return jsonify({'error': str(e)}), 400
+    except ValueError:
+        return jsonify({'error': 'Data inválida. Use o formato AAAA-MM-DD'}), 400
+
+    query = query.order_by(MovimentacaoEstoque.data_movimentacao.desc().nullslast(), MovimentacaoEstoque.id.desc())
+    return exportar(query, CAMPOS_EXPORTACAO_MOVIMENTACOES, formato, 'movimentacoes_estoque')
+
 @estoque_bp.route('/estoque/movimentacao', methods=['POST'])
 @token_required
 @almoxarife_or_above_required
@@ -321,40 +760,27 @@ def criar_movimentacao_estoque(current_user):
         if not peca:
             return jsonify({'error': 'Peça não encontrada'}), 404
         
-        quantidade = int(data['quantidade'])
-        tipo_movimentacao = data['tipo_movimentacao']
-        
-        # Validar quantidade para saídas
-        if tipo_movimentacao == 'saida' and peca.quantidade < quantidade:
-            return jsonify({'error': f'Estoque insuficiente. Disponível: {peca.quantidade}'}), 400
-        
-        # Criar movimentação
-        movimentacao = MovimentacaoEstoque(
-            peca_id=data['peca_id'],
-            usuario_id=current_user.id,
-            tipo_movimentacao=tipo_movimentacao,
-            quantidade=quantidade,
-            motivo=data['motivo'],
-            numero_nf=data.get('numero_nf'),
-            equipamento_id=data.get('equipamento_id'),
-            mecanico_id=data.get('mecanico_id'),
-            setor=data.get('setor'),
-            ordem_servico_id=data.get('ordem_servico_id'),
-            estoque_origem_id=data.get('estoque_origem_id'),
-            estoque_destino_id=data.get('estoque_destino_id'),
-            observacoes=data.get('observacoes')
-        )
-        
-        # Atualizar quantidade da peça
-        if tipo_movimentacao == 'entrada':
-            peca.quantidade += quantidade
-        elif tipo_movimentacao == 'saida':
-            peca.quantidade -= quantidade
-        elif tipo_movimentacao == 'transferencia':
-            # Para transferências, a quantidade não muda no total, apenas o local
-            pass
+        # Saldos ajustados no banco de forma atômica (ver src/utils/saldos_estoque.py)
+        try:
+            movimentacao = registrar_movimentacao(
+                peca,
+                data['tipo_movimentacao'],
+                data['quantidade'],
+                current_user.id,
+                data['motivo'],
+                estoque_origem_id=data.get('estoque_origem_id'),
+                estoque_destino_id=data.get('estoque_destino_id'),
+                numero_nf=data.get('numero_nf'),
+                equipamento_id=data.get('equipamento_id'),
+                mecanico_id=data.get('mecanico_id'),
+                setor=data.get('setor'),
+                ordem_servico_id=data.get('ordem_servico_id'),
+                observacoes=data.get('observacoes')
+            )
+        except ErroMovimentacao as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 400
         
-        db.session.add(movimentacao)
         db.session.commit()
         
         return jsonify({
@@ -366,6 +792,50 @@ def criar_movimentacao_estoque(current_user):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@estoque_bp.route('/estoque/movimentacoes/lote', methods=['POST'])
+@token_required
+@almoxarife_or_above_required
+def criar_movimentacoes_lote(current_user):
+    """
+    Registrar várias movimentações de uma vez (itens de uma nota fiscal,
+    lista de separação). Campos informados fora de `movimentacoes`
+    (tipo_movimentacao, motivo, numero_nf, estoques, ...) valem para todas
+    as linhas que não os trazem. Tudo ou nada: com qualquer linha inválida,
+    nada é gravado e a resposta lista os erros.
+    """
+    try:
+        data = request.get_json() or {}
+        itens = data.get('movimentacoes')
+        if not isinstance(itens, list):
+            return jsonify({'error': 'Campo movimentacoes (lista) é obrigatório'}), 400
+
+        comuns = {campo: data[campo] for campo in
+                  ['tipo_movimentacao', 'motivo', 'estoque_origem_id', 'estoque_destino_id'] + CAMPOS_LANCAMENTO
+                  if data.get(campo) is not None}
+        linhas = [{**comuns, **{campo: valor for campo, valor in item.items() if valor is not None}}
+                  if isinstance(item, dict) else {} for item in itens]
+
+        try:
+            ids = registrar_movimentacoes(linhas, current_user.id)
+        except MovimentacoesInvalidas as e:
+            db.session.rollback()
+            return jsonify({'error': str(e), 'erros': e.erros}), 400
+        except ErroMovimentacao as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 400
+
+        db.session.commit()
+
+        return jsonify({
+            'message': f'{len(ids)} movimentações registradas com sucesso',
+            'total': len(ids),
+            'ids': ids
+        }), 201
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @estoque_bp.route('/estoque/inventario', methods=['POST'])
 @token_required
 @almoxarife_or_above_required
@@ -388,113 +858,338 @@ def realizar_inventario(current_user):
             if quantidade_fisica is None:
                 return jsonify({'error': 'Quantidade física é obrigatória'}), 400
             
-            quantidade_sistema = peca.quantidade
-            diferenca = quantidade_fisica - quantidade_sistema
+            # Contagem de um estoque (local); padrão: o estoque da peça
+            try:
+                estoque_local_id = data.get('estoque_local_id') or estoque_padrao_id(peca)
+                quantidade_sistema, _ = ajustar_por_contagem(
+                    peca, estoque_local_id, quantidade_fisica, current_user.id, observacoes
+                )
+            except ErroMovimentacao as e:
+                db.session.rollback()
+                return jsonify({'error': str(e)}), 400
+            diferenca = int(quantidade_fisica) - quantidade_sistema
             
             # Atualizar dados do inventário
             peca.ultima_inventariacao_data = datetime.utcnow()
             peca.ultima_inventariacao_usuario = current_user.nome_completo
             
-            # Se há diferença, criar movimentação de ajuste
-            if diferenca != 0:
-                tipo_ajuste = 'entrada' if diferenca > 0 else 'saida'
-                motivo = f'Ajuste de inventário - Diferença: {diferenca}'
-                
-                movimentacao = MovimentacaoEstoque(
-                    peca_id=peca_id,
-                    usuario_id=current_user.id,
-                    tipo_movimentacao=tipo_ajuste,
-                    quantidade=abs(diferenca),
-                    motivo=motivo,
-                    observacoes=f'Inventário: Sistema={quantidade_sistema}, Físico={quantidade_fisica}. {observacoes}'
-                )
-                
-                # Ajustar quantidade no sistema
-                peca.quantidade = quantidade_fisica
-                
-                db.session.add(movimentacao)
-            
             db.session.commit()
             
             return jsonify({
                 'message': 'Inventário realizado com sucesso',
                 'peca': peca.to_dict(),
+                'estoque_local_id': estoque_local_id,
                 'diferenca': diferenca,
                 'ajuste_necessario': diferenca != 0
             }), 200
         
         else:
-            # Inventário geral - marcar data de inventário para todas as peças
-            pecas = Peca.query.all()
-            
-            for peca in pecas:
-                peca.ultima_inventariacao_data = datetime.utcnow()
-                peca.ultima_inventariacao_usuario = current_user.nome_completo
-            
+            # Inventário geral: abre uma sessão de inventário cíclico com as
+            # peças contadas há mais tempo, em vez de marcar o catálogo inteiro
+            try:
+                sessao = criar_sessao(
+                    current_user.id, data.get('estoque_local_id'), data.get('descricao') or 'Inventário geral',
+                    data.get('classe_abc'), data.get('grupo_id'), data.get('limite')
+                )
+            except ErroInventario as e:
+                db.session.rollback()
+                return jsonify({'error': str(e)}), 400
+
             db.session.commit()
             
             return jsonify({
-                'message': f'Inventário geral iniciado para {len(pecas)} peças',
-                'total_pecas': len(pecas)
+                'message': f'Inventário geral iniciado para {sessao.total_itens} peças',
+                'total_pecas': sessao.total_itens,
+                'sessao': sessao.to_dict()
             }), 200
         
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
-@estoque_bp.route('/estoque/relatorio-inventario', methods=['GET'])
+@estoque_bp.route('/estoque/inventarios', methods=['POST'])
 @token_required
 @almoxarife_or_above_required
-def gerar_relatorio_inventario(current_user):
-    """Gerar relatório de inventário"""
+def criar_sessao_inventario(current_user):
+    """
+    Abrir sessão de inventário cíclico em um estoque (local), com as peças
+    selecionadas por `classe_abc`, `grupo_id` e `limite` (padrão 200), das
+    contadas há mais tempo para as mais recentes
+    """
     try:
-        # Filtros opcionais
-        grupo_id = request.args.get('grupo_id')
+        data = request.get_json() or {}
+        try:
+            sessao = criar_sessao(
+                current_user.id, data.get('estoque_local_id'), data.get('descricao'),
+                data.get('classe_abc'), data.get('grupo_id'), data.get('limite')
+            )
+        except ErroInventario as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 400
+
+        db.session.commit()
+
+        return jsonify({
+            'message': f'Sessão de inventário aberta com {sessao.total_itens} peças',
+            'sessao': sessao.to_dict()
+        }), 201
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@estoque_bp.route('/estoque/inventarios', methods=['GET'])
+@token_required
+def get_sessoes_inventario(current_user):
+    """Listar sessões de inventário (mais recentes primeiro), paginadas por `limit` e `cursor`"""
+    try:
+        status = request.args.get('status')
         estoque_local_id = request.args.get('estoque_local_id')
-        apenas_baixo_estoque = request.args.get('apenas_baixo_estoque', 'false').lower() == 'true'
-        
-        query = Peca.query
-        
-        if grupo_id:
-            query = query.filter_by(grupo_item_id=grupo_id)
+
+        query = InventarioSessao.query.options(joinedload(InventarioSessao.estoque_local))
+        if status:
+            query = query.filter(InventarioSessao.status == status)
         if estoque_local_id:
-            query = query.filter_by(estoque_local_id=estoque_local_id)
-        if apenas_baixo_estoque:
-            query = query.filter(Peca.quantidade <= Peca.min_estoque)
-        
-        pecas = query.order_by(Peca.nome).all()
-        
-        # Estatísticas
-        total_pecas = len(pecas)
-        valor_total_estoque = sum((peca.quantidade * (peca.preco_unitario or 0)) for peca in pecas)
-        pecas_baixo_estoque = sum(1 for peca in pecas if peca.quantidade <= peca.min_estoque)
-        pecas_sem_inventario = sum(1 for peca in pecas if not peca.ultima_inventariacao_data)
-        
-        # Agrupar por estoque local
-        estoques = {}
-        for peca in pecas:
-            estoque_nome = peca.estoque_local_obj.nome if peca.estoque_local_obj else 'Sem localização'
-            if estoque_nome not in estoques:
-                estoques[estoque_nome] = []
-            estoques[estoque_nome].append(peca.to_dict())
-        
+            query = query.filter(InventarioSessao.estoque_local_id == estoque_local_id)
+
+        try:
+            limite = ler_limite(request.args.get('limit'))
+            query = aplicar_keyset_desc(query, InventarioSessao.created_at, InventarioSessao.id,
+                                        request.args.get('cursor'))
+        except CursorInvalido as e:
+            return jsonify({'error': str(e)}), 400
+        sessoes, next_cursor = paginar_keyset(query, limite, lambda sessao: (sessao.created_at, sessao.id))
+
+        return RespostaJSON({
+            'sessoes': [sessao.to_dict() for sessao in sessoes],
+            'total': len(sessoes),
+            'limit': limite,
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
+        }, 200)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@estoque_bp.route('/estoque/inventarios/<int:sessao_id>', methods=['GET'])
+@token_required
+def get_sessao_inventario(current_user, sessao_id):
+    """
+    Sessão de inventário com uma página das suas peças (`limit`, `cursor`);
+    `pendentes=true` lista só as ainda não contadas
+    """
+    try:
+        sessao = InventarioSessao.query.get_or_404(sessao_id)
+
+        query = db.session.query(InventarioContagem)\
+            .join(Peca, InventarioContagem.peca_id == Peca.id)\
+            .filter(InventarioContagem.sessao_id == sessao.id)
+        if request.args.get('pendentes', 'false').lower() == 'true':
+            query = query.filter(InventarioContagem.quantidade_contada.is_(None))
+
+        try:
+            limite = ler_limite(request.args.get('limit'))
+            query = aplicar_keyset_id(selecionar(query, CAMPOS_ITENS_INVENTARIO), InventarioContagem.id,
+                                      request.args.get('cursor'))
+        except CursorInvalido as e:
+            return jsonify({'error': str(e)}), 400
+        linhas, next_cursor = paginar_keyset(query, limite, lambda linha: (None, linha.id))
+
+        itens = []
+        for linha in linhas:
+            item = dict(linha._mapping)
+            contada, sistema = item['quantidade_contada'], item['quantidade_sistema']
+            item['diferenca'] = contada - sistema if contada is not None and sistema is not None else None
+            itens.append(item)
+
+        return RespostaJSON({
+            'sessao': sessao.to_dict(),
+            'itens': itens,
+            'total': len(itens),
+            'limit': limite,
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
+        }, 200)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@estoque_bp.route('/estoque/inventarios/<int:sessao_id>/contagens', methods=['POST'])
+@token_required
+@almoxarife_or_above_required
+def registrar_contagens_inventario(current_user, sessao_id):
+    """
+    Registrar um lote de contagens (`contagens`: lista de {peca_id,
+    quantidade}). Tudo ou nada: com qualquer linha inválida, nada é gravado.
+    """
+    try:
+        sessao = bloquear_sessao(sessao_id)
+        if not sessao:
+            return jsonify({'error': 'Sessão de inventário não encontrada'}), 404
+        data = request.get_json() or {}
+        itens = data.get('contagens')
+        if not isinstance(itens, list):
+            return jsonify({'error': 'Campo contagens (lista) é obrigatório'}), 400
+
+        try:
+            registradas = registrar_contagens(
+                sessao, [item if isinstance(item, dict) else {} for item in itens], current_user.id
+            )
+        except ContagensInvalidas as e:
+            db.session.rollback()
+            return jsonify({'error': str(e), 'erros': e.erros}), 400
+        except ErroInventario as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 400
+
+        db.session.commit()
+
         return jsonify({
-            'relatorio': {
-                'data_geracao': datetime.utcnow().isoformat(),
-                'responsavel': current_user.nome_completo,
-                'estatisticas': {
-                    'total_pecas': total_pecas,
-                    'valor_total_estoque': valor_total_estoque,
-                    'pecas_baixo_estoque': pecas_baixo_estoque,
-                    'pecas_sem_inventario': pecas_sem_inventario
-                },
-                'estoques': estoques
-            }
+            'message': f'{registradas} contagens registradas',
+            'registradas': registradas,
+            'itens_contados': sessao.itens_contados,
+            'total_itens': sessao.total_itens
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@estoque_bp.route('/estoque/inventarios/<int:sessao_id>/fechar', methods=['POST'])
+@token_required
+@almoxarife_or_above_required
+def fechar_sessao_inventario(current_user, sessao_id):
+    """Fechar a sessão, lançando as diferenças das peças contadas como movimentações de ajuste"""
+    try:
+        sessao = bloquear_sessao(sessao_id)
+        if not sessao:
+            return jsonify({'error': 'Sessão de inventário não encontrada'}), 404
+        try:
+            ajustes = fechar_sessao(sessao, current_user)
+        except ContagensInvalidas as e:
+            db.session.rollback()
+            return jsonify({'error': str(e), 'erros': e.erros}), 400
+        except ErroInventario as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 400
+
+        db.session.commit()
+
+        return jsonify({
+            'message': f'Sessão de inventário fechada com {ajustes} ajustes',
+            'sessao': sessao.to_dict()
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@estoque_bp.route('/estoque/inventarios/<int:sessao_id>/cancelar', methods=['POST'])
+@token_required
+@almoxarife_or_above_required
+def cancelar_sessao_inventario(current_user, sessao_id):
+    """Cancelar a sessão sem ajustar saldos"""
+    try:
+        sessao = bloquear_sessao(sessao_id)
+        if not sessao:
+            return jsonify({'error': 'Sessão de inventário não encontrada'}), 404
+        try:
+            cancelar_sessao(sessao, current_user)
+        except ErroInventario as e:
+            return jsonify({'error': str(e)}), 400
+
+        db.session.commit()
+
+        return jsonify({
+            'message': 'Sessão de inventário cancelada',
+            'sessao': sessao.to_dict()
         }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+def _consultar_pecas_inventario():
+    """Peças com os filtros do relatório de inventário (grupo_id, estoque_local_id, apenas_baixo_estoque)"""
+    grupo_id = request.args.get('grupo_id')
+    estoque_local_id = request.args.get('estoque_local_id')
+    apenas_baixo_estoque = request.args.get('apenas_baixo_estoque', 'false').lower() == 'true'
+
+    query = db.session.query(Peca)
+    if grupo_id:
+        query = query.filter(Peca.grupo_item_id == grupo_id)
+    if estoque_local_id:
+        # Peças com saldo no local (não só as que o têm como local padrão)
+        query = query.filter(Peca.id.in_(
+            db.session.query(SaldoEstoque.peca_id).filter(SaldoEstoque.estoque_local_id == estoque_local_id)
+        ))
+    if apenas_baixo_estoque:
+        query = query.filter(Peca.quantidade <= Peca.min_estoque)
+    return query
+
+
+@estoque_bp.route('/estoque/relatorio-inventario', methods=['GET'])
+@token_required
+@almoxarife_or_above_required
+def gerar_relatorio_inventario(current_user):
+    """
+    Gerar relatório de inventário: estatísticas por estoque local e por grupo
+    de itens calculadas com GROUP BY. A lista de peças só é incluída com
+    `detalhe=true`: completa, ou paginada com `limit` (padrão 50) ou `cursor`.
+    """
+    try:
+        detalhe = request.args.get('detalhe', 'false').lower() == 'true'
+        query = _consultar_pecas_inventario()
+
+        pecas = None
+        if detalhe:
+            try:
+                pecas = _detalhe_pecas(query)
+            except CursorInvalido as e:
+                return jsonify({'error': str(e)}), 400
+
+        # Por estoque: saldos de cada local (uma peça pode estar em vários)
+        estoques = _agrupar_saldos_por_local(query, request.args.get('estoque_local_id'))
+        grupos = _agrupar_pecas(query, Peca.grupo_item_id, GrupoItem, 'grupo_item', 'Sem grupo')
+
+        # Totais gerais a partir dos grupos de itens (cada peça está em um único grupo)
+        estatisticas = {
+            campo: sum(grupo[campo] for grupo in grupos)
+            for campo in ('total_pecas', 'valor_total_estoque', 'pecas_baixo_estoque', 'pecas_sem_inventario')
+        }
+        estatisticas['valor_total_estoque'] = round(estatisticas['valor_total_estoque'], 2)
+
+        relatorio = {
+            'data_geracao': datetime.utcnow().isoformat(),
+            'responsavel': current_user.nome_completo,
+            'estatisticas': estatisticas,
+            'estoques': estoques,
+            'grupos': grupos
+        }
+        if pecas is not None:
+            relatorio['pecas'] = pecas
+        return RespostaJSON({'relatorio': relatorio}, 200)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+
+@estoque_bp.route('/estoque/relatorio-inventario/exportar', methods=['GET'])
+@token_required
+@almoxarife_or_above_required
+def exportar_relatorio_inventario(current_user):
+    """Exportar as peças do relatório de inventário (mesmos filtros) em CSV, NDJSON ou XLSX, em streaming"""
+    try:
+        formato = ler_formato(request.args.get('formato'))
+    except FormatoInvalido as e:
+        return jsonify({'error': str(e)}), 400
+
+    query = _consultar_pecas_inventario()\
+        .outerjoin(GrupoItem, Peca.grupo_item_id == GrupoItem.id)\
+        .outerjoin(EstoqueLocal, Peca.estoque_local_id == EstoqueLocal.id)\
+        .order_by(Peca.nome, Peca.id)
+    return exportar(query, CAMPOS_EXPORTACAO_INVENTARIO, formato, 'relatorio_inventario')
+
 @estoque_bp.route('/estoque/locais', methods=['GET'])
 @token_required
 def get_estoques_locais(current_user):
@@ -1,25 +1,40 @@
 from flask import Blueprint, request, jsonify
 from src.db import db
-from src.models.peca import Peca
 from src.models.grupo_item import GrupoItem
-from src.models.estoque_local import EstoqueLocal
+from src.models.importacao_job import ImportacaoJob
 from src.utils.auth import token_required, almoxarife_or_above_required
+from src.utils.importacao import TAMANHO_LOTE_IMPORTACAO, importar_lotes
+from src.utils.importacao_entidades import ENTIDADES_IMPORTACAO
+from src.utils.planilhas import ErroImportacao, extensao_arquivo, ler_planilha_em_lotes
+from src.utils.importacao_jobs import criar_job, enfileirar_job
 import pandas as pd
 import io
-from datetime import datetime
 
 importacao_bp = Blueprint('importacao', __name__)
 
-@importacao_bp.route('/importacao/pecas', methods=['POST'])
+def _entidade_permitida(entidade, current_user):
+    """(especificação da entidade, resposta de erro) para importar `entidade`"""
+    especificacao = ENTIDADES_IMPORTACAO.get(entidade)
+    if especificacao is None:
+        return None, (jsonify({'error': f'Entidade de importação inválida: {entidade}'}), 404)
+    if not especificacao.permite(current_user):
+        return None, (jsonify({'error': 'Acesso negado para importar este cadastro.'}), 403)
+    return especificacao, None
+
+@importacao_bp.route('/importacao/<entidade>', methods=['POST'])
 @token_required
-@almoxarife_or_above_required
-def importar_pecas(current_user):
+def importar_entidade(current_user, entidade):
     """
-    Importar peças de um arquivo CSV/Excel
-    Colunas esperadas: id, numero_item, descricao_item, grupo_itens, unidade_de_medida_de_estoque, 
-    ultimo_preco_avaliacao, ultimo_preco_compra, estoque_baixo, unidade_medida_estoque, data_registro
+    Importar um cadastro (pecas, itens, equipamentos, pneus, mecanicos) de um arquivo CSV/Excel
+    Colunas de cada cadastro: GET /api/importacao/entidades. Peças: numero_item, descricao_item,
+    grupo_itens, unidade_de_medida_de_estoque (ou unidade_medida_estoque), ultimo_preco_avaliacao,
+    ultimo_preco_compra, estoque_baixo, data_registro
     """
     try:
+        especificacao, erro = _entidade_permitida(entidade, current_user)
+        if erro:
+            return erro
+
         # Verificar se arquivo foi enviado
         if 'arquivo' not in request.files:
             return jsonify({'error': 'Nenhum arquivo enviado'}), 400
@@ -28,137 +43,12 @@ def importar_pecas(current_user):
         if arquivo.filename == '':
             return jsonify({'error': 'Nenhum arquivo selecionado'}), 400
         
-        # Verificar extensão do arquivo
-        extensao = arquivo.filename.rsplit('.', 1)[1].lower() if '.' in arquivo.filename else ''
-        if extensao not in ['csv', 'xlsx', 'xls']:
-            return jsonify({'error': 'Formato de arquivo não suportado. Use CSV, XLS ou XLSX'}), 400
-        
-        # Ler arquivo
         try:
-            if extensao == 'csv':
-                df = pd.read_csv(io.StringIO(arquivo.read().decode('utf-8')), sep=',', engine='python', on_bad_lines='skip')
-            else:
-                df = pd.read_excel(arquivo)
-        except Exception as e:
-            return jsonify({'error': f'Erro ao ler arquivo: {str(e)}'}), 400
-        
-        # Validar colunas obrigatórias
-        colunas_obrigatorias = ['numero_item', 'descricao_item', 'grupo_itens']
-        colunas_faltantes = [col for col in colunas_obrigatorias if col not in df.columns]
-        if colunas_faltantes:
-            return jsonify({'error': f'Colunas obrigatórias faltantes: {", ".join(colunas_faltantes)}'}), 400
-
-        if not any(col in df.columns for col in ['unidade_de_medida_de_estoque', 'unidade_medida_estoque']):
-            return jsonify({'error': 'Coluna de unidade de medida não encontrada'}), 400
-        
-        # Estatísticas de importação
-        total_linhas = len(df)
-        adicionados = 0
-        atualizados = 0
-        ignorados = 0
-        erros = []
-        
-        # Obter estoque padrão
-        estoque_padrao = EstoqueLocal.query.filter_by(codigo='ALM_CENTRAL').first()
-        if not estoque_padrao:
-            estoque_padrao = EstoqueLocal.query.first()
-        
-        # Processar cada linha
-        for index, row in df.iterrows():
-            try:
-                numero_item = str(row['numero_item']).strip()
-                descricao_item = str(row['descricao_item']).strip()
-                grupo_nome = str(row['grupo_itens']).strip()
-                unidade = str(row.get('unidade_de_medida_de_estoque') or row.get('unidade_medida_estoque')).strip()
-                
-                # Validar dados obrigatórios
-                if not numero_item or not descricao_item or not grupo_nome or not unidade:
-                    erros.append(f'Linha {index + 2}: Dados obrigatórios faltantes')
-                    ignorados += 1
-                    continue
-                
-                # Buscar ou criar grupo de item
-                grupo_item = GrupoItem.query.filter_by(nome=grupo_nome).first()
-                if not grupo_item:
-                    # Criar grupo automaticamente
-                    grupo_item = GrupoItem(
-                        nome=grupo_nome,
-                        codigo=grupo_nome[:10].upper().replace(' ', '_'),
-                        descricao=f'Grupo criado automaticamente durante importação'
-                    )
-                    db.session.add(grupo_item)
-                    db.session.flush()  # Para obter o ID
-                
-                # Verificar se peça já existe
-                peca_existente = Peca.query.filter_by(codigo=numero_item).first()
-                
-                if peca_existente:
-                    # Atualizar peça existente
-                    peca_existente.nome = descricao_item
-                    peca_existente.grupo_item_id = grupo_item.id
-                    peca_existente.unidade = unidade
-                    
-                    # Atualizar campos opcionais se fornecidos
-                    if 'ultimo_preco_avaliacao' in row and pd.notna(row['ultimo_preco_avaliacao']):
-                        peca_existente.ultimo_preco_avaliacao = float(row['ultimo_preco_avaliacao'])
-                    
-                    if 'ultimo_preco_compra' in row and pd.notna(row['ultimo_preco_compra']):
-                        peca_existente.ultimo_preco_compra = float(row['ultimo_preco_compra'])
-                        peca_existente.preco_unitario = float(row['ultimo_preco_compra'])
-                    
-                    if 'estoque_baixo' in row and pd.notna(row['estoque_baixo']):
-                        peca_existente.min_estoque = int(row['estoque_baixo'])
-                    
-                    if 'data_registro' in row and pd.notna(row['data_registro']):
-                        peca_existente.data_registro = pd.to_datetime(row['data_registro'])
-
-                    peca_existente.updated_at = datetime.utcnow()
-                    atualizados += 1
-                    
-                else:
-                    # Criar nova peça
-                    nova_peca = Peca(
-                        codigo=numero_item,
-                        nome=descricao_item,
-                        grupo_item_id=grupo_item.id,
-                        unidade=unidade,
-                        quantidade=0,
-                        min_estoque=int(row.get('estoque_baixo', 10)) if pd.notna(row.get('estoque_baixo')) else 10,
-                        max_estoque=100,
-                        estoque_local_id=estoque_padrao.id if estoque_padrao else None
-                    )
-                    
-                    # Definir preços se fornecidos
-                    if 'ultimo_preco_avaliacao' in row and pd.notna(row['ultimo_preco_avaliacao']):
-                        nova_peca.ultimo_preco_avaliacao = float(row['ultimo_preco_avaliacao'])
-                    
-                    if 'ultimo_preco_compra' in row and pd.notna(row['ultimo_preco_compra']):
-                        nova_peca.ultimo_preco_compra = float(row['ultimo_preco_compra'])
-                        nova_peca.preco_unitario = float(row['ultimo_preco_compra'])
-                    
-                    if 'data_registro' in row and pd.notna(row['data_registro']):
-                        nova_peca.data_registro = pd.to_datetime(row['data_registro'])
-
-                    db.session.add(nova_peca)
-                    adicionados += 1
-                
-            except Exception as e:
-                erros.append(f'Linha {index + 2}: {str(e)}')
-                ignorados += 1
-                continue
-        
-        # Commit das alterações
-        db.session.commit()
-        
-        # Preparar relatório
-        relatorio = {
-            'total_linhas': total_linhas,
-            'adicionados': adicionados,
-            'atualizados': atualizados,
-            'ignorados': ignorados,
-            'erros': erros[:10]  # Limitar a 10 erros para não sobrecarregar a resposta
-        }
-        
+            lotes = ler_planilha_em_lotes(arquivo, extensao_arquivo(arquivo.filename), TAMANHO_LOTE_IMPORTACAO)
+            relatorio = importar_lotes(especificacao, lotes)
+        except ErroImportacao as e:
+            return jsonify({'error': str(e)}), 400
+
         return jsonify({
             'message': 'Importação concluída',
             'relatorio': relatorio
@@ -168,6 +58,87 @@ def importar_pecas(current_user):
         db.session.rollback()
         return jsonify({'error': f'Erro durante importação: {str(e)}'}), 500
 
+@importacao_bp.route('/importacao/entidades', methods=['GET'])
+@token_required
+def listar_entidades_importacao(current_user):
+    """
+    Listar os cadastros importáveis pelo usuário, com as colunas da planilha
+    """
+    return jsonify({
+        'entidades': [
+            {'entidade': nome, 'chave': especificacao.chave, 'colunas': especificacao.colunas_planilha()}
+            for nome, especificacao in ENTIDADES_IMPORTACAO.items()
+            if especificacao.permite(current_user)
+        ]
+    }), 200
+
+@importacao_bp.route('/importacao/jobs', methods=['POST'])
+@token_required
+def criar_job_importacao(current_user):
+    """
+    Agendar a importação de uma planilha em segundo plano.
+    Campos do formulário: arquivo e entidade (padrão: pecas). O progresso é
+    consultado em /api/importacao/jobs/<id>.
+    """
+    try:
+        entidade = request.form.get('entidade', 'pecas')
+        _, erro = _entidade_permitida(entidade, current_user)
+        if erro:
+            return erro
+
+        if 'arquivo' not in request.files:
+            return jsonify({'error': 'Nenhum arquivo enviado'}), 400
+
+        arquivo = request.files['arquivo']
+        if arquivo.filename == '':
+            return jsonify({'error': 'Nenhum arquivo selecionado'}), 400
+
+        try:
+            job = criar_job(arquivo, entidade, current_user.id)
+        except ErroImportacao as e:
+            return jsonify({'error': str(e)}), 400
+
+        enfileirar_job(job.id)
+        return jsonify({
+            'message': 'Importação agendada',
+            'job': job.to_dict()
+        }), 202
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Erro ao agendar importação: {str(e)}'}), 500
+
+@importacao_bp.route('/importacao/jobs', methods=['GET'])
+@token_required
+@almoxarife_or_above_required
+def listar_jobs_importacao(current_user):
+    """
+    Listar as importações mais recentes
+    """
+    try:
+        limite = min(request.args.get('limite', 20, type=int), 100)
+        jobs = ImportacaoJob.query.order_by(ImportacaoJob.id.desc()).limit(limite).all()
+        return jsonify({'jobs': [job.to_dict() for job in jobs]}), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@importacao_bp.route('/importacao/jobs/<int:job_id>', methods=['GET'])
+@token_required
+@almoxarife_or_above_required
+def get_job_importacao(current_user, job_id):
+    """
+    Consultar status e progresso de uma importação
+    """
+    try:
+        job = db.session.get(ImportacaoJob, job_id)
+        if not job:
+            return jsonify({'error': 'Importação não encontrada'}), 404
+        return jsonify(job.to_dict()), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @importacao_bp.route('/importacao/template-pecas', methods=['GET'])
 @token_required
 @almoxarife_or_above_required
@@ -2,10 +2,28 @@ from flask import Blueprint, request, jsonify
 from src.db import db
 from src.models.mecanico import Mecanico
 from src.utils.auth import token_required, supervisor_or_admin_required
+from src.utils.ag_grid import RequisicaoGridInvalida, consultar_grid
+from src.utils.serializacao import RespostaJSON, campos_do_modelo, projetar
 from datetime import datetime
 
 mecanicos_bp = Blueprint('mecanicos', __name__)
 
+# Colunas disponíveis para filtro/ordenação/agrupamento no grid de mecânicos
+COLUNAS_GRID_MECANICOS = {
+    'id': Mecanico.id,
+    'nome_completo': Mecanico.nome_completo,
+    'cpf': Mecanico.cpf,
+    'telefone': Mecanico.telefone,
+    'email': Mecanico.email,
+    'especialidade': Mecanico.especialidade,
+    'nivel_experiencia': Mecanico.nivel_experiencia,
+    'salario': Mecanico.salario,
+    'data_admissao': Mecanico.data_admissao,
+    'status': Mecanico.status,
+    'created_at': Mecanico.created_at,
+    'updated_at': Mecanico.updated_at,
+}
+
 @mecanicos_bp.route('/mecanicos', methods=['GET'])
 @token_required
 def get_mecanicos(current_user):
@@ -31,16 +49,32 @@ def get_mecanicos(current_user):
                 Mecanico.email.contains(search)
             )
         
-        mecanicos = query.all()
+        mecanicos = projetar(query, campos_do_modelo(Mecanico))
         
-        return jsonify({
-            'mecanicos': [mecanico.to_dict() for mecanico in mecanicos],
+        return RespostaJSON({
+            'mecanicos': mecanicos,
             'total': len(mecanicos)
-        }), 200
+        }, 200)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@mecanicos_bp.route('/mecanicos/grid', methods=['POST'])
+@token_required
+def get_mecanicos_grid(current_user):
+    """Bloco de mecânicos para o Server-Side Row Model do AG-Grid"""
+    try:
+        resultado = consultar_grid(
+            Mecanico.query, request.get_json(silent=True), COLUNAS_GRID_MECANICOS,
+            lambda mecanico: mecanico.to_dict(), Mecanico.id
+        )
+        return RespostaJSON(resultado, 200)
+
+    except RequisicaoGridInvalida as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @mecanicos_bp.route('/mecanicos/<int:mecanico_id>', methods=['GET'])
 @token_required
 def get_mecanico(current_user, mecanico_id):
@@ -6,8 +6,12 @@ from src.models.mecanico import Mecanico
 from src.models.tipo_manutencao import TipoManutencao
 from src.models.peca import Peca
 from src.models.os_peca import OS_Peca
-from src.models.movimentacao_estoque import MovimentacaoEstoque
+from src.utils.alertas import alertas_da_entidade
 from src.utils.auth import token_required, supervisor_or_admin_required, pcm_or_above_required, mecanico_or_above_required
+from src.utils.paginacao import CursorInvalido, ler_limite, aplicar_keyset_desc, paginar_keyset
+from src.utils.numeracao_os import proximo_numero_os
+from src.utils.saldos_estoque import ErroMovimentacao, EstoqueInsuficiente, registrar_movimentacao
+from src.utils.serializacao import RespostaJSON, campos_do_modelo, selecionar
 from datetime import datetime
 import logging
 
@@ -16,6 +20,19 @@ logging.basicConfig(level=logging.INFO)
 
 ordens_servico_bp = Blueprint('ordens_servico', __name__)
 
+# Colunas da listagem: campos de OrdemServico.to_dict() mais os dados
+# resumidos de equipamento, mecânico e tipo de manutenção (prefixo _)
+CAMPOS_LISTA_OS = {
+    **campos_do_modelo(OrdemServico),
+    'tipo_manutencao': TipoManutencao.nome,
+    '_tipo_manutencao_id': TipoManutencao.id,
+    '_equipamento_id': Equipamento.id,
+    '_equipamento_nome': Equipamento.nome,
+    '_equipamento_codigo': Equipamento.codigo_interno,
+    '_mecanico_id': Mecanico.id,
+    '_mecanico_nome': Mecanico.nome_completo,
+}
+
 @ordens_servico_bp.route('/ordens-servico', methods=['GET'])
 @token_required
 def get_ordens_servico(current_user):
@@ -27,8 +44,13 @@ def get_ordens_servico(current_user):
         equipamento_id = request.args.get('equipamento_id')
         mecanico_id = request.args.get('mecanico_id')
         search = request.args.get('search')
+
+        # Paginação por cursor (opcional): ativada quando limit ou cursor é informado
+        cursor = request.args.get('cursor')
+        paginado = cursor is not None or request.args.get('limit') is not None
         
-        # Query com joins para incluir relacionamentos
+        # Query com joins trazendo equipamento, mecânico e tipo de manutenção
+        # na mesma ida ao banco, apenas com as colunas da listagem
         query = db.session.query(OrdemServico)\
             .outerjoin(Equipamento, OrdemServico.equipamento_id == Equipamento.id)\
             .outerjoin(Mecanico, OrdemServico.mecanico_id == Mecanico.id)\
@@ -51,51 +73,70 @@ def get_ordens_servico(current_user):
             )
         
         # Ordenar por data de abertura (mais recentes primeiro)
-        ordens = query.order_by(OrdemServico.data_abertura.desc()).all()
+        query = selecionar(query, CAMPOS_LISTA_OS)
+        next_cursor = None
+        if paginado:
+            try:
+                limite = ler_limite(request.args.get('limit'))
+                query = aplicar_keyset_desc(query, OrdemServico.data_abertura, OrdemServico.id, cursor)
+            except CursorInvalido as e:
+                return jsonify({'error': str(e)}), 400
+            linhas, next_cursor = paginar_keyset(query, limite, lambda os: (os.data_abertura, os.id))
+        else:
+            linhas = query.order_by(OrdemServico.data_abertura.desc()).all()
         
         # Incluir informações do equipamento, mecânico e tipo de manutenção
         result = []
-        for os in ordens:
-            os_dict = os.to_dict()
+        for linha in linhas:
+            os_dict = dict(linha._mapping)
+            equipamento_id = os_dict.pop('_equipamento_id')
+            equipamento_nome = os_dict.pop('_equipamento_nome')
+            equipamento_codigo = os_dict.pop('_equipamento_codigo')
+            mecanico_id = os_dict.pop('_mecanico_id')
+            mecanico_nome = os_dict.pop('_mecanico_nome')
+            tipo_manutencao_id = os_dict.pop('_tipo_manutencao_id')
             
             # Adicionar informações do equipamento
-            if os.equipamento_id:
-                equipamento = Equipamento.query.get(os.equipamento_id)
-                if equipamento:
-                    os_dict['equipamento_nome'] = equipamento.nome
-                    os_dict['equipamento_codigo'] = equipamento.codigo_interno
-                    os_dict['equipamento'] = {
-                        'id': equipamento.id,
-                        'nome': equipamento.nome,
-                        'codigo_interno': equipamento.codigo_interno
-                    }
+            if equipamento_id is not None:
+                os_dict['equipamento_nome'] = equipamento_nome
+                os_dict['equipamento_codigo'] = equipamento_codigo
+                os_dict['equipamento'] = {
+                    'id': equipamento_id,
+                    'nome': equipamento_nome,
+                    'codigo_interno': equipamento_codigo
+                }
             
             # Adicionar informações do mecânico
-            if os.mecanico_id:
-                mecanico = Mecanico.query.get(os.mecanico_id)
-                if mecanico:
-                    os_dict['mecanico_nome'] = mecanico.nome_completo
-                    os_dict['mecanico'] = {
-                        'id': mecanico.id,
-                        'nome_completo': mecanico.nome_completo
-                    }
+            if mecanico_id is not None:
+                os_dict['mecanico_nome'] = mecanico_nome
+                os_dict['mecanico'] = {
+                    'id': mecanico_id,
+                    'nome_completo': mecanico_nome
+                }
             
             # Adicionar informações do tipo de manutenção
-            if os.tipo_manutencao_id:
-                tipo_manutencao = TipoManutencao.query.get(os.tipo_manutencao_id)
-                if tipo_manutencao:
-                    os_dict['tipo_manutencao_nome'] = tipo_manutencao.nome
-                    os_dict['tipo_manutencao'] = {
-                        'id': tipo_manutencao.id,
-                        'nome': tipo_manutencao.nome
-                    }
+            if tipo_manutencao_id is not None:
+                os_dict['tipo_manutencao_nome'] = os_dict['tipo_manutencao']
+                os_dict['tipo_manutencao'] = {
+                    'id': tipo_manutencao_id,
+                    'nome': os_dict['tipo_manutencao_nome']
+                }
             
             result.append(os_dict)
         
-        return jsonify({
+        if paginado:
+            return RespostaJSON({
+                'ordens_servico': result,
+                'total': len(result),
+                'limit': limite,
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None
+            }, 200)
+
+        return RespostaJSON({
             'ordens_servico': result,
             'total': len(result)
-        }), 200
+        }, 200)
         
     except Exception as e:
         logger.exception("Erro ao carregar ordens de serviço")
@@ -135,12 +176,7 @@ def create_ordem_servico(current_user):
             return jsonify({'error': 'Equipamento não encontrado'}), 404
         
         # Gerar número da OS
-        ultimo_numero = db.session.query(OrdemServico.numero_os).order_by(OrdemServico.id.desc()).first()
-        if ultimo_numero:
-            ultimo_num = int(ultimo_numero[0].split('-')[-1])
-            novo_numero = f"OS-{datetime.now().year}-{ultimo_num + 1:03d}"
-        else:
-            novo_numero = f"OS-{datetime.now().year}-001"
+        novo_numero = proximo_numero_os()
         
         os = OrdemServico(
             numero_os=novo_numero,
@@ -240,10 +276,6 @@ def concluir_ordem_servico(current_user, os_id):
             if not peca:
                 return jsonify({'error': f'Peça com ID {peca_id} não encontrada'}), 404
             
-            # Verificar se há estoque suficiente
-            if peca.quantidade < quantidade:
-                return jsonify({'error': f'Estoque insuficiente para a peça {peca.nome}. Disponível: {peca.quantidade}'}), 400
-            
             # Registrar utilização da peça
             os_peca = OS_Peca(
                 ordem_servico_id=ordem_servico.id,
@@ -254,22 +286,23 @@ def concluir_ordem_servico(current_user, os_id):
                 observacoes=peca_data.get('observacoes')
             )
             db.session.add(os_peca)
-            
-            # Dar baixa no estoque
-            peca.quantidade -= quantidade
             custo_total_pecas += os_peca.custo_total or 0
             
-            # Registrar movimentação de estoque
-            movimentacao = MovimentacaoEstoque(
-                peca_id=peca_id,
-                usuario_id=current_user.id,
-                tipo_movimentacao='saida',
-                quantidade=quantidade,
-                motivo=f'Utilizada na OS {ordem_servico.numero_os}',
-                ordem_servico_id=ordem_servico.id,
-                observacoes=f'Baixa automática por conclusão de OS'
-            )
-            db.session.add(movimentacao)
+            # Dar baixa no estoque (saldo verificado e debitado no mesmo UPDATE)
+            try:
+                registrar_movimentacao(
+                    peca, 'saida', quantidade, current_user.id,
+                    f'Utilizada na OS {ordem_servico.numero_os}',
+                    ordem_servico_id=ordem_servico.id,
+                    observacoes='Baixa automática por conclusão de OS'
+                )
+            except EstoqueInsuficiente as e:
+                mensagem = f'Estoque insuficiente para a peça {peca.nome}. Disponível: {e.disponivel}'
+                db.session.rollback()
+                return jsonify({'error': mensagem}), 400
+            except ErroMovimentacao as e:
+                db.session.rollback()
+                return jsonify({'error': str(e)}), 400
         
         # Atualizar custos
         ordem_servico.custo_pecas = custo_total_pecas
@@ -370,37 +403,9 @@ def get_pecas_utilizadas_os(current_user, os_id):
 def get_alertas_os(current_user, os_id):
     """Obter alertas relacionados a uma ordem de serviço"""
     try:
-        ordem_servico = OrdemServico.query.get_or_404(os_id)
-        alertas = []
-        
-        # Verificar se OS está atrasada
-        if ordem_servico.data_prevista and ordem_servico.status not in ['concluida', 'cancelada']:
-            if datetime.utcnow().date() > ordem_servico.data_prevista:
-                dias_atraso = (datetime.utcnow().date() - ordem_servico.data_prevista).days
-                alertas.append({
-                    'tipo': 'atraso',
-                    'severidade': 'alta' if dias_atraso > 7 else 'media',
-                    'mensagem': f'OS atrasada há {dias_atraso} dias',
-                    'data_alerta': datetime.utcnow().isoformat()
-                })
-        
-        # Verificar se há peças em falta
-        if ordem_servico.status == 'aguardando_pecas':
-            alertas.append({
-                'tipo': 'pecas_falta',
-                'severidade': 'media',
-                'mensagem': 'OS aguardando peças para execução',
-                'data_alerta': datetime.utcnow().isoformat()
-            })
-        
-        # Verificar prioridade crítica
-        if ordem_servico.prioridade == 'critica' and ordem_servico.status == 'aberta':
-            alertas.append({
-                'tipo': 'prioridade_critica',
-                'severidade': 'critica',
-                'mensagem': 'OS com prioridade crítica não iniciada',
-                'data_alerta': datetime.utcnow().isoformat()
-            })
+        OrdemServico.query.get_or_404(os_id)
+        alertas = alertas_da_entidade('ordem_servico', entidade_id=os_id,
+                                      tipos=['atraso', 'pecas_falta', 'prioridade_critica'])
         
         return jsonify({
             'alertas': alertas,
@@ -426,44 +431,9 @@ def get_alertas_mecanico(current_user):
                 'message': 'Usuário não é um mecânico cadastrado'
             }), 200
         
-        # Buscar OS atribuídas ao mecânico
-        ordens_pendentes = OrdemServico.query.filter(
-            OrdemServico.mecanico_id == mecanico.id,
-            OrdemServico.status.in_(['aberta', 'em_execucao', 'aguardando_pecas'])
-        ).all()
-        
-        alertas = []
-        
-        for os in ordens_pendentes:
-            # OS não iniciadas há mais de 1 dia
-            if os.status == 'aberta':
-                dias_desde_abertura = (datetime.utcnow() - os.data_abertura).days
-                if dias_desde_abertura >= 1:
-                    alertas.append({
-                        'tipo': 'os_nao_iniciada',
-                        'os_id': os.id,
-                        'numero_os': os.numero_os,
-                        'equipamento': os.equipamento.nome,
-                        'prioridade': os.prioridade,
-                        'severidade': 'alta' if os.prioridade == 'critica' else 'media',
-                        'mensagem': f'OS {os.numero_os} não iniciada há {dias_desde_abertura} dias',
-                        'data_alerta': datetime.utcnow().isoformat()
-                    })
-            
-            # OS em execução há muito tempo
-            if os.status == 'em_execucao' and os.data_inicio:
-                dias_em_execucao = (datetime.utcnow() - os.data_inicio).days
-                if dias_em_execucao >= 3:
-                    alertas.append({
-                        'tipo': 'os_execucao_longa',
-                        'os_id': os.id,
-                        'numero_os': os.numero_os,
-                        'equipamento': os.equipamento.nome,
-                        'prioridade': os.prioridade,
-                        'severidade': 'media',
-                        'mensagem': f'OS {os.numero_os} em execução há {dias_em_execucao} dias',
-                        'data_alerta': datetime.utcnow().isoformat()
-                    })
+        # OS do mecânico não iniciadas há 1 dia ou em execução há 3 dias
+        alertas = alertas_da_entidade('ordem_servico', mecanico_id=mecanico.id,
+                                      tipos=['os_nao_iniciada', 'os_execucao_longa'])
         
         return jsonify({
             'alertas': alertas,
@@ -5,6 +5,7 @@ from src.models.equipamento import Equipamento
 from src.models.tipo_manutencao import TipoManutencao
 from src.models.ordem_servico import OrdemServico
 from src.utils.auth import token_required, supervisor_or_admin_required
+from src.utils.numeracao_os import proximo_numero_os, reservar_numeros_os
 from datetime import datetime, timedelta
 
 planos_preventiva_bp = Blueprint('planos_preventiva', __name__)
@@ -201,16 +202,8 @@ def executar_plano_preventiva(current_user, plano_id):
         
         # Criar ordem de serviço se solicitado
         if data.get('criar_os', True):
-            # Gerar número da OS
-            ultimo_numero = db.session.query(OrdemServico.numero_os).order_by(OrdemServico.id.desc()).first()
-            if ultimo_numero:
-                numero = int(ultimo_numero[0].split('-')[-1]) + 1
-            else:
-                numero = 1
-            numero_os = f"OS-{datetime.now().year}-{numero:03d}"
-            
             os = OrdemServico(
-                numero_os=numero_os,
+                numero_os=proximo_numero_os(),
                 equipamento_id=plano.equipamento_id,
                 tipo_manutencao_id=plano.tipo_manutencao_id,
                 tipo='preventiva',
@@ -241,40 +234,37 @@ def executar_plano_preventiva(current_user, plano_id):
 def gerar_os_pendentes(current_user):
     try:
         planos = PlanoPreventiva.query.filter_by(ativo=True).all()
-        os_criadas = 0
-        
+
+        # Equipamentos que já possuem OS preventiva aberta
+        equipamentos_com_os = {
+            equipamento_id for (equipamento_id,) in db.session.query(OrdemServico.equipamento_id).filter(
+                OrdemServico.tipo == 'preventiva',
+                OrdemServico.status.in_(['aberta', 'em_execucao'])
+            ).distinct()
+        }
+
+        pendentes = []
         for plano in planos:
-            if plano.deve_gerar_os():
-                # Verificar se já existe OS aberta para este plano
-                os_existente = OrdemServico.query.filter(
-                    OrdemServico.equipamento_id == plano.equipamento_id,
-                    OrdemServico.tipo == 'preventiva',
-                    OrdemServico.status.in_(['aberta', 'em_execucao'])
-                ).first()
-                
-                if not os_existente:
-                    # Gerar número da OS
-                    ultimo_numero = db.session.query(OrdemServico.numero_os).order_by(OrdemServico.id.desc()).first()
-                    if ultimo_numero:
-                        numero = int(ultimo_numero[0].split('-')[-1]) + 1
-                    else:
-                        numero = 1
-                    numero_os = f"OS-{datetime.now().year}-{numero:03d}"
-                    
-                    os = OrdemServico(
-                        numero_os=numero_os,
-                        equipamento_id=plano.equipamento_id,
-                        tipo_manutencao_id=plano.tipo_manutencao_id,
-                        tipo='preventiva',
-                        origem='preventiva_automatica',
-                        prioridade=plano.prioridade,
-                        status='aberta',
-                        descricao_problema=f"Manutenção preventiva programada: {plano.nome}",
-                        data_prevista=plano.proxima_execucao_data
-                    )
-                    
-                    db.session.add(os)
-                    os_criadas += 1
+            if plano.deve_gerar_os() and plano.equipamento_id not in equipamentos_com_os:
+                pendentes.append(plano)
+                equipamentos_com_os.add(plano.equipamento_id)
+
+        # Reserva todos os números de uma vez
+        numeros_os = reservar_numeros_os(len(pendentes))
+        for plano, numero_os in zip(pendentes, numeros_os):
+            os = OrdemServico(
+                numero_os=numero_os,
+                equipamento_id=plano.equipamento_id,
+                tipo_manutencao_id=plano.tipo_manutencao_id,
+                tipo='preventiva',
+                origem='preventiva_automatica',
+                prioridade=plano.prioridade,
+                status='aberta',
+                descricao_problema=f"Manutenção preventiva programada: {plano.nome}",
+                data_prevista=plano.proxima_execucao_data
+            )
+            db.session.add(os)
+        os_criadas = len(pendentes)
         
         db.session.commit()
         
@@ -3,7 +3,21 @@ from src.db import db
 from src.models.pneu import Pneu
 from src.models.equipamento import Equipamento
 from src.models.item import Item
+from src.models.leitura_pneu import LeituraPneu
+from src.models.previsao_desgaste_pneu import PrevisaoDesgastePneu
+from src.utils.analise_pneus import (
+    FILTROS_PERFORMANCE, KM_RODADOS, PERCENTUAL_USO, filtrar_pneus, relatorio_performance_em_cache
+)
 from src.utils.auth import token_required, supervisor_or_admin_required
+from src.utils.alertas import alertas_da_entidade
+from src.utils.ag_grid import RequisicaoGridInvalida, consultar_grid
+from src.utils.exportacao import FormatoInvalido, exportar, ler_formato
+from src.utils.leituras_pneus import ErroLeitura, LeiturasInvalidas, registrar_leitura, registrar_leituras
+from src.utils.paginacao import CursorInvalido, aplicar_keyset_desc, aplicar_keyset_id, ler_limite, paginar_keyset
+from src.utils.previsao_pneus import SULCO_LIMITE_LEGAL_MM, atualizar_previsoes
+from src.utils.serializacao import RespostaJSON, campos_do_modelo, contar_se, selecionar
+from sqlalchemy import case, func
+from sqlalchemy.orm import contains_eager, joinedload
 from datetime import datetime
 import logging
 
@@ -12,18 +26,152 @@ logging.basicConfig(level=logging.INFO)
 
 pneus_bp = Blueprint('pneus', __name__)
 
+
+# Colunas do arquivo exportado do relatório de performance (na ordem das colunas)
+CAMPOS_EXPORTACAO_PNEUS = {
+    'numero_serie': Pneu.numero_serie,
+    'numero_fogo': Pneu.numero_fogo,
+    'marca': Pneu.marca,
+    'modelo': Pneu.modelo,
+    'medida': Pneu.medida,
+    'tipo': Pneu.tipo,
+    'status': Pneu.status,
+    'equipamento': Equipamento.nome,
+    'posicao': Pneu.posicao,
+    'fornecedor': Pneu.fornecedor,
+    'data_compra': Pneu.data_compra,
+    'valor_compra': Pneu.valor_compra,
+    'data_instalacao': Pneu.data_instalacao,
+    'km_instalacao': Pneu.km_instalacao,
+    'km_atual': Pneu.km_atual,
+    'km_rodados': KM_RODADOS,
+    'vida_util_estimada': Pneu.vida_util_estimada,
+    'medida_sulco_mm': Pneu.medida_sulco_mm,
+    'sulco_inicial_mm': Pneu.sulco_inicial_mm,
+    'data_descarte': Pneu.data_descarte,
+    'motivo_descarte': Pneu.motivo_descarte,
+}
+
+# Colunas disponíveis para filtro/ordenação/agrupamento no grid de pneus
+COLUNAS_GRID_PNEUS = {
+    'id': Pneu.id,
+    'numero_serie': Pneu.numero_serie,
+    'numero_fogo': Pneu.numero_fogo,
+    'marca': Pneu.marca,
+    'modelo': Pneu.modelo,
+    'medida': Pneu.medida,
+    'medida_sulco_mm': Pneu.medida_sulco_mm,
+    'sulco_inicial_mm': Pneu.sulco_inicial_mm,
+    'tipo': Pneu.tipo,
+    'status': Pneu.status,
+    'posicao': Pneu.posicao,
+    'equipamento_id': Pneu.equipamento_id,
+    'equipamento_nome': Equipamento.nome,
+    'equipamento_codigo': Equipamento.codigo_interno,
+    'item_id': Pneu.item_id,
+    'data_compra': Pneu.data_compra,
+    'valor_compra': Pneu.valor_compra,
+    'data_instalacao': Pneu.data_instalacao,
+    'km_instalacao': Pneu.km_instalacao,
+    'km_atual': Pneu.km_atual,
+    'vida_util_estimada': Pneu.vida_util_estimada,
+    'fornecedor': Pneu.fornecedor,
+    'fornecedor_recapagem': Pneu.fornecedor_recapagem,
+    'created_at': Pneu.created_at,
+    'updated_at': Pneu.updated_at,
+}
+
+# Colunas da listagem de pneus: campos de Pneu.to_dict() mais item e equipamento resumidos
+CAMPOS_LISTA_PNEUS = {
+    **campos_do_modelo(Pneu),
+    '_item_id': Item.id,
+    '_item_numero_item': Item.numero_item,
+    '_item_descricao_item': Item.descricao_item,
+    '_item_grupo_itens': Item.grupo_itens,
+    '_item_unidade_medida': Item.unidade_medida,
+    '_equipamento_id': Equipamento.id,
+    '_equipamento_nome': Equipamento.nome,
+    '_equipamento_codigo': Equipamento.codigo_interno,
+}
+
+
+# Colunas que podem ser pedidas em `campos` na listagem (resposta plana, sem item/equipamento aninhados)
+CAMPOS_PROJECAO_PNEUS = {
+    **campos_do_modelo(Pneu),
+    'equipamento_nome': Equipamento.nome,
+    'equipamento_codigo': Equipamento.codigo_interno,
+    'item_numero_item': Item.numero_item,
+    'item_descricao_item': Item.descricao_item,
+    'km_rodados': KM_RODADOS,
+}
+
+def _pneu_dict_projetado(linha):
+    """Equivalente a Pneu.to_dict() (mais o equipamento) a partir de uma linha de CAMPOS_LISTA_PNEUS"""
+    pneu = dict(linha._mapping)
+    item = {chave[len('_item_'):]: pneu.pop(chave) for chave in list(pneu) if chave.startswith('_item_')}
+    equipamento_id = pneu.pop('_equipamento_id')
+    equipamento_nome = pneu.pop('_equipamento_nome')
+    equipamento_codigo = pneu.pop('_equipamento_codigo')
+
+    km_rodados = 0
+    if pneu['km_atual'] and pneu['km_instalacao']:
+        km_rodados = pneu['km_atual'] - pneu['km_instalacao']
+    percentual_uso = 0
+    if pneu['vida_util_estimada'] and km_rodados > 0:
+        percentual_uso = (km_rodados / pneu['vida_util_estimada']) * 100
+    pneu['km_rodados'] = km_rodados
+    pneu['percentual_uso'] = round(percentual_uso, 2)
+    pneu['item'] = item if item['id'] is not None else None
+
+    if equipamento_id is not None:
+        pneu['equipamento_nome'] = equipamento_nome
+        pneu['equipamento_codigo'] = equipamento_codigo
+        pneu['equipamento'] = {
+            'id': equipamento_id,
+            'nome': equipamento_nome,
+            'codigo_interno': equipamento_codigo
+        }
+    return pneu
+
+
 @pneus_bp.route('/pneus', methods=['GET'])
 @token_required
 def get_pneus(current_user):
+    """
+    Listar pneus. Paginação por cursor opcional (`limit` e/ou `cursor`, em
+    ordem de id); `campos` (lista separada por vírgulas) devolve apenas
+    essas colunas, sem item e equipamento aninhados.
+    """
     try:
         # Filtros opcionais
         status = request.args.get('status')
         marca = request.args.get('marca')
         equipamento_id = request.args.get('equipamento_id')
         search = request.args.get('search')
+
+        cursor = request.args.get('cursor')
+        paginado = cursor is not None or request.args.get('limit') is not None
+
+        campos = request.args.get('campos')
+        if campos:
+            nomes = [nome.strip() for nome in campos.split(',') if nome.strip()]
+            invalidos = [nome for nome in nomes if nome not in CAMPOS_PROJECAO_PNEUS]
+            if invalidos:
+                return jsonify({
+                    'error': f"Campos inválidos: {', '.join(invalidos)}",
+                    'campos_disponiveis': list(CAMPOS_PROJECAO_PNEUS)
+                }), 400
+            # id sempre presente (chave do cursor)
+            campos_selecionados = {'id': Pneu.id, **{nome: CAMPOS_PROJECAO_PNEUS[nome] for nome in nomes}}
+            serializar = lambda linha: dict(linha._mapping)
+        else:
+            campos_selecionados = CAMPOS_LISTA_PNEUS
+            serializar = _pneu_dict_projetado
         
-        # Query com join para incluir equipamento
-        query = db.session.query(Pneu).outerjoin(Equipamento)
+        # Query com joins para incluir equipamento e item
+        query = db.session.query(Pneu)\
+            .outerjoin(Equipamento, Pneu.equipamento_id == Equipamento.id)\
+            .outerjoin(Item, Pneu.item_id == Item.id)
         
         if status:
             query = query.filter(Pneu.status == status)
@@ -34,49 +182,80 @@ def get_pneus(current_user):
         if search:
             query = query.filter(
                 (Pneu.numero_fogo.contains(search)) |
+                (Pneu.numero_serie.contains(search)) |
                 (Pneu.marca.contains(search)) |
-                (Pneu.modelo.contains(search)) |
-                (Pneu.dot.contains(search))
+                (Pneu.modelo.contains(search))
             )
         
-        pneus = query.all()
-        
-        # Incluir informações do equipamento
-        result = []
-        for pneu in pneus:
-            pneu_dict = pneu.to_dict()
-            if pneu.equipamento_id:
-                equipamento = Equipamento.query.get(pneu.equipamento_id)
-                if equipamento:
-                    pneu_dict['equipamento_nome'] = equipamento.nome
-                    pneu_dict['equipamento_codigo'] = equipamento.codigo_interno
-                    pneu_dict['equipamento'] = {
-                        'id': equipamento.id,
-                        'nome': equipamento.nome,
-                        'codigo_interno': equipamento.codigo_interno
-                    }
-            result.append(pneu_dict)
-        
-        return jsonify({
+        query = selecionar(query, campos_selecionados)
+        next_cursor = None
+        if paginado:
+            try:
+                limite = ler_limite(request.args.get('limit'))
+                query = aplicar_keyset_id(query, Pneu.id, cursor)
+            except CursorInvalido as e:
+                return jsonify({'error': str(e)}), 400
+            linhas, next_cursor = paginar_keyset(query, limite, lambda linha: (None, linha.id))
+        else:
+            linhas = query.order_by(Pneu.id).all()
+
+        result = [serializar(linha) for linha in linhas]
+
+        resposta = {
             'pneus': result,
             'total': len(result)
-        }), 200
+        }
+        if paginado:
+            resposta.update(limit=limite, next_cursor=next_cursor, has_more=next_cursor is not None)
+        return RespostaJSON(resposta, 200)
         
     except Exception as e:
         logger.exception("Erro ao carregar pneus")
         return jsonify({'error': str(e)}), 500
 
+@pneus_bp.route('/pneus/grid', methods=['POST'])
+@token_required
+def get_pneus_grid(current_user):
+    """Bloco de pneus para o Server-Side Row Model do AG-Grid"""
+    try:
+        query = db.session.query(Pneu)\
+            .outerjoin(Equipamento, Pneu.equipamento_id == Equipamento.id)\
+            .outerjoin(Item, Pneu.item_id == Item.id)
+
+        def serializar(pneu):
+            pneu_dict = pneu.to_dict()
+            equipamento = pneu.equipamento
+            if equipamento:
+                pneu_dict['equipamento_nome'] = equipamento.nome
+                pneu_dict['equipamento_codigo'] = equipamento.codigo_interno
+                pneu_dict['equipamento'] = {
+                    'id': equipamento.id,
+                    'nome': equipamento.nome,
+                    'codigo_interno': equipamento.codigo_interno
+                }
+            return pneu_dict
+
+        resultado = consultar_grid(
+            query, request.get_json(silent=True), COLUNAS_GRID_PNEUS, serializar, Pneu.id,
+            opcoes=(contains_eager(Pneu.equipamento), contains_eager(Pneu.item))
+        )
+        return RespostaJSON(resultado, 200)
+
+    except RequisicaoGridInvalida as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.exception("Erro ao carregar grid de pneus")
+        return jsonify({'error': str(e)}), 500
+
 @pneus_bp.route('/pneus/<int:pneu_id>', methods=['GET'])
 @token_required
 def get_pneu(current_user, pneu_id):
     try:
-        pneu = Pneu.query.get_or_404(pneu_id)
+        pneu = Pneu.query.options(joinedload(Pneu.item), joinedload(Pneu.equipamento)).get_or_404(pneu_id)
         pneu_dict = pneu.to_dict()
         
-        if pneu.equipamento_id:
-            equipamento = Equipamento.query.get(pneu.equipamento_id)
-            if equipamento:
-                pneu_dict['equipamento'] = equipamento.to_dict()
+        if pneu.equipamento:
+            pneu_dict['equipamento'] = pneu.equipamento.to_dict()
                 
         return jsonify(pneu_dict), 200
     except Exception as e:
@@ -106,7 +285,7 @@ def update_pneu(current_user, pneu_id):
         for field in ['marca', 'modelo', 'medida', 'tipo', 'status', 'equipamento_id',
                       'posicao', 'valor_compra', 'km_instalacao', 'km_atual',
                       'pressao_recomendada', 'vida_util_estimada', 'fornecedor',
-                      'observacoes']:
+                      'medida_sulco_mm', 'sulco_inicial_mm', 'observacoes']:
             if field in data:
                 setattr(pneu, field, data[field])
 
@@ -168,6 +347,9 @@ def create_pneu(current_user):
             km_atual=data.get('km_atual'),
             pressao_recomendada=data.get('pressao_recomendada'),
             vida_util_estimada=data.get('vida_util_estimada'),
+            # Sem medição informada, o pneu começa com o sulco inicial
+            medida_sulco_mm=data.get('medida_sulco_mm', data.get('sulco_inicial_mm')),
+            sulco_inicial_mm=data.get('sulco_inicial_mm'),
             fornecedor=data.get('fornecedor'),
             observacoes=data.get('observacoes')
         )
@@ -224,6 +406,8 @@ def instalar_pneu(current_user, pneu_id):
         pneu.km_instalacao = km_instalacao or equipamento.horimetro_atual
         pneu.km_atual = pneu.km_instalacao
         pneu.updated_at = datetime.utcnow()
+        # Nova vida: as leituras da instalação anterior saem da previsão
+        atualizar_previsoes([pneu.id])
         
         db.session.commit()
         
@@ -258,6 +442,8 @@ def remover_pneu(current_user, pneu_id):
             pneu.km_atual = km_remocao
         
         pneu.updated_at = datetime.utcnow()
+        # Fora de uso: a previsão de desgaste é descartada
+        atualizar_previsoes([pneu.id])
         db.session.commit()
         
         return jsonify({
@@ -288,6 +474,7 @@ def atualizar_km_pneu(current_user, pneu_id):
         
         pneu.km_atual = km_atual
         pneu.updated_at = datetime.utcnow()
+        registrar_leitura(pneu, current_user.id)
         db.session.commit()
         
         return jsonify({
@@ -299,15 +486,106 @@ def atualizar_km_pneu(current_user, pneu_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@pneus_bp.route('/pneus/leituras/lote', methods=['POST'])
+@token_required
+def registrar_leituras_lote(current_user):
+    """
+    Registrar leituras de km e/ou sulco de vários pneus (inspeção de pátio).
+    Cada item de `leituras` identifica o pneu por pneu_id, numero_serie ou
+    numero_fogo; data_leitura e observacoes informados fora da lista valem
+    para as linhas que não os trazem. Tudo ou nada: com qualquer linha
+    inválida, nada é gravado e a resposta lista os erros.
+    """
+    try:
+        data = request.get_json() or {}
+        itens = data.get('leituras')
+        if not isinstance(itens, list):
+            return jsonify({'error': 'Campo leituras (lista) é obrigatório'}), 400
+
+        comuns = {campo: data[campo] for campo in ['data_leitura', 'observacoes'] if data.get(campo) is not None}
+        linhas = [{**comuns, **{campo: valor for campo, valor in item.items() if valor is not None}}
+                  if isinstance(item, dict) else {} for item in itens]
+
+        try:
+            resultado = registrar_leituras(linhas, current_user.id)
+        except LeiturasInvalidas as e:
+            db.session.rollback()
+            return jsonify({'error': str(e), 'erros': e.erros}), 400
+        except ErroLeitura as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 400
+
+        db.session.commit()
+
+        return jsonify({
+            'message': f'{len(linhas)} leituras registradas com sucesso',
+            'total': len(linhas),
+            **resultado
+        }), 201
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@pneus_bp.route('/pneus/<int:pneu_id>/leituras', methods=['GET'])
+@token_required
+def get_leituras_pneu(current_user, pneu_id):
+    """
+    Histórico de leituras de km e sulco do pneu (mais recentes primeiro),
+    paginado por cursor (data_leitura, id): `limit` e `cursor`.
+    """
+    try:
+        if not db.session.get(Pneu, pneu_id):
+            return jsonify({'error': 'Pneu não encontrado'}), 404
+        try:
+            limite = ler_limite(request.args.get('limit'))
+            query = aplicar_keyset_desc(
+                selecionar(LeituraPneu.query.filter(LeituraPneu.pneu_id == pneu_id), campos_do_modelo(LeituraPneu)),
+                LeituraPneu.data_leitura, LeituraPneu.id, request.args.get('cursor')
+            )
+        except CursorInvalido as e:
+            return jsonify({'error': str(e)}), 400
+        linhas, next_cursor = paginar_keyset(query, limite, lambda leitura: (leitura.data_leitura, leitura.id))
+
+        leituras = [dict(linha._mapping) for linha in linhas]
+        return RespostaJSON({
+            'leituras': leituras,
+            'total': len(leituras),
+            'limit': limite,
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
+        }, 200)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@pneus_bp.route('/pneus/<int:pneu_id>/previsao', methods=['GET'])
+@token_required
+def get_previsao_pneu(current_user, pneu_id):
+    """Previsão de desgaste do pneu (taxa em mm/1000km, km e data do sulco limite legal)"""
+    try:
+        if not db.session.get(Pneu, pneu_id):
+            return jsonify({'error': 'Pneu não encontrado'}), 404
+        previsao = db.session.get(PrevisaoDesgastePneu, pneu_id)
+        if not previsao:
+            return jsonify({'error': 'Pneu sem previsão (precisa estar em uso e ter leituras suficientes de km e sulco)'}), 404
+        return jsonify({**previsao.to_dict(), 'sulco_limite_mm': SULCO_LIMITE_LEGAL_MM}), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @pneus_bp.route('/pneus/relatorio', methods=['GET'])
 @token_required
 def get_relatorio_pneus(current_user):
     try:
-        # Estatísticas gerais
-        total_pneus = Pneu.query.count()
-        pneus_em_uso = Pneu.query.filter_by(status='em_uso').count()
-        pneus_estoque = Pneu.query.filter_by(status='estoque').count()
-        pneus_descarte = Pneu.query.filter_by(status='descarte').count()
+        # Estatísticas gerais em uma única consulta
+        resumo = db.session.query(
+            func.count(Pneu.id).label('total_pneus'),
+            contar_se(Pneu.status == 'em_uso').label('pneus_em_uso'),
+            contar_se(Pneu.status == 'estoque').label('pneus_estoque'),
+            contar_se(Pneu.status == 'descarte').label('pneus_descarte'),
+            func.sum(case((Pneu.status == 'estoque', Pneu.valor_compra), else_=0)).label('valor_total_estoque'),
+        ).one()
         
         # Pneus por marca
         marcas = db.session.query(
@@ -320,39 +598,25 @@ def get_relatorio_pneus(current_user):
             for marca in marcas
         ]
         
-        # Pneus próximos ao fim da vida útil (>80%)
-        pneus_criticos = []
-        pneus_em_uso_list = Pneu.query.filter_by(status='em_uso').all()
-        
-        for pneu in pneus_em_uso_list:
-            if pneu.vida_util_estimada and pneu.km_atual and pneu.km_instalacao:
-                km_rodados = pneu.km_atual - pneu.km_instalacao
-                percentual = (km_rodados / pneu.vida_util_estimada) * 100
-                if percentual > 80:
-                    pneu_dict = pneu.to_dict()
-                    if pneu.equipamento_id:
-                        equipamento = Equipamento.query.get(pneu.equipamento_id)
-                        if equipamento:
-                            pneu_dict['equipamento'] = {
-                                'nome': equipamento.nome,
-                                'codigo_interno': equipamento.codigo_interno
-                            }
-                    pneus_criticos.append(pneu_dict)
-        
-        # Valor total do estoque de pneus
-        valor_total = db.session.query(db.func.sum(Pneu.valor_compra)).filter_by(status='estoque').scalar() or 0
+        # Pneus próximos ao fim da vida útil (>80%), com item e equipamento na mesma consulta
+        criticos = db.session.query(Pneu)\
+            .outerjoin(Equipamento, Pneu.equipamento_id == Equipamento.id)\
+            .outerjoin(Item, Pneu.item_id == Item.id)\
+            .filter(Pneu.status == 'em_uso', PERCENTUAL_USO > 80)\
+            .order_by(Pneu.id)
+        pneus_criticos = [_pneu_dict_projetado(linha) for linha in selecionar(criticos, CAMPOS_LISTA_PNEUS)]
         
-        return jsonify({
+        return RespostaJSON({
             'resumo': {
-                'total_pneus': total_pneus,
-                'pneus_em_uso': pneus_em_uso,
-                'pneus_estoque': pneus_estoque,
-                'pneus_descarte': pneus_descarte,
-                'valor_total_estoque': valor_total
+                'total_pneus': resumo.total_pneus,
+                'pneus_em_uso': resumo.pneus_em_uso or 0,
+                'pneus_estoque': resumo.pneus_estoque or 0,
+                'pneus_descarte': resumo.pneus_descarte or 0,
+                'valor_total_estoque': resumo.valor_total_estoque or 0
             },
             'marcas': marcas_resumo,
             'pneus_criticos': pneus_criticos
-        }), 200
+        }, 200)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -361,12 +625,17 @@ def get_relatorio_pneus(current_user):
 @token_required
 def get_pneus_equipamento(current_user, equipamento_id):
     try:
-        pneus = Pneu.query.filter_by(equipamento_id=equipamento_id, status='em_uso').all()
-        
-        return jsonify({
-            'pneus': [pneu.to_dict() for pneu in pneus],
+        query = db.session.query(Pneu)\
+            .outerjoin(Equipamento, Pneu.equipamento_id == Equipamento.id)\
+            .outerjoin(Item, Pneu.item_id == Item.id)\
+            .filter(Pneu.equipamento_id == equipamento_id, Pneu.status == 'em_uso')\
+            .order_by(Pneu.posicao, Pneu.id)
+        pneus = [_pneu_dict_projetado(linha) for linha in selecionar(query, CAMPOS_LISTA_PNEUS)]
+        
+        return RespostaJSON({
+            'pneus': pneus,
             'total': len(pneus)
-        }), 200
+        }, 200)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -421,6 +690,8 @@ def aplicar_tratativa_pneu(current_user, pneu_id):
             pneu.observacoes = f"{observacao_atual}\n{nova_observacao}" if observacao_atual else nova_observacao
         
         pneu.updated_at = datetime.utcnow()
+        # Fora de uso: a previsão de desgaste é descartada
+        atualizar_previsoes([pneu.id])
         db.session.commit()
         
         return jsonify({
@@ -450,9 +721,13 @@ def retorno_recapagem(current_user, pneu_id):
         pneu.km_instalacao = None  # Resetar KM de instalação
         pneu.km_atual = None
         
-        # Atualizar medida de sulco se fornecida
+        # Atualizar medida de sulco se fornecida; a banda nova é a base do km por mm
         if data.get('medida_sulco_mm'):
             pneu.medida_sulco_mm = float(data['medida_sulco_mm'])
+            pneu.sulco_inicial_mm = pneu.medida_sulco_mm
+        else:
+            pneu.sulco_inicial_mm = None
+        atualizar_previsoes([pneu.id])
         
         # Registrar observação
         if data.get('observacoes'):
@@ -496,6 +771,7 @@ def atualizar_medida_sulco(current_user, pneu_id):
         pneu.observacoes = f"{observacao_atual}\n{nova_observacao}" if observacao_atual else nova_observacao
         
         pneu.updated_at = datetime.utcnow()
+        registrar_leitura(pneu, current_user.id, data.get('observacoes'))
         db.session.commit()
         
         return jsonify({
@@ -507,140 +783,42 @@ def atualizar_medida_sulco(current_user, pneu_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def _filtros_relatorio_performance():
+    """Filtros do relatório de performance informados na query string"""
+    return {nome: request.args[nome] for nome in FILTROS_PERFORMANCE if request.args.get(nome)}
+
+
 @pneus_bp.route('/pneus/relatorio-performance', methods=['GET'])
 @token_required
 def get_relatorio_performance_pneus(current_user):
-    """Gerar relatório de performance de pneus"""
+    """Gerar relatório de performance de pneus (custo por km e km por mm por marca, fornecedor, recapadora e posição)"""
     try:
-        # Filtros opcionais
-        marca = request.args.get('marca')
-        fornecedor = request.args.get('fornecedor')
-        equipamento_id = request.args.get('equipamento_id')
-        
-        query = Pneu.query
-        
-        if marca:
-            query = query.filter_by(marca=marca)
-        if fornecedor:
-            query = query.filter_by(fornecedor=fornecedor)
-        if equipamento_id:
-            query = query.filter_by(equipamento_id=equipamento_id)
-        
-        pneus = query.all()
-        
-        # Estatísticas gerais
-        total_pneus = len(pneus)
-        pneus_em_uso = len([p for p in pneus if p.status == 'em_uso'])
-        pneus_estoque = len([p for p in pneus if p.status == 'estoque'])
-        pneus_descarte = len([p for p in pneus if p.status == 'descarte'])
-        pneus_recapagem = len([p for p in pneus if p.status == 'recapagem'])
-        
-        # Performance por marca
-        marcas_performance = {}
-        for pneu in pneus:
-            if pneu.marca not in marcas_performance:
-                marcas_performance[pneu.marca] = {
-                    'total': 0,
-                    'km_total': 0,
-                    'valor_total': 0,
-                    'descartados': 0,
-                    'recapados': 0
-                }
-            
-            marcas_performance[pneu.marca]['total'] += 1
-            marcas_performance[pneu.marca]['valor_total'] += pneu.valor_compra or 0
-            
-            if pneu.km_atual and pneu.km_instalacao:
-                marcas_performance[pneu.marca]['km_total'] += (pneu.km_atual - pneu.km_instalacao)
-            
-            if pneu.status == 'descarte':
-                marcas_performance[pneu.marca]['descartados'] += 1
-            elif pneu.tipo == 'recapado':
-                marcas_performance[pneu.marca]['recapados'] += 1
-        
-        # Calcular médias
-        for marca in marcas_performance:
-            data = marcas_performance[marca]
-            if data['total'] > 0:
-                data['km_medio'] = data['km_total'] / data['total']
-                data['valor_medio'] = data['valor_total'] / data['total']
-                data['taxa_descarte'] = (data['descartados'] / data['total']) * 100
-                data['taxa_recapagem'] = (data['recapados'] / data['total']) * 100
-        
-        # Top 5 pneus com mais KM
-        pneus_mais_km = sorted(
-            [p for p in pneus if p.km_atual and p.km_instalacao],
-            key=lambda x: x.km_atual - x.km_instalacao,
-            reverse=True
-        )[:5]
-        
-        return jsonify({
-            'relatorio': {
-                'data_geracao': datetime.utcnow().isoformat(),
-                'estatisticas_gerais': {
-                    'total_pneus': total_pneus,
-                    'pneus_em_uso': pneus_em_uso,
-                    'pneus_estoque': pneus_estoque,
-                    'pneus_descarte': pneus_descarte,
-                    'pneus_recapagem': pneus_recapagem
-                },
-                'performance_por_marca': marcas_performance,
-                'top_pneus_km': [
-                    {
-                        'numero_serie': p.numero_serie,
-                        'numero_fogo': p.numero_fogo,
-                        'marca': p.marca,
-                        'modelo': p.modelo,
-                        'km_rodados': p.km_atual - p.km_instalacao,
-                        'equipamento': p.equipamento.nome if p.equipamento else None
-                    } for p in pneus_mais_km
-                ]
-            }
-        }), 200
-        
+        relatorio = relatorio_performance_em_cache(_filtros_relatorio_performance())
+        return jsonify({'relatorio': relatorio}), 200
+
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@pneus_bp.route('/pneus/relatorio-performance/exportar', methods=['GET'])
+@token_required
+def exportar_relatorio_performance_pneus(current_user):
+    """Exportar os pneus do relatório de performance (mesmos filtros) em CSV, NDJSON ou XLSX, em streaming"""
+    try:
+        formato = ler_formato(request.args.get('formato'))
+    except FormatoInvalido as e:
+        return jsonify({'error': str(e)}), 400
+
+    query = filtrar_pneus(db.session.query(Pneu), _filtros_relatorio_performance())\
+        .outerjoin(Equipamento, Pneu.equipamento_id == Equipamento.id)\
+        .order_by(Pneu.marca, Pneu.id)
+    return exportar(query, CAMPOS_EXPORTACAO_PNEUS, formato, 'relatorio_performance_pneus')
+
 @pneus_bp.route('/pneus/alertas', methods=['GET'])
 @token_required
 def get_alertas_pneus(current_user):
-    """Obter alertas relacionados a pneus"""
+    """Obter alertas relacionados a pneus (materializados em `alertas`, ver src/utils/alertas.py)"""
     try:
-        pneus = Pneu.query.filter_by(status='em_uso').all()
-        alertas = []
-        
-        for pneu in pneus:
-            # Alerta por sulco baixo (menos de 3mm)
-            if pneu.medida_sulco_mm and pneu.medida_sulco_mm < 3.0:
-                alertas.append({
-                    'tipo': 'sulco_baixo',
-                    'pneu_id': pneu.id,
-                    'numero_serie': pneu.numero_serie,
-                    'numero_fogo': pneu.numero_fogo,
-                    'equipamento': pneu.equipamento.nome if pneu.equipamento else None,
-                    'medida_sulco': pneu.medida_sulco_mm,
-                    'severidade': 'critica' if pneu.medida_sulco_mm < 1.5 else 'alta',
-                    'mensagem': f'Sulco baixo: {pneu.medida_sulco_mm}mm'
-                })
-            
-            # Alerta por vida útil próxima do fim
-            if pneu.vida_util_estimada and pneu.km_atual and pneu.km_instalacao:
-                km_rodados = pneu.km_atual - pneu.km_instalacao
-                percentual_uso = (km_rodados / pneu.vida_util_estimada) * 100
-                
-                if percentual_uso >= 90:
-                    alertas.append({
-                        'tipo': 'vida_util_fim',
-                        'pneu_id': pneu.id,
-                        'numero_serie': pneu.numero_serie,
-                        'numero_fogo': pneu.numero_fogo,
-                        'equipamento': pneu.equipamento.nome if pneu.equipamento else None,
-                        'percentual_uso': round(percentual_uso, 1),
-                        'km_rodados': km_rodados,
-                        'severidade': 'critica' if percentual_uso >= 95 else 'alta',
-                        'mensagem': f'Vida útil: {percentual_uso:.1f}% ({km_rodados:.0f}km)'
-                    })
-        
+        alertas = alertas_da_entidade('pneu')
         return jsonify({
             'alertas': alertas,
             'total_alertas': len(alertas)
@@ -648,4 +826,3 @@ def get_alertas_pneus(current_user):
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-
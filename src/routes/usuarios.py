@@ -1,7 +1,7 @@
 from flask import Blueprint, request, jsonify
 from src.db import db
 from src.models.usuario import Usuario
-from src.utils.auth import token_required, admin_required
+from src.utils.auth import token_required, admin_required, invalidar_usuario_cache
 from datetime import datetime
 import logging
 
@@ -139,6 +139,7 @@ def update_usuario(current_user, usuario_id):
         
         usuario.updated_at = datetime.utcnow()
         db.session.commit()
+        invalidar_usuario_cache(usuario_id)
         
         return jsonify({
             'message': 'Usuário atualizado com sucesso',
@@ -162,6 +163,7 @@ def delete_usuario(current_user, usuario_id):
         
         db.session.delete(usuario)
         db.session.commit()
+        invalidar_usuario_cache(usuario_id)
         
         return jsonify({'message': 'Usuário excluído com sucesso'}), 200
         
@@ -203,6 +205,7 @@ def update_perfil(current_user):
         
         current_user.updated_at = datetime.utcnow()
         db.session.commit()
+        invalidar_usuario_cache(current_user.id)
         
         return jsonify({
             'message': 'Perfil atualizado com sucesso',
@@ -140,6 +140,35 @@ class AGGridConfig {
         return create();
     }
     
+    // Datasource do Server-Side Row Model: envia a requisição do grid para
+    // os endpoints /grid do backend e carrega apenas o bloco visível
+    static serverSideDatasource(endpoint) {
+        return {
+            getRows: async (params) => {
+                try {
+                    const data = await api.request(endpoint, {
+                        method: 'POST',
+                        body: JSON.stringify(params.request)
+                    });
+                    params.success({ rowData: data.rows, rowCount: data.rowCount });
+                } catch (error) {
+                    console.error('Erro ao carregar bloco do grid:', error);
+                    params.fail();
+                }
+            }
+        };
+    }
+
+    static createServerSideGrid(container, endpoint, options = {}) {
+        return this.createGrid(container, {
+            rowModelType: 'serverSide',
+            pagination: true,
+            cacheBlockSize: options.paginationPageSize || 20,
+            serverSideDatasource: this.serverSideDatasource(endpoint),
+            ...options
+        });
+    }
+
     // Formatadores comuns
     static formatters = {
         currency: (params) => {
@@ -0,0 +1,227 @@
+"""
+Protocolo do Server-Side Row Model do AG-Grid
+
+Traduz a requisição enviada pelo grid (startRow/endRow, sortModel,
+filterModel, rowGroupCols/groupKeys) em filtros, ordenação e LIMIT/OFFSET
+sobre uma query SQLAlchemy, devolvendo apenas o bloco visível e o `rowCount`.
+"""
+
+from datetime import datetime, timedelta
+
+from src.db import db
+
+TAMANHO_BLOCO_MAXIMO = 1000
+
+
+class RequisicaoGridInvalida(ValueError):
+    """Requisição do grid com parâmetros inválidos"""
+
+
+def _coluna(colunas, campo):
+    if campo not in colunas:
+        raise RequisicaoGridInvalida(f'Coluna não suportada: {campo}')
+    return colunas[campo]
+
+
+def _ler_data(valor):
+    if not valor:
+        return None
+    try:
+        return datetime.fromisoformat(str(valor))
+    except ValueError:
+        raise RequisicaoGridInvalida(f'Data inválida: {valor}')
+
+
+def _filtro_texto(coluna, modelo):
+    tipo = modelo.get('type', 'contains')
+    valor = modelo.get('filter')
+    if tipo == 'blank':
+        return db.or_(coluna.is_(None), coluna == '')
+    if tipo == 'notBlank':
+        return db.and_(coluna.isnot(None), coluna != '')
+    if valor is None:
+        return None
+    valor = str(valor)
+    if tipo == 'contains':
+        return coluna.ilike(f'%{valor}%')
+    if tipo == 'notContains':
+        return db.not_(coluna.ilike(f'%{valor}%'))
+    if tipo == 'equals':
+        return coluna == valor
+    if tipo == 'notEqual':
+        return coluna != valor
+    if tipo == 'startsWith':
+        return coluna.ilike(f'{valor}%')
+    if tipo == 'endsWith':
+        return coluna.ilike(f'%{valor}')
+    raise RequisicaoGridInvalida(f'Tipo de filtro de texto inválido: {tipo}')
+
+
+def _filtro_comparacao(coluna, tipo, valor, valor_ate):
+    if tipo == 'blank':
+        return coluna.is_(None)
+    if tipo == 'notBlank':
+        return coluna.isnot(None)
+    if valor is None:
+        return None
+    if tipo == 'equals':
+        return coluna == valor
+    if tipo == 'notEqual':
+        return coluna != valor
+    if tipo == 'lessThan':
+        return coluna < valor
+    if tipo == 'lessThanOrEqual':
+        return coluna <= valor
+    if tipo == 'greaterThan':
+        return coluna > valor
+    if tipo == 'greaterThanOrEqual':
+        return coluna >= valor
+    if tipo == 'inRange':
+        return db.and_(coluna >= valor, coluna <= valor_ate)
+    raise RequisicaoGridInvalida(f'Tipo de filtro inválido: {tipo}')
+
+
+def _filtro_numero(coluna, modelo):
+    return _filtro_comparacao(coluna, modelo.get('type', 'equals'), modelo.get('filter'), modelo.get('filterTo'))
+
+
+def _filtro_data(coluna, modelo):
+    tipo = modelo.get('type', 'equals')
+    data = _ler_data(modelo.get('dateFrom'))
+    data_ate = _ler_data(modelo.get('dateTo'))
+    if isinstance(coluna.type, db.Date):
+        # Colunas Date comparam apenas o dia
+        data = data.date() if data else None
+        data_ate = data_ate.date() if data_ate else None
+    elif tipo == 'equals' and data is not None:
+        # Colunas DateTime: o filtro de data do grid não tem hora, compara o dia inteiro
+        return db.and_(coluna >= data, coluna < data + timedelta(days=1))
+    return _filtro_comparacao(coluna, tipo, data, data_ate)
+
+
+def _filtro_set(coluna, modelo):
+    valores = modelo.get('values')
+    if valores is None:
+        return None
+    nao_nulos = [v for v in valores if v is not None]
+    condicoes = [coluna.in_(nao_nulos)] if nao_nulos else []
+    if len(nao_nulos) != len(valores):
+        condicoes.append(coluna.is_(None))
+    return db.or_(*condicoes) if condicoes else db.false()
+
+
+FILTROS = {
+    'text': _filtro_texto,
+    'number': _filtro_numero,
+    'date': _filtro_data,
+    'set': _filtro_set,
+}
+
+
+def _condicao(coluna, modelo):
+    # Filtros combinados: formato novo (conditions) e antigo (condition1/condition2)
+    condicoes = modelo.get('conditions')
+    if condicoes is None and 'condition1' in modelo:
+        condicoes = [modelo['condition1'], modelo.get('condition2')]
+    if condicoes is not None:
+        partes = [_condicao(coluna, {'filterType': modelo.get('filterType'), **c}) for c in condicoes if c]
+        partes = [p for p in partes if p is not None]
+        if not partes:
+            return None
+        return db.or_(*partes) if modelo.get('operator') == 'OR' else db.and_(*partes)
+
+    filtro = FILTROS.get(modelo.get('filterType', 'text'))
+    if not filtro:
+        raise RequisicaoGridInvalida(f"Tipo de filtro não suportado: {modelo.get('filterType')}")
+    return filtro(coluna, modelo)
+
+
+def aplicar_filtros(query, filter_model, colunas):
+    """Aplica o filterModel do grid à query"""
+    for campo, modelo in (filter_model or {}).items():
+        condicao = _condicao(_coluna(colunas, campo), modelo or {})
+        if condicao is not None:
+            query = query.filter(condicao)
+    return query
+
+
+def aplicar_ordenacao(query, sort_model, colunas, coluna_id):
+    """Aplica o sortModel do grid com desempate pela chave primária"""
+    ordem = []
+    for sort in sort_model or []:
+        coluna = _coluna(colunas, sort.get('colId'))
+        ordem.append(coluna.desc() if sort.get('sort') == 'desc' else coluna.asc())
+    ordem.append(coluna_id.asc())
+    return query.order_by(*ordem)
+
+
+def ler_requisicao_grid(dados):
+    """Valida e normaliza o corpo da requisição enviada pelo datasource do grid"""
+    dados = dados or {}
+    try:
+        inicio = int(dados.get('startRow') or 0)
+        fim = int(dados.get('endRow') or inicio + 100)
+    except (TypeError, ValueError):
+        raise RequisicaoGridInvalida('startRow/endRow inválidos')
+    if inicio < 0 or fim <= inicio:
+        raise RequisicaoGridInvalida('Intervalo de linhas inválido')
+
+    return {
+        'start_row': inicio,
+        'end_row': min(fim, inicio + TAMANHO_BLOCO_MAXIMO),
+        'sort_model': dados.get('sortModel') or [],
+        'filter_model': dados.get('filterModel') or {},
+        'row_group_cols': [c.get('field') or c.get('id') for c in dados.get('rowGroupCols') or []],
+        'group_keys': dados.get('groupKeys') or [],
+    }
+
+
+def _contar_linhas(query, inicio, tamanho, linhas):
+    # Bloco incompleto: já sabemos onde o resultado termina, sem COUNT
+    if len(linhas) < tamanho:
+        return inicio + len(linhas)
+    return query.order_by(None).count()
+
+
+def consultar_grid(query, dados, colunas, serializar, coluna_id, opcoes=()):
+    """
+    Executa a requisição do grid sobre `query`.
+
+    `colunas` mapeia o campo (colId) do grid para a coluna SQLAlchemy
+    correspondente; apenas esses campos podem ser filtrados, ordenados ou
+    agrupados. `serializar` converte cada linha da query em dict e `opcoes`
+    são loader options (joinedload/contains_eager) aplicadas só às linhas
+    de detalhe.
+
+    Retorna {'rows': [...], 'rowCount': n}.
+    """
+    requisicao = ler_requisicao_grid(dados)
+    inicio = requisicao['start_row']
+    tamanho = requisicao['end_row'] - inicio
+    grupos = requisicao['row_group_cols']
+    chaves = requisicao['group_keys']
+
+    query = aplicar_filtros(query, requisicao['filter_model'], colunas)
+    for campo, chave in zip(grupos, chaves):
+        query = query.filter(_coluna(colunas, campo) == chave)
+
+    if len(chaves) < len(grupos):
+        # Nível de agrupamento: uma linha por valor distinto com a contagem de filhos
+        campo = grupos[len(chaves)]
+        coluna = _coluna(colunas, campo)
+        query = query.with_entities(coluna.label(campo), db.func.count(coluna_id).label('childCount'))\
+            .group_by(coluna)
+        sort = next((s for s in requisicao['sort_model'] if s.get('colId') == campo), None)
+        query = query.order_by(coluna.desc() if sort and sort.get('sort') == 'desc' else coluna.asc())
+        linhas = query.offset(inicio).limit(tamanho).all()
+        return {
+            'rows': [{campo: linha[0], 'childCount': linha[1]} for linha in linhas],
+            'rowCount': _contar_linhas(query, inicio, tamanho, linhas),
+        }
+
+    query = aplicar_ordenacao(query, requisicao['sort_model'], colunas, coluna_id)
+    linhas = query.options(*opcoes).offset(inicio).limit(tamanho).all()
+    return {
+        'rows': [serializar(linha) for linha in linhas],
+        'rowCount': _contar_linhas(query, inicio, tamanho, linhas),
+    }
@@ -0,0 +1,362 @@
+"""
+Alertas materializados
+
+As regras de alerta de cada entidade (pneus, ordens de serviço e peças)
+são consultas SQL que devolvem só as linhas em alerta; o resultado fica na
+tabela `alertas` (uma linha por entidade, id e tipo) e as rotas apenas a
+leem. A avaliação acontece:
+
+- de forma incremental, na mesma transação: os eventos da sessão anotam
+  os ids alterados (objetos do ORM, UPDATE em lote pela chave primária ou
+  `marcar_alterados`) e, antes do commit, só esses ids são reavaliados;
+- por completo na inicialização (preparar_banco, carga inicial da tabela)
+  e periodicamente, a cada ALERTAS_INTERVALO_SEGUNDOS, por uma thread do
+  processo master do gunicorn (ou scripts/atualizar_alertas.py, no cron ou
+  com --intervalo), para as regras que dependem da passagem do tempo (OS
+  atrasada, parada, previsão de desgaste) e para escritas feitas fora da
+  aplicação.
+
+Alertas cuja condição deixou de valer são removidos.
+"""
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, event, or_, select
+from sqlalchemy.orm import Session
+
+from src.db import db
+from src.models.alerta import Alerta
+from src.models.equipamento import Equipamento
+from src.models.ordem_servico import OrdemServico
+from src.models.peca import Peca
+from src.models.pneu import Pneu
+from src.models.previsao_desgaste_pneu import PrevisaoDesgastePneu
+from src.utils.analise_pneus import KM_RODADOS, PERCENTUAL_USO
+from src.utils.previsao_pneus import (
+    ANTECEDENCIA_ALERTA_DIAS, ANTECEDENCIA_ALERTA_KM, ANTECEDENCIA_CRITICA_DIAS, SULCO_LIMITE_LEGAL_MM
+)
+from src.utils.upsert import upsert
+
+logger = logging.getLogger(__name__)
+
+SEVERIDADES = ['critica', 'alta', 'media']
+
+# Reavaliação completa periódica (segundos; 0 desativa a thread do gunicorn)
+ALERTAS_INTERVALO_SEGUNDOS = int(os.environ.get('ALERTAS_INTERVALO_SEGUNDOS', '900'))
+
+# Ids reavaliados por consulta
+LOTE_ALERTAS = 1000
+
+STATUS_OS_PENDENTES = ['aberta', 'em_execucao', 'aguardando_pecas']
+
+COLUNAS_ATUALIZADAS = ['severidade', 'mensagem', 'dados', 'equipamento_id', 'mecanico_id', 'atualizado_em']
+
+
+def _alerta(tipo, entidade_id, severidade, mensagem, dados, equipamento_id=None, mecanico_id=None):
+    return {
+        'tipo': tipo,
+        'entidade_id': entidade_id,
+        'severidade': severidade,
+        'mensagem': mensagem,
+        'dados': dados,
+        'equipamento_id': equipamento_id,
+        'mecanico_id': mecanico_id,
+    }
+
+
+def _filtrar_ids(query, coluna, ids):
+    return query if ids is None else query.filter(coluna.in_(ids))
+
+
+def _alertas_pneus(ids, agora):
+    """Sulco baixo (< 3mm), vida útil >= 90% e limite legal previsto em breve, dos pneus em uso"""
+    hoje = agora.date()
+    alertas = []
+
+    pneus = _filtrar_ids(db.session.query(
+        Pneu.id, Pneu.numero_serie, Pneu.numero_fogo, Pneu.medida_sulco_mm, Pneu.equipamento_id,
+        KM_RODADOS.label('km_rodados'), PERCENTUAL_USO.label('percentual_uso'),
+        Equipamento.nome.label('equipamento')
+    ).outerjoin(Equipamento, Pneu.equipamento_id == Equipamento.id), Pneu.id, ids)\
+        .filter(Pneu.status == 'em_uso',
+                db.or_(db.and_(Pneu.medida_sulco_mm != 0, Pneu.medida_sulco_mm < 3.0), PERCENTUAL_USO >= 90))\
+        .all()
+    for pneu in pneus:
+        base = {'pneu_id': pneu.id, 'numero_serie': pneu.numero_serie, 'numero_fogo': pneu.numero_fogo,
+                'equipamento': pneu.equipamento}
+        if pneu.medida_sulco_mm and pneu.medida_sulco_mm < 3.0:
+            alertas.append(_alerta(
+                'sulco_baixo', pneu.id, 'critica' if pneu.medida_sulco_mm < 1.5 else 'alta',
+                f'Sulco baixo: {pneu.medida_sulco_mm}mm',
+                {**base, 'medida_sulco': pneu.medida_sulco_mm}, pneu.equipamento_id
+            ))
+        if pneu.percentual_uso is not None and pneu.percentual_uso >= 90:
+            alertas.append(_alerta(
+                'vida_util_fim', pneu.id, 'critica' if pneu.percentual_uso >= 95 else 'alta',
+                f'Vida útil: {pneu.percentual_uso:.1f}% ({pneu.km_rodados:.0f}km)',
+                {**base, 'percentual_uso': round(pneu.percentual_uso, 1), 'km_rodados': pneu.km_rodados},
+                pneu.equipamento_id
+            ))
+
+    previstos = _filtrar_ids(db.session.query(
+        Pneu.id, Pneu.numero_serie, Pneu.numero_fogo, Pneu.equipamento_id, Equipamento.nome.label('equipamento'),
+        PrevisaoDesgastePneu.taxa_desgaste_mm_1000km, PrevisaoDesgastePneu.km_restantes,
+        PrevisaoDesgastePneu.data_limite
+    ).join(Pneu, PrevisaoDesgastePneu.pneu_id == Pneu.id)
+        .outerjoin(Equipamento, Pneu.equipamento_id == Equipamento.id), Pneu.id, ids)\
+        .filter(Pneu.status == 'em_uso',
+                db.or_(PrevisaoDesgastePneu.km_restantes <= ANTECEDENCIA_ALERTA_KM,
+                       PrevisaoDesgastePneu.data_limite <= hoje + timedelta(days=ANTECEDENCIA_ALERTA_DIAS)))\
+        .all()
+    for pneu in previstos:
+        critico = pneu.km_restantes == 0 or (
+            pneu.data_limite is not None and pneu.data_limite <= hoje + timedelta(days=ANTECEDENCIA_CRITICA_DIAS)
+        )
+        previsao = f' em {pneu.data_limite.strftime("%d/%m/%Y")}' if pneu.data_limite else ''
+        alertas.append(_alerta(
+            'desgaste_previsto', pneu.id, 'critica' if critico else 'alta',
+            f'Sulco de {SULCO_LIMITE_LEGAL_MM}mm previsto{previsao} ({pneu.km_restantes:.0f}km restantes)',
+            {'pneu_id': pneu.id, 'numero_serie': pneu.numero_serie, 'numero_fogo': pneu.numero_fogo,
+             'equipamento': pneu.equipamento, 'taxa_desgaste_mm_1000km': pneu.taxa_desgaste_mm_1000km,
+             'km_restantes': pneu.km_restantes,
+             'data_limite': pneu.data_limite.isoformat() if pneu.data_limite else None},
+            pneu.equipamento_id
+        ))
+    return alertas
+
+
+def _alertas_ordens_servico(ids, agora):
+    """OS atrasada, aguardando peças, crítica não iniciada, não iniciada há 1 dia e em execução há 3 dias"""
+    inicio_hoje = datetime(agora.year, agora.month, agora.day)
+    ordens = _filtrar_ids(db.session.query(
+        OrdemServico.id, OrdemServico.numero_os, OrdemServico.status, OrdemServico.prioridade,
+        OrdemServico.equipamento_id, OrdemServico.mecanico_id, OrdemServico.data_abertura,
+        OrdemServico.data_inicio, OrdemServico.data_prevista, Equipamento.nome.label('equipamento')
+    ).outerjoin(Equipamento, OrdemServico.equipamento_id == Equipamento.id), OrdemServico.id, ids)\
+        .filter(OrdemServico.status.in_(STATUS_OS_PENDENTES),
+                or_(OrdemServico.data_prevista < inicio_hoje,
+                    OrdemServico.status == 'aguardando_pecas',
+                    OrdemServico.prioridade == 'critica',
+                    db.and_(OrdemServico.status == 'aberta', OrdemServico.data_abertura <= agora - timedelta(days=1)),
+                    db.and_(OrdemServico.status == 'em_execucao',
+                            OrdemServico.data_inicio <= agora - timedelta(days=3))))\
+        .all()
+
+    alertas = []
+    for ordem in ordens:
+        base = {'os_id': ordem.id, 'numero_os': ordem.numero_os, 'equipamento': ordem.equipamento,
+                'prioridade': ordem.prioridade}
+
+        def adicionar(tipo, severidade, mensagem, **dados):
+            alertas.append(_alerta(tipo, ordem.id, severidade, mensagem, {**base, **dados},
+                                   ordem.equipamento_id, ordem.mecanico_id))
+
+        if ordem.data_prevista and ordem.data_prevista < inicio_hoje:
+            dias_atraso = (agora.date() - ordem.data_prevista.date()).days
+            adicionar('atraso', 'alta' if dias_atraso > 7 else 'media', f'OS atrasada há {dias_atraso} dias',
+                      dias_atraso=dias_atraso)
+        if ordem.status == 'aguardando_pecas':
+            adicionar('pecas_falta', 'media', 'OS aguardando peças para execução')
+        if ordem.prioridade == 'critica' and ordem.status == 'aberta':
+            adicionar('prioridade_critica', 'critica', 'OS com prioridade crítica não iniciada')
+        if ordem.status == 'aberta' and ordem.data_abertura:
+            dias_desde_abertura = (agora - ordem.data_abertura).days
+            if dias_desde_abertura >= 1:
+                adicionar('os_nao_iniciada', 'alta' if ordem.prioridade == 'critica' else 'media',
+                          f'OS {ordem.numero_os} não iniciada há {dias_desde_abertura} dias')
+        if ordem.status == 'em_execucao' and ordem.data_inicio:
+            dias_em_execucao = (agora - ordem.data_inicio).days
+            if dias_em_execucao >= 3:
+                adicionar('os_execucao_longa', 'media', f'OS {ordem.numero_os} em execução há {dias_em_execucao} dias')
+    return alertas
+
+
+def _alertas_pecas(ids, agora):
+    """Peças com estoque mínimo definido e quantidade no mínimo ou abaixo dele"""
+    pecas = _filtrar_ids(db.session.query(
+        Peca.id, Peca.codigo, Peca.nome, Peca.quantidade, Peca.min_estoque, Peca.estoque_local_id
+    ), Peca.id, ids)\
+        .filter(Peca.min_estoque > 0, Peca.quantidade <= Peca.min_estoque)\
+        .all()
+    return [
+        _alerta(
+            'estoque_baixo', peca.id, 'alta' if (peca.quantidade or 0) <= 0 else 'media',
+            f'{peca.codigo} - {peca.nome}: {peca.quantidade or 0} em estoque (mínimo {peca.min_estoque})',
+            {'peca_id': peca.id, 'codigo': peca.codigo, 'nome': peca.nome, 'quantidade': peca.quantidade,
+             'min_estoque': peca.min_estoque, 'estoque_local_id': peca.estoque_local_id}
+        )
+        for peca in pecas
+    ]
+
+
+# Regra de cada entidade: função (ids ou None para todos, agora) -> alertas ativos
+REGRAS = {
+    'pneu': _alertas_pneus,
+    'ordem_servico': _alertas_ordens_servico,
+    'peca': _alertas_pecas,
+}
+
+# Tabelas cujas alterações mudam os alertas: tabela -> (entidade, coluna com o id da entidade)
+TABELAS_MONITORADAS = {
+    'pneus': ('pneu', 'id'),
+    'previsoes_desgaste_pneus': ('pneu', 'pneu_id'),
+    'ordens_servico': ('ordem_servico', 'id'),
+    'pecas': ('peca', 'id'),
+}
+
+
+def _sincronizar_lote(entidade, ids, agora):
+    atuais = REGRAS[entidade](ids, agora)
+    chaves = {(alerta['tipo'], alerta['entidade_id']) for alerta in atuais}
+
+    existentes = db.session.execute(_filtrar_ids(
+        select(Alerta.id, Alerta.tipo, Alerta.entidade_id).where(Alerta.entidade == entidade),
+        Alerta.entidade_id, ids
+    )).all()
+    resolvidos = [alerta.id for alerta in existentes if (alerta.tipo, alerta.entidade_id) not in chaves]
+    for inicio in range(0, len(resolvidos), LOTE_ALERTAS):
+        db.session.execute(delete(Alerta).where(Alerta.id.in_(resolvidos[inicio:inicio + LOTE_ALERTAS])))
+
+    upsert(Alerta.__table__, [
+        {**alerta, 'entidade': entidade, 'dados': json.dumps(alerta['dados'], ensure_ascii=False),
+         'criado_em': agora, 'atualizado_em': agora}
+        for alerta in atuais
+    ], ['entidade', 'entidade_id', 'tipo'], atualizar=COLUNAS_ATUALIZADAS)
+    return len(atuais), len(resolvidos)
+
+
+def sincronizar_alertas(entidade, ids=None, agora=None):
+    """
+    Reavalia a regra da entidade para os ids informados (todos com None),
+    gravando os alertas ativos e removendo os resolvidos.
+    Retorna (ativos, resolvidos). Não faz commit.
+    """
+    agora = agora or datetime.utcnow()
+    if ids is None:
+        return _sincronizar_lote(entidade, None, agora)
+    ids = sorted(set(ids))
+    ativos = resolvidos = 0
+    for inicio in range(0, len(ids), LOTE_ALERTAS):
+        lote_ativos, lote_resolvidos = _sincronizar_lote(entidade, ids[inicio:inicio + LOTE_ALERTAS], agora)
+        ativos += lote_ativos
+        resolvidos += lote_resolvidos
+    return ativos, resolvidos
+
+
+def atualizar_alertas(entidades=None):
+    """
+    Reavalia todas as regras (ou as das `entidades`) por completo, com um
+    commit por entidade. Retorna {entidade: (ativos, resolvidos)}.
+    """
+    resultado = {}
+    for entidade in entidades or REGRAS:
+        resultado[entidade] = sincronizar_alertas(entidade)
+        db.session.commit()
+    return resultado
+
+
+def _atualizar_periodicamente(app, intervalo, parar, descartar_conexoes):
+    while not parar.wait(intervalo):
+        with app.app_context():
+            try:
+                atualizar_alertas()
+            except Exception:
+                db.session.rollback()
+                logger.exception('Falha ao atualizar os alertas')
+            finally:
+                db.session.remove()
+                if descartar_conexoes:
+                    db.engine.dispose()
+
+
+def iniciar_atualizacao_periodica(app, intervalo=None, descartar_conexoes=False):
+    """
+    Inicia uma thread (daemon) que chama atualizar_alertas() a cada
+    `intervalo` segundos (padrão ALERTAS_INTERVALO_SEGUNDOS). Com
+    `descartar_conexoes` o pool do engine é fechado após cada execução, para
+    não deixar conexões abertas em um processo que faz fork (master do
+    gunicorn). Retorna o Event que a interrompe, ou None com o intervalo
+    desativado (0).
+    """
+    intervalo = ALERTAS_INTERVALO_SEGUNDOS if intervalo is None else intervalo
+    if intervalo <= 0:
+        return None
+    parar = threading.Event()
+    threading.Thread(target=_atualizar_periodicamente, args=(app, intervalo, parar, descartar_conexoes),
+                     name='atualizacao-alertas', daemon=True).start()
+    return parar
+
+
+def alertas_da_entidade(entidade, entidade_id=None, mecanico_id=None, tipos=None):
+    """
+    Alertas gravados de uma entidade no formato das rotas de alertas de
+    cada módulo: tipo, detalhes, severidade, mensagem e data_alerta.
+    """
+    query = Alerta.query.filter(Alerta.entidade == entidade)
+    if entidade_id is not None:
+        query = query.filter(Alerta.entidade_id == entidade_id)
+    if mecanico_id is not None:
+        query = query.filter(Alerta.mecanico_id == mecanico_id)
+    if tipos:
+        query = query.filter(Alerta.tipo.in_(tipos))
+    return [
+        {'tipo': alerta.tipo, **alerta.get_dados(), 'severidade': alerta.severidade, 'mensagem': alerta.mensagem,
+         'data_alerta': alerta.atualizado_em.isoformat()}
+        for alerta in query.order_by(Alerta.entidade_id, Alerta.tipo).all()
+    ]
+
+
+def marcar_alterados(entidade, ids, session=None):
+    """Anota ids alterados por escritas que os eventos não enxergam (UPDATE do Core com WHERE)"""
+    session = session or db.session()
+    session.info.setdefault('alertas_pendentes', {}).setdefault(entidade, set()).update(ids)
+
+
+@event.listens_for(Session, 'after_flush')
+def _anotar_objetos_alterados(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        monitorada = TABELAS_MONITORADAS.get(getattr(obj, '__tablename__', None))
+        if monitorada:
+            entidade, coluna = monitorada
+            marcar_alterados(entidade, [getattr(obj, coluna)], session)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _anotar_escrita_em_massa(orm_execute_state):
+    # UPDATE em lote pela chave primária e INSERT/upsert em lote trazem os ids nos parâmetros
+    if not (orm_execute_state.is_update or orm_execute_state.is_insert):
+        return
+    mapper = orm_execute_state.bind_mapper
+    tabela = mapper.local_table if mapper is not None else getattr(orm_execute_state.statement, 'table', None)
+    monitorada = TABELAS_MONITORADAS.get(getattr(tabela, 'name', None))
+    parametros = orm_execute_state.parameters
+    if not monitorada or not isinstance(parametros, list):
+        return
+    entidade, coluna = monitorada
+    marcar_alterados(entidade, [linha[coluna] for linha in parametros if linha.get(coluna) is not None],
+                     orm_execute_state.session)
+
+
+@event.listens_for(Session, 'before_commit')
+def _avaliar_alertas_pendentes(session):
+    if session.info.get('avaliando_alertas'):
+        return
+    session.flush()
+    pendentes = session.info.pop('alertas_pendentes', None)
+    if not pendentes:
+        return
+    session.info['avaliando_alertas'] = True
+    try:
+        for entidade, ids in pendentes.items():
+            sincronizar_alertas(entidade, ids)
+    finally:
+        session.info.pop('avaliando_alertas', None)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_alertas_pendentes(session):
+    session.info.pop('alertas_pendentes', None)
@@ -0,0 +1,156 @@
+"""
+Análise de performance de pneus
+
+Todas as métricas são agregadas no banco (uma consulta GROUP BY por
+dimensão: marca, fornecedor, fornecedor de recapagem e posição), sem
+carregar os pneus na aplicação:
+
+- custo_por_km: valor de compra somado / km rodados somados, só dos pneus
+  que têm os dois;
+- km_por_mm: km rodados por mm de sulco consumido (sulco_inicial_mm -
+  medida_sulco_mm), só dos pneus com as duas medidas e desgaste positivo.
+
+O relatório completo fica em `pneus_cache` por conjunto de filtros: o
+commit de uma alteração em pneus ou equipamentos o descarta no próprio
+processo, e nos demais workers ele expira após PNEUS_CACHE_TTL
+(src/utils/cache.py).
+"""
+
+from datetime import datetime
+
+from sqlalchemy import case, func
+
+from src.db import db
+from src.models.equipamento import Equipamento
+from src.models.pneu import Pneu
+from src.utils.cache import pneus_cache
+from src.utils.serializacao import contar_se
+
+# Mesma regra de Pneu.to_dict(): sem as duas leituras (nulas ou zero), 0
+TEM_LEITURAS_KM = db.and_(Pneu.km_atual != 0, Pneu.km_instalacao != 0)
+KM_RODADOS = case((TEM_LEITURAS_KM, Pneu.km_atual - Pneu.km_instalacao), else_=0)
+
+# Percentual da vida útil já rodado (nulo sem vida útil ou sem leituras)
+PERCENTUAL_USO = case(
+    (db.and_(TEM_LEITURAS_KM, Pneu.vida_util_estimada != 0),
+     (Pneu.km_atual - Pneu.km_instalacao) * 100.0 / Pneu.vida_util_estimada),
+    else_=None
+)
+
+DESGASTE_SULCO = Pneu.sulco_inicial_mm - Pneu.medida_sulco_mm
+
+# Pneus que entram em cada métrica de eficiência
+COM_CUSTO_POR_KM = db.and_(KM_RODADOS > 0, Pneu.valor_compra.isnot(None))
+COM_KM_POR_MM = db.and_(KM_RODADOS > 0, DESGASTE_SULCO > 0)
+
+# Filtros aceitos pelo relatório (parâmetros da query string)
+FILTROS_PERFORMANCE = {
+    'marca': Pneu.marca,
+    'fornecedor': Pneu.fornecedor,
+    'fornecedor_recapagem': Pneu.fornecedor_recapagem,
+    'posicao': Pneu.posicao,
+    'equipamento_id': Pneu.equipamento_id,
+    'status': Pneu.status,
+    'tipo': Pneu.tipo,
+}
+
+DIMENSOES_PERFORMANCE = {
+    'marca': Pneu.marca,
+    'fornecedor': Pneu.fornecedor,
+    'fornecedor_recapagem': Pneu.fornecedor_recapagem,
+    'posicao': Pneu.posicao,
+}
+
+SEM_INFORMACAO = 'Não informado'
+
+
+def _somar_se(condicao, valor):
+    return func.sum(case((condicao, valor), else_=0))
+
+
+def filtrar_pneus(query, filtros):
+    """Aplica os filtros do relatório (dict nome -> valor, só os informados)"""
+    for nome, valor in filtros.items():
+        query = query.filter(FILTROS_PERFORMANCE[nome] == valor)
+    return query
+
+
+def _metricas(linha):
+    total = linha.total
+    km_total = linha.km_total or 0
+    valor_total = linha.valor_total or 0
+    descartados = linha.descartados or 0
+    recapados = linha.recapados or 0
+    return {
+        'total': total,
+        'km_total': km_total,
+        'valor_total': valor_total,
+        'descartados': descartados,
+        'recapados': recapados,
+        'km_medio': km_total / total,
+        'valor_medio': valor_total / total,
+        'taxa_descarte': (descartados / total) * 100,
+        'taxa_recapagem': (recapados / total) * 100,
+        'custo_por_km': round(linha.valor_com_km / linha.km_com_valor, 4) if linha.km_com_valor else None,
+        'km_por_mm': round(linha.km_com_desgaste / linha.mm_consumidos, 1) if linha.mm_consumidos else None,
+    }
+
+
+def performance_por(dimensao, filtros):
+    """Métricas agrupadas por uma das DIMENSOES_PERFORMANCE (valor -> métricas)"""
+    coluna = DIMENSOES_PERFORMANCE[dimensao]
+    linhas = filtrar_pneus(db.session.query(
+        coluna.label('valor'),
+        func.count(Pneu.id).label('total'),
+        func.sum(KM_RODADOS).label('km_total'),
+        func.sum(func.coalesce(Pneu.valor_compra, 0)).label('valor_total'),
+        contar_se(Pneu.status == 'descarte').label('descartados'),
+        contar_se(db.and_(Pneu.status != 'descarte', Pneu.tipo == 'recapado')).label('recapados'),
+        _somar_se(COM_CUSTO_POR_KM, Pneu.valor_compra).label('valor_com_km'),
+        _somar_se(COM_CUSTO_POR_KM, KM_RODADOS).label('km_com_valor'),
+        _somar_se(COM_KM_POR_MM, KM_RODADOS).label('km_com_desgaste'),
+        _somar_se(COM_KM_POR_MM, DESGASTE_SULCO).label('mm_consumidos'),
+    ), filtros).group_by(coluna).order_by(coluna).all()
+    return {linha.valor if linha.valor is not None else SEM_INFORMACAO: _metricas(linha) for linha in linhas}
+
+
+def relatorio_performance(filtros):
+    """Estatísticas gerais, métricas por dimensão e os 5 pneus que mais rodaram"""
+    estatisticas = filtrar_pneus(db.session.query(
+        func.count(Pneu.id).label('total_pneus'),
+        contar_se(Pneu.status == 'em_uso').label('pneus_em_uso'),
+        contar_se(Pneu.status == 'estoque').label('pneus_estoque'),
+        contar_se(Pneu.status == 'descarte').label('pneus_descarte'),
+        contar_se(Pneu.status == 'recapagem').label('pneus_recapagem'),
+    ), filtros).one()
+
+    top_km = filtrar_pneus(db.session.query(
+        Pneu.numero_serie, Pneu.numero_fogo, Pneu.marca, Pneu.modelo,
+        KM_RODADOS.label('km_rodados'), Equipamento.nome.label('equipamento')
+    ), filtros).outerjoin(Equipamento, Pneu.equipamento_id == Equipamento.id)\
+        .filter(TEM_LEITURAS_KM)\
+        .order_by(KM_RODADOS.desc(), Pneu.id)\
+        .limit(5)\
+        .all()
+
+    relatorio = {
+        'data_geracao': datetime.utcnow().isoformat(),
+        'filtros': filtros,
+        'estatisticas_gerais': {
+            'total_pneus': estatisticas.total_pneus,
+            'pneus_em_uso': estatisticas.pneus_em_uso or 0,
+            'pneus_estoque': estatisticas.pneus_estoque or 0,
+            'pneus_descarte': estatisticas.pneus_descarte or 0,
+            'pneus_recapagem': estatisticas.pneus_recapagem or 0
+        },
+    }
+    for dimensao in DIMENSOES_PERFORMANCE:
+        relatorio[f'performance_por_{dimensao}'] = performance_por(dimensao, filtros)
+    relatorio['top_pneus_km'] = [dict(linha._mapping) for linha in top_km]
+    return relatorio
+
+
+def relatorio_performance_em_cache(filtros):
+    """relatorio_performance() reaproveitado por conjunto de filtros até expirar ou haver alteração"""
+    chave = ('relatorio_performance',) + tuple(sorted(filtros.items()))
+    return pneus_cache.get_or_set(chave, lambda: relatorio_performance(filtros))
@@ -4,7 +4,10 @@ Utilitários de autenticação e autorização
 
 from functools import wraps
 from flask import request, jsonify
+from sqlalchemy.orm import make_transient_to_detached
+from src.db import db
 from src.models.usuario import Usuario
+from src.utils.cache import CacheTTL
 import jwt
 import os
 
@@ -12,6 +15,37 @@ SECRET_KEY = os.environ.get('JWT_SECRET_KEY')
 if not SECRET_KEY:
     raise RuntimeError("JWT_SECRET_KEY environment variable is not set")
 
+# Usuários autenticados em cache por user_id. O TTL curto (AUTH_USER_CACHE_TTL,
+# em segundos; 0 desativa) limita por quanto tempo outro processo pode aceitar
+# um usuário desativado; no processo que fez a alteração a invalidação é imediata.
+_usuarios_cache = CacheTTL(ttl=int(os.environ.get('AUTH_USER_CACHE_TTL', '30')))
+
+
+def invalidar_usuario_cache(usuario_id=None):
+    """Descarta o usuário (ou todos, se usuario_id for None) do cache de autenticação"""
+    _usuarios_cache.invalidar(usuario_id)
+
+
+def _copia_destacada(usuario):
+    # Cópia apenas com as colunas, sem vínculo com a sessão da requisição que a criou
+    mapper = Usuario.__mapper__
+    copia = Usuario(**{attr.key: getattr(usuario, attr.key) for attr in mapper.column_attrs})
+    make_transient_to_detached(copia)
+    return copia
+
+
+def carregar_usuario(usuario_id):
+    """Retorna o usuário vinculado à sessão atual, consultando o banco só em cache miss"""
+    copia = _usuarios_cache.get(usuario_id)
+    if copia is not None:
+        # merge(load=False) associa a cópia à sessão sem emitir SELECT
+        return db.session.merge(copia, load=False)
+
+    usuario = db.session.get(Usuario, usuario_id)
+    if usuario is not None:
+        _usuarios_cache.set(usuario_id, _copia_destacada(usuario))
+    return usuario
+
 def token_required(f):
     """Decorator para verificar se o token JWT é válido"""
     @wraps(f)
@@ -22,7 +56,7 @@ def token_required(f):
 
         try:
             data = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
-            current_user = Usuario.query.get(data['user_id'])
+            current_user = carregar_usuario(data['user_id'])
             if not current_user or not current_user.ativo:
                 return jsonify({'error': 'Usuário inválido'}), 401
         except jwt.ExpiredSignatureError:
@@ -0,0 +1,136 @@
+"""
+Busca de peças para autocompletar (typeahead)
+
+Procura o termo no código, nome e fornecedor da peça e na descrição do
+item vinculado (itens.numero_item = pecas.codigo), devolvendo poucas
+linhas já ordenadas por relevância: código exato, código começando pelo
+termo e depois a relevância do texto.
+
+- PostgreSQL: índices GIN de trigramas (pg_trgm) atendem o ILIKE
+  '%termo%' e índices GIN de tsvector atendem a busca por prefixo de cada
+  palavra; a relevância combina similarity() e ts_rank().
+- SQLite (desenvolvimento): tabela FTS5 `pecas_busca`, mantida por
+  triggers, com prefixo de cada palavra e ordem por bm25().
+- Sem os índices (banco criado com create_all), cai para ILIKE simples.
+
+Os índices e a tabela FTS5 são criados pela migração f1c6a9d3e852.
+"""
+
+import re
+
+from sqlalchemy import case, func, inspect, or_, text
+
+from src.db import db
+from src.models.item import Item
+from src.models.peca import Peca
+
+LIMITE_PADRAO_BUSCA = 10
+LIMITE_MAXIMO_BUSCA = 50
+TAMANHO_MINIMO_TERMO = 2
+
+TABELA_FTS = 'pecas_busca'
+
+# Mesmas expressões dos índices da migração (o planner só usa o índice se forem iguais)
+TSV_PECAS = "to_tsvector('simple', coalesce(p.codigo, '') || ' ' || coalesce(p.nome, '') || ' ' || coalesce(p.fornecedor, ''))"
+TSV_ITENS = "to_tsvector('simple', coalesce(i.descricao_item, ''))"
+
+SQL_BUSCA_POSTGRESQL = f"""
+    WITH candidatos AS (
+        SELECT p.id FROM pecas p
+        WHERE {TSV_PECAS} @@ to_tsquery('simple', :consulta)
+           OR p.codigo ILIKE :contem OR p.nome ILIKE :contem OR p.fornecedor ILIKE :contem
+        UNION
+        SELECT p.id FROM itens i JOIN pecas p ON p.codigo = i.numero_item
+        WHERE {TSV_ITENS} @@ to_tsquery('simple', :consulta)
+           OR i.descricao_item ILIKE :contem
+    )
+    SELECT p.id, p.codigo, p.nome, p.unidade, p.quantidade, p.estoque_local_id, i.descricao_item
+    FROM candidatos c
+    JOIN pecas p ON p.id = c.id
+    LEFT JOIN itens i ON i.numero_item = p.codigo
+    ORDER BY
+        CASE WHEN lower(p.codigo) = lower(:termo) THEN 2 WHEN p.codigo ILIKE :prefixo THEN 1 ELSE 0 END DESC,
+        greatest(similarity(p.nome, :termo), similarity(coalesce(i.descricao_item, ''), :termo),
+                 ts_rank({TSV_PECAS}, to_tsquery('simple', :consulta))) DESC,
+        p.nome
+    LIMIT :limite
+"""
+
+SQL_BUSCA_FTS5 = f"""
+    SELECT p.id, p.codigo, p.nome, p.unidade, p.quantidade, p.estoque_local_id, i.descricao_item
+    FROM {TABELA_FTS} b
+    JOIN pecas p ON p.id = b.rowid
+    LEFT JOIN itens i ON i.numero_item = p.codigo
+    WHERE {TABELA_FTS} MATCH :consulta
+    ORDER BY lower(p.codigo) = lower(:termo) DESC, bm25({TABELA_FTS}), p.nome
+    LIMIT :limite
+"""
+
+_fts_disponivel = {}
+
+
+def _palavras(termo):
+    return re.findall(r'\w+', termo.lower())
+
+
+def _escapar_like(termo):
+    return termo.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _tem_fts():
+    """Se a tabela FTS5 existe no banco (consultado uma vez por URL)"""
+    chave = str(db.engine.url)
+    if chave not in _fts_disponivel:
+        _fts_disponivel[chave] = inspect(db.engine).has_table(TABELA_FTS)
+    return _fts_disponivel[chave]
+
+
+def _buscar_like(termo, limite):
+    contem = f'%{_escapar_like(termo)}%'
+    prioridade = case(
+        (func.lower(Peca.codigo) == termo.lower(), 2),
+        (Peca.codigo.ilike(f'{_escapar_like(termo)}%', escape='\\'), 1),
+        else_=0
+    )
+    return db.session.query(
+        Peca.id, Peca.codigo, Peca.nome, Peca.unidade, Peca.quantidade, Peca.estoque_local_id, Item.descricao_item
+    ).outerjoin(Item, Peca.codigo == Item.numero_item)\
+        .filter(or_(
+            Peca.codigo.ilike(contem, escape='\\'),
+            Peca.nome.ilike(contem, escape='\\'),
+            Peca.fornecedor.ilike(contem, escape='\\'),
+            Item.descricao_item.ilike(contem, escape='\\'),
+        ))\
+        .order_by(prioridade.desc(), Peca.nome)\
+        .limit(limite)\
+        .all()
+
+
+def buscar_pecas(termo, limite=LIMITE_PADRAO_BUSCA):
+    """Até `limite` peças que correspondem ao termo, das mais relevantes para as menos"""
+    termo = (termo or '').strip()
+    palavras = _palavras(termo)
+    if len(termo) < TAMANHO_MINIMO_TERMO or not palavras:
+        return []
+    limite = min(limite, LIMITE_MAXIMO_BUSCA)
+
+    dialeto = db.engine.dialect.name
+    if dialeto == 'postgresql':
+        linhas = db.session.execute(text(SQL_BUSCA_POSTGRESQL), {
+            'termo': termo,
+            'consulta': ' & '.join(f'{palavra}:*' for palavra in palavras),
+            'contem': f'%{_escapar_like(termo)}%',
+            'prefixo': f'{_escapar_like(termo)}%',
+            'limite': limite,
+        }).all()
+    elif dialeto == 'sqlite' and _tem_fts():
+        linhas = db.session.execute(text(SQL_BUSCA_FTS5), {
+            'termo': termo,
+            # Cada palavra entre aspas (sem sintaxe FTS5 vinda do usuário), como prefixo
+            'consulta': ' '.join(f'"{palavra}"*' for palavra in palavras),
+            'limite': limite,
+        }).all()
+    else:
+        linhas = _buscar_like(termo, limite)
+
+    return [dict(linha._mapping) for linha in linhas]
@@ -0,0 +1,121 @@
+"""
+Cache em memória com expiração (TTL) compartilhado pelo processo
+
+Cada processo (worker do gunicorn) tem o próprio cache. O commit que altera
+uma das tabelas de um cache o descarta apenas no processo que fez a escrita;
+os demais workers continuam servindo o valor anterior até ele expirar. Por
+isso o TTL é o limite de defasagem entre workers e fica curto (60 s por
+padrão); escritas de outros processos (scripts, importações) também só
+aparecem após o TTL.
+"""
+
+import os
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+class CacheTTL:
+    """Cache chave/valor thread-safe com tempo de vida por entrada"""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._dados = {}
+        self._lock = threading.Lock()
+
+    def get(self, chave):
+        with self._lock:
+            entrada = self._dados.get(chave)
+            if entrada is None:
+                return None
+            expira_em, valor = entrada
+            if expira_em < time.monotonic():
+                del self._dados[chave]
+                return None
+            return valor
+
+    def set(self, chave, valor):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._dados[chave] = (time.monotonic() + self.ttl, valor)
+
+    def get_or_set(self, chave, calcular):
+        valor = self.get(chave)
+        if valor is None:
+            valor = calcular()
+            self.set(chave, valor)
+        return valor
+
+    def invalidar(self, chave=None):
+        with self._lock:
+            if chave is None:
+                self._dados.clear()
+            else:
+                self._dados.pop(chave, None)
+
+
+# Dashboard: TTL configurável via DASHBOARD_CACHE_TTL (segundos, 0 desativa)
+dashboard_cache = CacheTTL(ttl=int(os.environ.get('DASHBOARD_CACHE_TTL', '60')))
+
+# Relatórios de pneus (um resultado por conjunto de filtros): PNEUS_CACHE_TTL
+pneus_cache = CacheTTL(ttl=int(os.environ.get('PNEUS_CACHE_TTL', '60')))
+
+# Tabelas cujas alterações tornam os KPIs do dashboard obsoletos
+TABELAS_DASHBOARD = {'ordens_servico', 'pecas', 'pneus', 'equipamentos', 'mecanicos'}
+
+# Tabelas lidas pelos relatórios de pneus
+TABELAS_PNEUS = {'pneus', 'equipamentos'}
+
+# Cada cache é descartado após o commit de uma transação que alterou alguma das suas tabelas
+# (no processo do commit; nos outros, ao expirar)
+CACHES_POR_TABELAS = [
+    (dashboard_cache, TABELAS_DASHBOARD),
+    (pneus_cache, TABELAS_PNEUS),
+]
+
+
+def invalidar_dashboard():
+    """Descarta os KPIs em cache; usar após escritas fora do ORM (bulk/Core)"""
+    dashboard_cache.invalidar()
+
+
+def _marcar_tabela_alterada(session, tabela):
+    for cache, tabelas in CACHES_POR_TABELAS:
+        if tabela in tabelas:
+            session.info.setdefault('caches_obsoletos', set()).add(cache)
+
+
+@event.listens_for(Session, 'after_flush')
+def _marcar_alteracoes(session, flush_context):
+    tabelas = {getattr(obj, '__tablename__', None)
+               for obj in list(session.new) + list(session.dirty) + list(session.deleted)}
+    for tabela in tabelas:
+        _marcar_tabela_alterada(session, tabela)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _marcar_escrita_em_massa(orm_execute_state):
+    # query.update()/delete() e insert() em massa não passam pelo flush
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None:
+        tabela = mapper.local_table
+    else:
+        # insert()/update() do Core sobre a Table, executados pela sessão
+        tabela = getattr(orm_execute_state.statement, 'table', None)
+    _marcar_tabela_alterada(orm_execute_state.session, getattr(tabela, 'name', None))
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidar_caches_apos_commit(session):
+    for cache in session.info.pop('caches_obsoletos', ()):
+        cache.invalidar()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _limpar_marcacao_caches(session):
+    session.info.pop('caches_obsoletos', None)
@@ -0,0 +1,11 @@
+"""
+Conversão de valores recebidos da API (JSON, query string, planilhas)
+"""
+
+
+def inteiro_ou_none(valor):
+    """int(valor), ou None se vazio ou não numérico (a validação fica com quem chama)"""
+    try:
+        return int(valor) if valor not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,121 @@
+"""
+Exportação de relatórios em streaming (CSV, NDJSON e XLSX)
+
+As linhas são lidas do banco em lotes com `yield_per` (cursor do lado do
+servidor no PostgreSQL) e escritas na resposta à medida que chegam, com
+apenas um lote em memória. CSV e NDJSON começam a ser enviados logo após o
+primeiro lote. XLSX é um arquivo ZIP, que só pode ser enviado depois de
+fechado: o openpyxl em modo `write_only` grava as linhas em arquivo
+temporário e o resultado é enviado em blocos a partir do disco.
+"""
+
+import csv
+import io
+import tempfile
+from datetime import date, datetime
+
+from flask import Response, stream_with_context
+
+from src.utils.serializacao import dumps, selecionar
+
+TAMANHO_LOTE = 1000
+TAMANHO_BLOCO = 64 * 1024
+
+FORMATOS_EXPORTACAO = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+class FormatoInvalido(ValueError):
+    """Formato de exportação não suportado"""
+
+
+def ler_formato(valor, padrao='csv'):
+    """Converte o parâmetro `formato` da query string"""
+    formato = (valor or padrao).lower()
+    if formato not in FORMATOS_EXPORTACAO:
+        raise FormatoInvalido(f"Formato inválido. Use {', '.join(FORMATOS_EXPORTACAO)}")
+    return formato
+
+
+def _texto_csv(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    return valor
+
+
+def _gerar_csv(colunas, linhas):
+    buffer = io.StringIO()
+    # BOM para o Excel reconhecer UTF-8 ao abrir o arquivo
+    buffer.write('\ufeff')
+    escritor = csv.writer(buffer)
+    escritor.writerow(colunas)
+    for linha in linhas:
+        escritor.writerow([_texto_csv(valor) for valor in linha])
+        if buffer.tell() >= TAMANHO_BLOCO:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+def _gerar_ndjson(colunas, linhas):
+    bloco = []
+    tamanho = 0
+    for linha in linhas:
+        registro = dumps(dict(zip(colunas, linha))) + b'\n'
+        bloco.append(registro)
+        tamanho += len(registro)
+        if tamanho >= TAMANHO_BLOCO:
+            yield b''.join(bloco)
+            bloco, tamanho = [], 0
+    if bloco:
+        yield b''.join(bloco)
+
+
+def _gerar_xlsx(colunas, linhas, titulo):
+    from openpyxl import Workbook
+
+    planilha = Workbook(write_only=True)
+    aba = planilha.create_sheet(title=titulo[:31])
+    aba.append(colunas)
+    for linha in linhas:
+        aba.append(list(linha))
+
+    with tempfile.TemporaryFile() as arquivo:
+        planilha.save(arquivo)
+        arquivo.seek(0)
+        while True:
+            bloco = arquivo.read(TAMANHO_BLOCO)
+            if not bloco:
+                break
+            yield bloco
+
+
+def exportar(query, campos, formato, nome_arquivo):
+    """
+    Resposta em streaming com as linhas de `query` projetadas em `campos`
+    (dict nome -> coluna, na ordem das colunas do arquivo).
+    """
+    colunas = list(campos)
+    consulta = selecionar(query, campos).yield_per(TAMANHO_LOTE)
+
+    def gerar():
+        linhas = iter(consulta)
+        if formato == 'csv':
+            yield from _gerar_csv(colunas, linhas)
+        elif formato == 'ndjson':
+            yield from _gerar_ndjson(colunas, linhas)
+        else:
+            yield from _gerar_xlsx(colunas, linhas, nome_arquivo)
+
+    nome = f"{nome_arquivo}_{datetime.utcnow():%Y%m%d_%H%M%S}.{formato}"
+    return Response(
+        stream_with_context(gerar()),
+        content_type=FORMATOS_EXPORTACAO[formato],
+        headers={'Content-Disposition': f'attachment; filename="{nome}"'}
+    )
@@ -0,0 +1,413 @@
+"""
+Motor de importação em lote de planilhas (CSV/Excel)
+
+Cada entidade importável é descrita de forma declarativa (ver
+src/utils/importacao_entidades.py): colunas da planilha -> colunas do
+modelo com tipo e obrigatoriedade, chave de negócio, chaves estrangeiras
+resolvidas por um campo único do modelo referenciado, campos únicos
+secundários e validadores extras.
+
+A planilha chega em lotes de DataFrames (src/utils/planilhas.py). A
+validação e a conversão de tipos são feitas em colunas inteiras do
+DataFrame, sem percorrer linha a linha; as chaves estrangeiras e os
+registros existentes são consultados uma vez por lote (IN) e guardados em
+dicionários. Cada lote é gravado com INSERT ... ON CONFLICT (chave) DO
+UPDATE e tem o seu próprio commit: uma planilha grande não segura uma única
+transação gigante e um erro de banco descarta apenas o lote em que ocorreu.
+
+Em registros existentes, campos obrigatórios são sobrescritos e campos
+opcionais só mudam quando a célula está preenchida.
+"""
+
+import os
+from contextlib import closing
+from datetime import datetime
+
+import pandas as pd
+from sqlalchemy import select
+
+from src.db import db
+from src.utils.planilhas import ErroImportacao, extensao_arquivo, ler_planilha_em_lotes
+from src.utils.upsert import upsert
+
+TAMANHO_LOTE_IMPORTACAO = int(os.environ.get('IMPORTACAO_TAMANHO_LOTE', '1000'))
+
+# Erros detalhados no relatório (o restante só entra na contagem de ignorados)
+LIMITE_ERROS_RELATORIO = 10
+
+# Valores aceitos em colunas booleanas (comparados em minúsculas)
+VERDADEIROS = {'1', 'true', 'sim', 's', 'verdadeiro', 'x', 'yes'}
+FALSOS = {'0', 'false', 'nao', 'não', 'n', 'falso', 'no'}
+
+# Tamanho dos IN (...) nas consultas por lote
+TAMANHO_CONSULTA = 1000
+
+
+class Campo:
+    """
+    Coluna do modelo preenchida a partir da planilha.
+
+    `colunas` são os nomes aceitos na planilha, em ordem de preferência (o
+    primeiro valor preenchido vale). `tipo`: texto, numero, inteiro, data,
+    datahora ou booleano. `padrao` (valor ou função) só é usado em registros
+    novos; `valores` restringe textos a uma lista (comparada em minúsculas).
+    """
+
+    def __init__(self, nome, tipo='texto', colunas=None, obrigatorio=False, padrao=None, valores=None):
+        self.nome = nome
+        self.tipo = tipo
+        self.colunas = colunas or [nome]
+        self.obrigatorio = obrigatorio
+        self.padrao = padrao
+        self.valores = valores
+
+
+class Referencia:
+    """
+    Chave estrangeira (`nome`) resolvida pelo valor de um campo único do
+    modelo referenciado (`campo`, ex.: Item.numero_item). `filtro` restringe
+    os registros aceitos; `criar(valores)` cria os que não existem (sem ela,
+    valores desconhecidos são erro da linha).
+    """
+
+    def __init__(self, nome, campo, colunas, rotulo, obrigatorio=False, filtro=None, criar=None):
+        self.nome = nome
+        self.campo = campo
+        self.colunas = colunas
+        self.rotulo = rotulo
+        self.obrigatorio = obrigatorio
+        self.filtro = filtro
+        self.criar = criar
+
+
+class EntidadeImportacao:
+    """
+    Descrição de uma tabela importável.
+
+    `chave`: campo de negócio único usado no ON CONFLICT. `unicos`: outros
+    campos únicos, conferidos antes da gravação. `validadores`: funções
+    (dados) -> lista de (máscara, mensagem) aplicadas aos valores já
+    convertidos. `valores_iniciais()`: colunas fixas de registros novos.
+    `permissao`: níveis de acesso que podem importar (None: todos).
+    """
+
+    def __init__(self, modelo, chave, campos, referencias=(), unicos=(), validadores=(),
+                 valores_iniciais=None, permissao=None):
+        self.modelo = modelo
+        self.tabela = modelo.__table__
+        self.chave = chave
+        self.campos = campos
+        self.referencias = referencias
+        self.unicos = unicos
+        self.validadores = validadores
+        self.valores_iniciais = valores_iniciais
+        self.permissao = permissao
+
+    def permite(self, usuario):
+        return self.permissao is None or usuario.nivel_acesso in self.permissao
+
+    def colunas_planilha(self):
+        """Colunas da planilha agrupadas em obrigatórias ('a ou b' quando há alternativas) e opcionais"""
+        colunas = {'obrigatorias': [], 'opcionais': []}
+        for campo in list(self.campos) + list(self.referencias):
+            if campo.obrigatorio:
+                colunas['obrigatorias'].append(' ou '.join(campo.colunas))
+                continue
+            for coluna in campo.colunas:
+                if coluna not in colunas['opcionais']:
+                    colunas['opcionais'].append(coluna)
+        return colunas
+
+    def validar_colunas(self, colunas):
+        faltantes = [
+            ' ou '.join(campo.colunas)
+            for campo in list(self.campos) + list(self.referencias)
+            if campo.obrigatorio and not any(coluna in colunas for coluna in campo.colunas)
+        ]
+        if faltantes:
+            raise ErroImportacao(f'Colunas obrigatórias faltantes: {", ".join(faltantes)}')
+
+
+def novo_relatorio():
+    return {'total_linhas': 0, 'adicionados': 0, 'atualizados': 0, 'ignorados': 0, 'erros': []}
+
+
+def _registrar_erros(relatorio, erros, ignorados=None):
+    relatorio['ignorados'] += len(erros) if ignorados is None else ignorados
+    relatorio['erros'].extend(erros[:LIMITE_ERROS_RELATORIO - len(relatorio['erros'])])
+
+
+def _texto(df, coluna):
+    """Coluna como texto sem espaços nas pontas; vazio e ausente viram NA"""
+    if coluna not in df.columns:
+        return pd.Series(pd.NA, index=df.index, dtype='string')
+    serie = df[coluna].astype('string').str.strip()
+    return serie.mask(serie == '')
+
+
+def _texto_campo(df, campo):
+    """(primeiro valor preenchido entre as colunas do campo, nome da coluna para mensagens)"""
+    texto = _texto(df, campo.colunas[0])
+    for coluna in campo.colunas[1:]:
+        texto = texto.fillna(_texto(df, coluna))
+    coluna = next((coluna for coluna in campo.colunas if coluna in df.columns), campo.colunas[0])
+    return texto, coluna
+
+
+def _valores_python(serie):
+    """Valores da série como escalares Python (NA -> None), aceitos por qualquer driver"""
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return [None if pd.isna(valor) else valor.to_pydatetime() for valor in serie]
+    return serie.astype(object).where(serie.notna(), None).tolist()
+
+
+def registros_python(df):
+    """Linhas do DataFrame como dicts coluna -> valor Python"""
+    colunas = {coluna: _valores_python(df[coluna]) for coluna in df.columns}
+    return [dict(zip(colunas, valores)) for valores in zip(*colunas.values())]
+
+
+def _em_partes(valores, tamanho=TAMANHO_CONSULTA):
+    for inicio in range(0, len(valores), tamanho):
+        yield valores[inicio:inicio + tamanho]
+
+
+def _tamanho_maximo(coluna):
+    return getattr(coluna.type, 'length', None)
+
+
+class Importacao:
+    """
+    Estado de uma importação: ids de chaves estrangeiras já resolvidos,
+    valores iniciais e relatório acumulado. `importar_lote` pode ser chamado
+    várias vezes (um DataFrame por lote) e faz commit ao final de cada um.
+    """
+
+    def __init__(self, entidade):
+        self.entidade = entidade
+        self.relatorio = novo_relatorio()
+        self.iniciais = entidade.valores_iniciais() if entidade.valores_iniciais else {}
+        self._ids = {referencia.nome: {} for referencia in entidade.referencias}
+
+    def _converter(self, df):
+        """
+        Converte as colunas da planilha para os tipos do modelo.
+        Retorna (dados, motivo, marcar): `motivo` tem a mensagem de erro das
+        linhas rejeitadas e `marcar(mascara, mensagem)` rejeita mais linhas.
+        """
+        entidade = self.entidade
+        dados = pd.DataFrame(index=df.index)
+        motivo = pd.Series(pd.NA, index=df.index, dtype='object')
+
+        def _marcar(mascara, mensagem):
+            mascara = mascara.fillna(False).astype(bool) & motivo.isna()
+            motivo[mascara] = mensagem[mascara] if isinstance(mensagem, pd.Series) else mensagem
+
+        textos = {}
+        for item in list(entidade.campos) + list(entidade.referencias):
+            textos[item.nome] = _texto_campo(df, item)
+
+        obrigatorios = [textos[item.nome][0] for item in list(entidade.campos) + list(entidade.referencias)
+                        if item.obrigatorio]
+        if obrigatorios:
+            _marcar(pd.concat(obrigatorios, axis=1).isna().any(axis=1), 'Dados obrigatórios faltantes')
+
+        for item in list(entidade.campos) + list(entidade.referencias):
+            texto, coluna = textos[item.nome]
+            tamanho = _tamanho_maximo(item.campo if isinstance(item, Referencia) else entidade.tabela.c[item.nome])
+            if tamanho and (getattr(item, 'tipo', 'texto') == 'texto'):
+                _marcar(texto.str.len() > tamanho, f'{coluna} excede {tamanho} caracteres')
+
+        for campo in entidade.campos:
+            texto, coluna = textos[campo.nome]
+            if campo.tipo == 'texto':
+                if campo.valores:
+                    texto = texto.str.lower()
+                    _marcar(texto.notna() & ~texto.isin(campo.valores),
+                            f'Valor inválido em {coluna} (aceitos: {", ".join(campo.valores)})')
+                dados[campo.nome] = texto
+            elif campo.tipo in ('numero', 'inteiro'):
+                valores = pd.to_numeric(texto, errors='coerce')
+                _marcar(texto.notna() & valores.isna(), f'Valor inválido em {coluna}')
+                dados[campo.nome] = valores.round().astype('Int64') if campo.tipo == 'inteiro' else valores
+            elif campo.tipo in ('data', 'datahora'):
+                valores = pd.to_datetime(texto, errors='coerce', format='mixed', utc=True).dt.tz_localize(None)
+                _marcar(texto.notna() & valores.isna(), f'Data inválida em {coluna}')
+                dados[campo.nome] = valores
+            elif campo.tipo == 'booleano':
+                minusculo = texto.str.lower()
+                valores = pd.Series(pd.NA, index=df.index, dtype='boolean')
+                valores[minusculo.isin(VERDADEIROS).fillna(False).astype(bool)] = True
+                valores[minusculo.isin(FALSOS).fillna(False).astype(bool)] = False
+                _marcar(texto.notna() & valores.isna(), f'Valor inválido em {coluna}')
+                dados[campo.nome] = valores
+            else:
+                raise ValueError(f'Tipo de campo desconhecido: {campo.tipo}')
+
+        for referencia in entidade.referencias:
+            dados[f'_{referencia.nome}'] = textos[referencia.nome][0]
+
+        for validador in entidade.validadores:
+            for mascara, mensagem in validador(dados):
+                _marcar(mascara, mensagem)
+
+        return dados, motivo, _marcar
+
+    def _verificar_unicos(self, dados, marcar):
+        """Campos únicos secundários: não podem pertencer a outro registro"""
+        entidade = self.entidade
+        coluna_chave = entidade.tabela.c[entidade.chave]
+        for nome in entidade.unicos:
+            valores = dados[nome]
+            preenchidos = valores.notna()
+            chaves_por_valor = dados[preenchidos].groupby(nome)[entidade.chave].transform('nunique')
+            marcar((chaves_por_valor > 1).reindex(dados.index, fill_value=False), f'{nome} repetido na planilha')
+
+            coluna = entidade.tabela.c[nome]
+            donos = {}
+            for parte in _em_partes(valores[preenchidos].unique().tolist()):
+                donos.update(db.session.execute(
+                    select(coluna, coluna_chave).where(coluna.in_(parte))
+                ).all())
+            dono = valores.map(donos)
+            conflito = dono.notna() & (dono != dados[entidade.chave])
+            marcar(conflito, f'{nome} já cadastrado para outro registro')
+
+    def _resolver_referencias(self, dados, motivo, marcar):
+        for referencia in self.entidade.referencias:
+            valores = dados[f'_{referencia.nome}']
+            ids = self._ids[referencia.nome]
+            pendentes = [valor for valor in valores[motivo.isna()].dropna().unique().tolist() if valor not in ids]
+            if pendentes:
+                ids.update(self._buscar(referencia, pendentes))
+                desconhecidos = [valor for valor in pendentes if valor not in ids]
+                if desconhecidos and referencia.criar:
+                    referencia.criar(desconhecidos)
+                    ids.update(self._buscar(referencia, desconhecidos))
+            resolvidos = valores.map(ids)
+            marcar(valores.notna() & resolvidos.isna(),
+                   f'{referencia.rotulo} não encontrado: ' + valores.astype(str))
+            dados[referencia.nome] = resolvidos.astype('Int64')
+
+    def _buscar(self, referencia, valores):
+        modelo = referencia.campo.class_
+        encontrados = {}
+        for parte in _em_partes(valores):
+            consulta = select(referencia.campo, modelo.id).where(referencia.campo.in_(parte))
+            if referencia.filtro is not None:
+                consulta = consulta.where(referencia.filtro)
+            encontrados.update(db.session.execute(consulta).all())
+        return encontrados
+
+    def _gravar(self, dados):
+        """Grava as linhas válidas do lote; retorna (adicionados, atualizados)"""
+        entidade = self.entidade
+        colunas_modelo = [campo.nome for campo in entidade.campos] + \
+                         [referencia.nome for referencia in entidade.referencias]
+
+        # Chave repetida no lote: vale a última linha, e as colunas opcionais
+        # vazias mantêm o último valor preenchido, como em gravações sucessivas
+        unicos = dados[colunas_modelo].groupby(entidade.chave, sort=False).last()
+
+        # Campos com padrão costumam ser NOT NULL, checado na linha proposta
+        # pelo INSERT antes do ON CONFLICT: nos registros existentes, as células
+        # vazias recebem o valor atual do banco; nos novos, o padrão
+        com_padrao = [campo for campo in entidade.campos
+                      if campo.padrao is not None and campo.nome != entidade.chave]
+        tabela = entidade.tabela
+        coluna_chave = tabela.c[entidade.chave]
+        consulta = [coluna_chave] + [tabela.c[campo.nome] for campo in com_padrao]
+        atuais = []
+        for parte in _em_partes(unicos.index.tolist()):
+            atuais.extend(db.session.execute(select(*consulta).where(coluna_chave.in_(parte))).all())
+        atuais = pd.DataFrame(atuais, columns=[coluna.name for coluna in consulta]).set_index(entidade.chave)
+        novos = ~unicos.index.isin(atuais.index)
+
+        for campo in com_padrao:
+            padrao = campo.padrao() if callable(campo.padrao) else campo.padrao
+            valores = unicos[campo.nome].astype(object)
+            valores = valores.fillna(atuais[campo.nome].reindex(unicos.index).astype(object))
+            valores[novos] = valores[novos].fillna(padrao)
+            unicos[campo.nome] = valores.infer_objects() if campo.tipo != 'data' else pd.to_datetime(valores)
+
+        saida = unicos.reset_index()
+        for campo in entidade.campos:
+            if campo.tipo == 'data':
+                saida[campo.nome] = saida[campo.nome].dt.date
+
+        agora = datetime.utcnow()
+        fixos = dict(self.iniciais)
+        colunas_tabela = entidade.tabela.c
+        if 'created_at' in colunas_tabela:
+            fixos['created_at'] = agora
+        if 'updated_at' in colunas_tabela:
+            fixos['updated_at'] = agora
+        registros = [dict(registro, **fixos) for registro in registros_python(saida)]
+
+        atualizar = [item.nome for item in list(entidade.campos) + list(entidade.referencias)
+                     if item.obrigatorio and item.nome != entidade.chave]
+        if 'updated_at' in colunas_tabela:
+            atualizar.append('updated_at')
+        preservar = [nome for nome in colunas_modelo if nome not in atualizar and nome != entidade.chave]
+        upsert(entidade.tabela, registros, chaves=[entidade.chave],
+               atualizar=atualizar, preservar_se_nulo=preservar)
+
+        adicionados = int(novos.sum())
+        return adicionados, len(dados) - adicionados
+
+    def importar_lote(self, df):
+        """Valida, grava e faz commit de um lote de linhas da planilha"""
+        relatorio = self.relatorio
+        relatorio['total_linhas'] += len(df)
+        primeira, ultima = df.index.min() + 2, df.index.max() + 2
+
+        # Linhas que ainda podem ser gravadas (as demais já entraram no relatório)
+        pendentes = len(df)
+        try:
+            dados, motivo, marcar = self._converter(df)
+            self._verificar_unicos(dados, marcar)
+            self._resolver_referencias(dados, motivo, marcar)
+
+            rejeitadas = motivo.notna()
+            _registrar_erros(relatorio, [f'Linha {indice + 2}: {mensagem}'
+                                         for indice, mensagem in motivo[rejeitadas].items()])
+            dados = dados[~rejeitadas]
+            pendentes = len(dados)
+            adicionados, atualizados = self._gravar(dados) if pendentes else (0, 0)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            # Registros referenciados criados neste lote foram desfeitos junto com ele
+            for ids in self._ids.values():
+                ids.clear()
+            # Erros do banco: só a mensagem do driver, sem o SQL e os parâmetros
+            _registrar_erros(relatorio, [f'Linhas {primeira}-{ultima}: {getattr(e, "orig", None) or e}'],
+                             ignorados=pendentes)
+            return
+
+        relatorio['adicionados'] += adicionados
+        relatorio['atualizados'] += atualizados
+
+
+def importar_lotes(entidade, lotes, ao_concluir_lote=None):
+    """
+    Importa os DataFrames de `lotes` (ver ler_planilha_em_lotes) e retorna o
+    relatório. `ao_concluir_lote(relatorio)` é chamado após o commit de cada lote.
+    """
+    importacao = None
+    for df in lotes:
+        if importacao is None:
+            entidade.validar_colunas(df.columns)
+            importacao = Importacao(entidade)
+        if not df.empty:
+            importacao.importar_lote(df)
+        if ao_concluir_lote:
+            ao_concluir_lote(importacao.relatorio)
+    return importacao.relatorio if importacao else novo_relatorio()
+
+
+def importar_arquivo(entidade, caminho, tamanho_lote=TAMANHO_LOTE_IMPORTACAO, ao_concluir_lote=None):
+    """Importa uma planilha em disco, lendo-a em lotes"""
+    with open(caminho, 'rb') as arquivo, \
+            closing(ler_planilha_em_lotes(arquivo, extensao_arquivo(caminho), tamanho_lote)) as lotes:
+        return importar_lotes(entidade, lotes, ao_concluir_lote)
@@ -0,0 +1,198 @@
+"""
+Entidades importáveis por planilha (ver src/utils/importacao.py)
+
+Os nomes de coluna seguem os campos da API de cada cadastro; peças mantêm
+as colunas da exportação do ERP (numero_item, descricao_item, ...).
+"""
+
+from datetime import datetime
+
+from sqlalchemy import func, or_, select
+
+from src.db import db
+from src.models.equipamento import Equipamento
+from src.models.estoque_local import EstoqueLocal
+from src.models.grupo_item import GrupoItem
+from src.models.item import Item
+from src.models.mecanico import Mecanico
+from src.models.peca import Peca
+from src.models.pneu import Pneu
+from src.models.tipo_equipamento import TipoEquipamento
+from src.utils.importacao import Campo, EntidadeImportacao, Referencia
+from src.utils.upsert import upsert
+
+COLUNAS_UNIDADE = ['unidade_de_medida_de_estoque', 'unidade_medida_estoque']
+
+# Níveis de acesso que podem importar (mesmos de can_* em src/utils/auth.py)
+NIVEIS_ESTOQUE = ['ADM', 'Supervisor', 'Almoxarife']
+NIVEIS_GESTAO = ['ADM', 'Supervisor']
+
+STATUS_EQUIPAMENTO = ['ativo', 'manutencao', 'inativo']
+STATUS_PNEU = ['estoque', 'em_uso', 'recapagem', 'descarte']
+TIPOS_PNEU = ['novo', 'recapado']
+NIVEIS_MECANICO = ['junior', 'pleno', 'senior']
+STATUS_MECANICO = ['ativo', 'inativo', 'ferias']
+
+
+def _criar_grupos(nomes):
+    """Cria grupos de itens com código derivado do nome (único)"""
+    codigos = set(db.session.scalars(select(GrupoItem.codigo)))
+    registros = []
+    for nome in nomes:
+        codigo = candidato = nome[:10].upper().replace(' ', '_')
+        sufixo = 1
+        while candidato in codigos:
+            sufixo += 1
+            candidato = f'{codigo}_{sufixo}'
+        codigos.add(candidato)
+        registros.append({'nome': nome, 'codigo': candidato,
+                          'descricao': 'Grupo criado automaticamente durante importação'})
+    # Outra importação pode ter criado o mesmo grupo ao mesmo tempo
+    upsert(GrupoItem.__table__, registros, chaves=['nome'])
+
+
+def _valores_iniciais_peca():
+    estoque_padrao = EstoqueLocal.query.filter_by(codigo='ALM_CENTRAL').first() or EstoqueLocal.query.first()
+    return {
+        'quantidade': 0,
+        'max_estoque': 100,
+        'estoque_local_id': estoque_padrao.id if estoque_padrao else None,
+    }
+
+
+def _nao_negativos(*colunas):
+    def validar(dados):
+        return [(dados[coluna] < 0, f'{coluna} não pode ser negativo') for coluna in colunas]
+    return validar
+
+
+def _validar_cpf(dados):
+    digitos = dados['cpf'].str.replace(r'\D', '', regex=True)
+    return [(dados['cpf'].notna() & (digitos.str.len() != 11), 'CPF deve ter 11 dígitos')]
+
+
+PECAS = EntidadeImportacao(
+    Peca,
+    chave='codigo',
+    campos=[
+        Campo('codigo', colunas=['numero_item'], obrigatorio=True),
+        Campo('nome', colunas=['descricao_item'], obrigatorio=True),
+        Campo('unidade', colunas=COLUNAS_UNIDADE, obrigatorio=True),
+        Campo('ultimo_preco_avaliacao', 'numero'),
+        Campo('ultimo_preco_compra', 'numero'),
+        Campo('preco_unitario', 'numero', colunas=['ultimo_preco_compra']),
+        Campo('min_estoque', 'inteiro', colunas=['estoque_baixo'], padrao=10),
+        Campo('data_registro', 'datahora'),
+    ],
+    referencias=[
+        Referencia('grupo_item_id', GrupoItem.nome, ['grupo_itens'], 'Grupo',
+                   obrigatorio=True, criar=_criar_grupos),
+    ],
+    valores_iniciais=_valores_iniciais_peca,
+    permissao=NIVEIS_ESTOQUE,
+)
+
+ITENS = EntidadeImportacao(
+    Item,
+    chave='numero_item',
+    campos=[
+        Campo('numero_item', obrigatorio=True),
+        Campo('descricao_item', obrigatorio=True),
+        Campo('grupo_itens'),
+        Campo('unidade_medida', colunas=['unidade_medida'] + COLUNAS_UNIDADE),
+        Campo('ultimo_preco_avaliacao', 'numero'),
+        Campo('ultimo_preco_compra', 'numero'),
+        Campo('estoque_baixo', 'booleano', padrao=False),
+        Campo('data_registro', 'datahora', padrao=datetime.utcnow),
+    ],
+    validadores=[_nao_negativos('ultimo_preco_avaliacao', 'ultimo_preco_compra')],
+    permissao=NIVEIS_ESTOQUE,
+)
+
+EQUIPAMENTOS = EntidadeImportacao(
+    Equipamento,
+    chave='codigo_interno',
+    campos=[
+        Campo('codigo_interno', obrigatorio=True),
+        Campo('nome', obrigatorio=True),
+        Campo('modelo', obrigatorio=True),
+        Campo('fabricante', obrigatorio=True),
+        Campo('numero_serie', obrigatorio=True),
+        Campo('localizacao', obrigatorio=True),
+        Campo('data_aquisicao', 'data', obrigatorio=True),
+        Campo('status', padrao='ativo', valores=STATUS_EQUIPAMENTO),
+        Campo('horimetro_atual', 'numero', padrao=0.0),
+        Campo('valor_aquisicao', 'numero'),
+        Campo('observacoes'),
+    ],
+    referencias=[
+        Referencia('tipo_equipamento_id', TipoEquipamento.nome, ['tipo_equipamento'], 'Tipo de equipamento',
+                   obrigatorio=True),
+    ],
+    unicos=['numero_serie'],
+    validadores=[_nao_negativos('horimetro_atual', 'valor_aquisicao')],
+    permissao=NIVEIS_GESTAO,
+)
+
+PNEUS = EntidadeImportacao(
+    Pneu,
+    chave='numero_serie',
+    campos=[
+        Campo('numero_serie', obrigatorio=True),
+        Campo('marca', obrigatorio=True),
+        Campo('modelo', obrigatorio=True),
+        Campo('medida', obrigatorio=True),
+        Campo('tipo', obrigatorio=True, valores=TIPOS_PNEU),
+        Campo('data_compra', 'data', obrigatorio=True),
+        Campo('numero_fogo'),
+        Campo('status', padrao='estoque', valores=STATUS_PNEU),
+        Campo('posicao'),
+        Campo('valor_compra', 'numero'),
+        Campo('data_instalacao', 'data'),
+        Campo('km_instalacao', 'numero'),
+        Campo('km_atual', 'numero'),
+        Campo('medida_sulco_mm', 'numero'),
+        Campo('sulco_inicial_mm', 'numero'),
+        Campo('pressao_recomendada', 'numero'),
+        Campo('vida_util_estimada', 'numero'),
+        Campo('fornecedor'),
+        Campo('fornecedor_recapagem'),
+        Campo('observacoes'),
+    ],
+    referencias=[
+        # Mesma regra da API: o item precisa ser do grupo Pneus (ou sem grupo)
+        Referencia('item_id', Item.numero_item, ['numero_item'], 'Item de pneu', obrigatorio=True,
+                   filtro=or_(Item.grupo_itens.is_(None), func.lower(Item.grupo_itens) == 'pneus')),
+        Referencia('equipamento_id', Equipamento.codigo_interno, ['equipamento_codigo'], 'Equipamento'),
+    ],
+    validadores=[_nao_negativos('valor_compra', 'km_instalacao', 'km_atual', 'medida_sulco_mm',
+                                'sulco_inicial_mm')],
+    permissao=NIVEIS_ESTOQUE,
+)
+
+MECANICOS = EntidadeImportacao(
+    Mecanico,
+    chave='cpf',
+    campos=[
+        Campo('cpf', obrigatorio=True),
+        Campo('nome_completo', obrigatorio=True),
+        Campo('especialidade', obrigatorio=True),
+        Campo('nivel_experiencia', obrigatorio=True, valores=NIVEIS_MECANICO),
+        Campo('data_admissao', 'data', obrigatorio=True),
+        Campo('telefone'),
+        Campo('email'),
+        Campo('salario', 'numero'),
+        Campo('status', padrao='ativo', valores=STATUS_MECANICO),
+        Campo('observacoes'),
+    ],
+    validadores=[_validar_cpf, _nao_negativos('salario')],
+    permissao=NIVEIS_GESTAO,
+)
+
+ENTIDADES_IMPORTACAO = {
+    'pecas': PECAS,
+    'itens': ITENS,
+    'equipamentos': EQUIPAMENTOS,
+    'pneus': PNEUS,
+    'mecanicos': MECANICOS,
+}
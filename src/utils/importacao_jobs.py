@@ -0,0 +1,128 @@
+"""
+Importação de planilhas em segundo plano
+
+O upload é gravado em IMPORTACAO_DIR e registrado em `importacao_jobs`; a
+requisição retorna em seguida com o id do job. Um pool de threads do próprio
+processo (IMPORTACAO_WORKERS) lê o arquivo em lotes e grava cada lote com o
+seu próprio commit, atualizando o progresso do job em seguida. Como o estado fica
+no banco, qualquer worker do gunicorn responde à consulta de progresso.
+
+Um job interrompido pela parada do processo fica com status 'processando';
+os lotes já gravados permanecem e o arquivo pode ser reenviado (a importação
+é idempotente por código).
+"""
+
+import logging
+import os
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from flask import current_app
+
+from src.db import db
+from src.models.importacao_job import ImportacaoJob
+from src.utils.importacao import importar_arquivo
+from src.utils.importacao_entidades import ENTIDADES_IMPORTACAO
+from src.utils.planilhas import ErroImportacao, estimar_linhas, extensao_arquivo
+
+logger = logging.getLogger(__name__)
+
+IMPORTACAO_DIR = os.environ.get('IMPORTACAO_DIR') or os.path.join(tempfile.gettempdir(), 'cmms_importacoes')
+IMPORTACAO_WORKERS = int(os.environ.get('IMPORTACAO_WORKERS', '1'))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _obter_executor():
+    # Criado sob demanda: com o gunicorn, cada worker (pós-fork) tem o seu pool
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=IMPORTACAO_WORKERS, thread_name_prefix='importacao')
+        return _executor
+
+
+def criar_job(arquivo, entidade, usuario_id=None):
+    """Valida e armazena o upload e registra o job como pendente"""
+    if entidade not in ENTIDADES_IMPORTACAO:
+        raise ErroImportacao(f'Entidade de importação inválida: {entidade}')
+    extensao = extensao_arquivo(arquivo.filename)
+
+    os.makedirs(IMPORTACAO_DIR, exist_ok=True)
+    caminho = os.path.join(IMPORTACAO_DIR, f'{uuid.uuid4().hex}.{extensao}')
+    arquivo.save(caminho)
+
+    job = ImportacaoJob(entidade=entidade, arquivo_nome=arquivo.filename,
+                        arquivo_caminho=caminho, usuario_id=usuario_id)
+    db.session.add(job)
+    try:
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        _remover_arquivo(caminho)
+        raise
+    return job
+
+
+def enfileirar_job(job_id):
+    """Agenda o processamento do job no pool de importação"""
+    app = current_app._get_current_object()
+    _obter_executor().submit(_executar_job, app, job_id)
+
+
+def _executar_job(app, job_id):
+    with app.app_context():
+        try:
+            processar_job(job_id)
+        except Exception:
+            logger.exception('Falha ao processar job de importação %s', job_id)
+
+
+def _remover_arquivo(caminho):
+    try:
+        os.remove(caminho)
+    except OSError:
+        pass
+
+
+def processar_job(job_id):
+    """Processa o job no contexto atual (também usado diretamente, sem o pool)"""
+    job = db.session.get(ImportacaoJob, job_id)
+    if job is None or job.status != 'pendente':
+        return
+
+    job.status = 'processando'
+    job.iniciado_em = datetime.utcnow()
+    db.session.commit()
+
+    def _atualizar_progresso(relatorio):
+        job.linhas_processadas = relatorio['total_linhas']
+        job.adicionados = relatorio['adicionados']
+        job.atualizados = relatorio['atualizados']
+        job.ignorados = relatorio['ignorados']
+        job.set_erros(relatorio['erros'])
+        db.session.commit()
+
+    try:
+        extensao = extensao_arquivo(job.arquivo_caminho)
+        # Estimativa para o progresso; o total exato é gravado ao final
+        job.total_linhas = estimar_linhas(job.arquivo_caminho, extensao)
+        db.session.commit()
+
+        relatorio = importar_arquivo(ENTIDADES_IMPORTACAO[job.entidade], job.arquivo_caminho,
+                                     ao_concluir_lote=_atualizar_progresso)
+        _atualizar_progresso(relatorio)
+        job.total_linhas = relatorio['total_linhas']
+        job.status = 'concluido'
+    except Exception as e:
+        db.session.rollback()
+        job.status = 'erro'
+        job.mensagem_erro = str(e) if isinstance(e, ErroImportacao) else f'Erro durante importação: {str(e)}'
+    finally:
+        job.finalizado_em = datetime.utcnow()
+        db.session.commit()
+        _remover_arquivo(job.arquivo_caminho)
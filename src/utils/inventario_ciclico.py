@@ -0,0 +1,272 @@
+"""
+Inventário cíclico (contagem rotativa)
+
+Em vez de inventariar o catálogo inteiro de uma vez, cada sessão seleciona
+uma fatia das peças de um estoque (local): por classe ABC (valor em
+estoque no local), por grupo de itens e sempre as contadas há mais tempo
+primeiro. A seleção é gravada com um único INSERT ... SELECT; as contagens
+chegam em lotes e ficam na sessão, sem alterar saldos. No fechamento as
+diferenças viram movimentações de ajuste em lote (registrar_movimentacoes),
+que bloqueiam apenas os saldos ajustados; a própria sessão fica bloqueada
+(bloquear_sessao) enquanto é contada, fechada ou cancelada. Nada aqui faz
+commit.
+"""
+
+import re
+from datetime import datetime
+
+from sqlalchemy import case, exists, func, insert, literal, select, update
+
+from src.db import db
+from src.models.estoque_local import EstoqueLocal
+from src.models.inventario_contagem import InventarioContagem
+from src.models.inventario_sessao import InventarioSessao
+from src.models.peca import Peca
+from src.models.saldo_estoque import SaldoEstoque
+from src.utils.conversao import inteiro_ou_none
+from src.utils.saldos_estoque import (
+    LIMITE_LINHAS_LOTE, ErroMovimentacao, MovimentacoesInvalidas, estoque_central_id, registrar_movimentacoes
+)
+
+# Peças por sessão
+LIMITE_ITENS_PADRAO = 200
+LIMITE_ITENS_SESSAO = 5000
+
+# Fração acumulada do valor em estoque até onde vai cada classe (o resto é C)
+CLASSES_ABC = {'A': 0.80, 'B': 0.95}
+
+
+class ErroInventario(ValueError):
+    """Operação inválida na sessão de inventário"""
+
+
+class ContagensInvalidas(ErroInventario):
+    """Lote rejeitado; `erros` tem uma mensagem por linha (ou peça) com problema"""
+
+    def __init__(self, erros):
+        self.erros = erros
+        super().__init__(f'{len(erros)} erro(s); nada foi gravado')
+
+
+def _classes_abc(estoque_local_id):
+    """Subconsulta (peca_id, classe) com a curva ABC do valor em estoque no local"""
+    valor = SaldoEstoque.quantidade * func.coalesce(Peca.preco_unitario, 0)
+    ordem = (valor.desc(), SaldoEstoque.peca_id)
+    valores = select(
+        SaldoEstoque.peca_id,
+        # Valor acumulado das peças antes desta, na ordem decrescente de valor
+        (func.sum(valor).over(order_by=ordem) - valor).label('anterior'),
+        func.sum(valor).over().label('total'),
+    ).join(Peca, SaldoEstoque.peca_id == Peca.id)\
+        .where(SaldoEstoque.estoque_local_id == estoque_local_id)\
+        .subquery()
+
+    classe = case(
+        *[(valores.c.anterior < valores.c.total * fracao, literal(nome)) for nome, fracao in CLASSES_ABC.items()],
+        else_=literal('C')
+    )
+    return select(valores.c.peca_id, classe.label('classe')).subquery()
+
+
+def criar_sessao(usuario_id, estoque_local_id=None, descricao=None, classe_abc=None, grupo_id=None, limite=None):
+    """
+    Abre uma sessão com até `limite` peças que têm saldo no local, filtradas
+    por classe ABC e grupo, das contadas há mais tempo (ou nunca) para as
+    mais recentes. Peças já em outra sessão aberta do mesmo local ficam de
+    fora. Retorna a sessão.
+    """
+    try:
+        estoque_local_id = inteiro_ou_none(estoque_local_id) or estoque_central_id()
+    except ErroMovimentacao as e:
+        raise ErroInventario(str(e))
+    if not estoque_local_id or not db.session.get(EstoqueLocal, estoque_local_id):
+        raise ErroInventario('Estoque (local) não encontrado')
+    if classe_abc:
+        classe_abc = str(classe_abc).upper()
+        if classe_abc not in ('A', 'B', 'C'):
+            raise ErroInventario('Classe ABC inválida. Use A, B ou C')
+    if limite in (None, ''):
+        limite = LIMITE_ITENS_PADRAO
+    limite = inteiro_ou_none(limite)
+    if not limite or limite <= 0:
+        raise ErroInventario('Limite de peças inválido')
+    limite = min(limite, LIMITE_ITENS_SESSAO)
+
+    sessao = InventarioSessao(descricao=descricao, estoque_local_id=estoque_local_id, usuario_id=usuario_id)
+    sessao.set_criterios({chave: valor for chave, valor in
+                          {'classe_abc': classe_abc, 'grupo_id': inteiro_ou_none(grupo_id), 'limite': limite}.items()
+                          if valor is not None})
+    db.session.add(sessao)
+    db.session.flush()
+
+    em_sessao_aberta = exists().where(
+        InventarioContagem.peca_id == SaldoEstoque.peca_id,
+        InventarioContagem.sessao_id == InventarioSessao.id,
+        InventarioSessao.status == 'aberta',
+        InventarioSessao.estoque_local_id == estoque_local_id,
+        InventarioSessao.id != sessao.id,
+    )
+    selecao = select(literal(sessao.id), SaldoEstoque.peca_id)\
+        .join(Peca, SaldoEstoque.peca_id == Peca.id)\
+        .where(SaldoEstoque.estoque_local_id == estoque_local_id, ~em_sessao_aberta)
+    if grupo_id:
+        selecao = selecao.where(Peca.grupo_item_id == inteiro_ou_none(grupo_id))
+    if classe_abc:
+        classes = _classes_abc(estoque_local_id)
+        selecao = selecao.join(classes, classes.c.peca_id == SaldoEstoque.peca_id)\
+            .where(classes.c.classe == classe_abc)
+    selecao = selecao.order_by(Peca.ultima_inventariacao_data.asc().nullsfirst(), Peca.id).limit(limite)
+
+    total = db.session.execute(
+        insert(InventarioContagem.__table__).from_select(['sessao_id', 'peca_id'], selecao)
+    ).rowcount
+    if not total:
+        raise ErroInventario('Nenhuma peça encontrada para os critérios informados')
+    sessao.total_itens = total
+    return sessao
+
+
+def bloquear_sessao(sessao_id):
+    """
+    Carrega a sessão com SELECT ... FOR UPDATE (None se não existe): contar,
+    fechar e cancelar a mesma sessão ficam em fila até o commit, e quem
+    chega depois já a vê fechada, sem lançar os ajustes duas vezes.
+    """
+    return db.session.get(InventarioSessao, sessao_id, with_for_update=True, populate_existing=True)
+
+
+def _verificar_aberta(sessao):
+    if sessao.status != 'aberta':
+        raise ErroInventario(f'Sessão de inventário {sessao.status}')
+
+
+def registrar_contagens(sessao, linhas, usuario_id):
+    """
+    Grava as quantidades contadas (dicts com peca_id e quantidade) de até
+    LIMITE_LINHAS_LOTE peças da sessão, com o saldo atual do local como
+    quantidade do sistema. Recontar uma peça substitui a contagem anterior.
+    Retorna quantas contagens foram gravadas.
+    """
+    _verificar_aberta(sessao)
+    if not linhas:
+        raise ErroInventario('Nenhuma contagem informada')
+    if len(linhas) > LIMITE_LINHAS_LOTE:
+        raise ErroInventario(f'Máximo de {LIMITE_LINHAS_LOTE} contagens por lote')
+
+    peca_ids = list({inteiro_ou_none(linha.get('peca_id')) for linha in linhas} - {None})
+    contagens = dict(db.session.execute(
+        select(InventarioContagem.peca_id, InventarioContagem.id)
+        .where(InventarioContagem.sessao_id == sessao.id, InventarioContagem.peca_id.in_(peca_ids))
+    ).all())
+    saldos = dict(db.session.execute(
+        select(SaldoEstoque.peca_id, SaldoEstoque.quantidade)
+        .where(SaldoEstoque.estoque_local_id == sessao.estoque_local_id, SaldoEstoque.peca_id.in_(peca_ids))
+    ).all())
+
+    agora = datetime.utcnow()
+    erros, valores, vistas = [], [], set()
+    for numero, linha in enumerate(linhas, start=1):
+        peca_id = inteiro_ou_none(linha.get('peca_id'))
+        quantidade = inteiro_ou_none(linha.get('quantidade'))
+        if peca_id not in contagens:
+            erros.append(f'Linha {numero}: Peça não pertence à sessão')
+        elif peca_id in vistas:
+            erros.append(f'Linha {numero}: Peça repetida no lote')
+        elif quantidade is None:
+            erros.append(f'Linha {numero}: Quantidade inválida')
+        elif quantidade < 0:
+            erros.append(f'Linha {numero}: Quantidade não pode ser negativa')
+        else:
+            vistas.add(peca_id)
+            valores.append({
+                'id': contagens[peca_id],
+                'quantidade_contada': quantidade,
+                'quantidade_sistema': saldos.get(peca_id, 0),
+                'contado_por_id': usuario_id,
+                'contado_em': agora,
+            })
+    if erros:
+        raise ContagensInvalidas(erros)
+
+    # UPDATE em lote pela chave primária
+    db.session.execute(update(InventarioContagem), valores)
+    sessao.itens_contados = db.session.scalar(
+        select(func.count(InventarioContagem.id))
+        .where(InventarioContagem.sessao_id == sessao.id, InventarioContagem.quantidade_contada.isnot(None))
+    )
+    return len(valores)
+
+
+def _erros_por_peca(erros, codigos):
+    """Troca o 'Linha N' dos erros do lote de ajustes pelo código da peça"""
+    resultado = []
+    for erro in erros:
+        encontrado = re.match(r'Linha (\d+): (.*)', erro)
+        if encontrado:
+            erro = f'Peça {codigos[int(encontrado.group(1)) - 1]}: {encontrado.group(2)}'
+        resultado.append(erro)
+    return resultado
+
+
+def fechar_sessao(sessao, usuario):
+    """
+    Lança as diferenças das peças contadas como entradas/saídas de ajuste no
+    local (em lotes de LIMITE_LINHAS_LOTE, na mesma transação), marca a data
+    de inventário dessas peças e fecha a sessão. Peças não contadas ficam
+    sem ajuste. Retorna quantos ajustes foram lançados.
+    """
+    _verificar_aberta(sessao)
+    diferencas = db.session.execute(
+        select(Peca.id, Peca.codigo, InventarioContagem.quantidade_sistema, InventarioContagem.quantidade_contada)
+        .join(Peca, InventarioContagem.peca_id == Peca.id)
+        .where(InventarioContagem.sessao_id == sessao.id,
+               InventarioContagem.quantidade_contada.isnot(None),
+               InventarioContagem.quantidade_contada != InventarioContagem.quantidade_sistema)
+        .order_by(InventarioContagem.id)
+    ).all()
+
+    ajustes = []
+    for peca_id, codigo, sistema, contada in diferencas:
+        diferenca = contada - sistema
+        local = 'estoque_destino_id' if diferenca > 0 else 'estoque_origem_id'
+        ajustes.append((codigo, {
+            'peca_id': peca_id,
+            'tipo_movimentacao': 'entrada' if diferenca > 0 else 'saida',
+            'quantidade': abs(diferenca),
+            'motivo': f'Ajuste de inventário - Diferença: {diferenca}',
+            'observacoes': f'Inventário cíclico #{sessao.id}: Sistema={sistema}, Físico={contada}',
+            local: sessao.estoque_local_id,
+        }))
+
+    for inicio in range(0, len(ajustes), LIMITE_LINHAS_LOTE):
+        lote = ajustes[inicio:inicio + LIMITE_LINHAS_LOTE]
+        try:
+            registrar_movimentacoes([linha for _, linha in lote], usuario.id)
+        except MovimentacoesInvalidas as e:
+            raise ContagensInvalidas(_erros_por_peca(e.erros, [codigo for codigo, _ in lote]))
+        except ErroMovimentacao as e:
+            raise ErroInventario(str(e))
+
+    agora = datetime.utcnow()
+    contadas = select(InventarioContagem.peca_id).where(
+        InventarioContagem.sessao_id == sessao.id, InventarioContagem.quantidade_contada.isnot(None)
+    )
+    db.session.execute(
+        update(Peca.__table__)
+        .where(Peca.__table__.c.id.in_(contadas))
+        .values(ultima_inventariacao_data=agora, ultima_inventariacao_usuario=usuario.nome_completo)
+    )
+
+    sessao.status = 'fechada'
+    sessao.itens_ajustados = len(ajustes)
+    sessao.fechada_por_id = usuario.id
+    sessao.fechada_em = agora
+    return len(ajustes)
+
+
+def cancelar_sessao(sessao, usuario):
+    """Cancela a sessão sem ajustar saldos; as peças voltam a poder ser selecionadas"""
+    _verificar_aberta(sessao)
+    sessao.status = 'cancelada'
+    sessao.fechada_por_id = usuario.id
+    sessao.fechada_em = datetime.utcnow()
@@ -0,0 +1,207 @@
+"""
+Leituras de km e sulco de pneus
+
+Uma inspeção de pátio envia centenas de leituras em uma requisição. Os
+pneus citados são buscados em uma única consulta (por id, número de série
+ou número de fogo), todas as linhas são validadas antes de gravar (tudo ou
+nada) e o lote é aplicado com um UPDATE em lote (executemany) pela chave
+primária e um INSERT em lote no histórico `leituras_pneus`, que também
+recebe as leituras individuais. Leituras com data anterior à última do
+pneu só entram no histórico. As previsões de desgaste dos pneus lidos
+são recalculadas na mesma transação. Nada aqui faz commit.
+"""
+
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import func, insert, or_, select, update
+
+from src.db import db
+from src.models.leitura_pneu import LeituraPneu
+from src.models.pneu import Pneu
+from src.utils.conversao import inteiro_ou_none
+from src.utils.previsao_pneus import atualizar_previsoes
+
+# Leituras aceitas em um lote
+LIMITE_LEITURAS_LOTE = 1000
+
+
+class ErroLeitura(ValueError):
+    """Leitura inválida (pneu, km, sulco, data)"""
+
+
+class LeiturasInvalidas(ErroLeitura):
+    """Lote rejeitado; `erros` tem uma mensagem 'Linha N: ...' por linha com problema"""
+
+    def __init__(self, erros):
+        self.erros = erros
+        super().__init__('Leituras inválidas')
+
+
+def _km_rodados(km_atual, km_instalacao):
+    # Mesma regra de Pneu.to_dict(), mas nulo quando não há as duas leituras
+    return km_atual - km_instalacao if km_atual and km_instalacao else None
+
+
+def _medida(linha, campo, nome):
+    """Valor numérico positivo do campo, ou None se não informado"""
+    valor = linha.get(campo)
+    if valor in (None, ''):
+        return None
+    try:
+        valor = float(valor)
+    except (TypeError, ValueError):
+        raise ErroLeitura(f'{nome} inválido')
+    if valor <= 0:
+        raise ErroLeitura(f'{nome} deve ser maior que zero')
+    return valor
+
+
+def _data_leitura(valor, padrao):
+    if not valor:
+        return padrao
+    try:
+        return datetime.fromisoformat(str(valor))
+    except ValueError:
+        raise ErroLeitura('Data da leitura inválida. Use o formato AAAA-MM-DD ou AAAA-MM-DDTHH:MM')
+
+
+def registrar_leitura(pneu, usuario_id, observacoes=None):
+    """Grava no histórico o estado atual do pneu (após uma atualização individual)"""
+    db.session.add(LeituraPneu(
+        pneu_id=pneu.id,
+        km_atual=pneu.km_atual,
+        km_rodados=_km_rodados(pneu.km_atual, pneu.km_instalacao),
+        medida_sulco_mm=pneu.medida_sulco_mm,
+        origem='individual',
+        usuario_id=usuario_id,
+        observacoes=observacoes[:200] if observacoes else None,
+    ))
+    atualizar_previsoes([pneu.id])
+
+
+def _buscar_pneus(linhas):
+    """Pneus citados no lote, indexados por id, número de série e número de fogo"""
+    ids = {inteiro_ou_none(linha.get('pneu_id')) for linha in linhas} - {None}
+    series = {str(linha['numero_serie']) for linha in linhas if linha.get('numero_serie')}
+    fogos = {str(linha['numero_fogo']) for linha in linhas if linha.get('numero_fogo')}
+    condicoes = []
+    if ids:
+        condicoes.append(Pneu.id.in_(list(ids)))
+    if series:
+        condicoes.append(Pneu.numero_serie.in_(list(series)))
+    if fogos:
+        condicoes.append(Pneu.numero_fogo.in_(list(fogos)))
+    if not condicoes:
+        return {}, {}, {}
+
+    # Data da leitura mais recente de cada pneu, na mesma consulta
+    ultimas = select(LeituraPneu.pneu_id, func.max(LeituraPneu.data_leitura).label('ultima_leitura'))\
+        .group_by(LeituraPneu.pneu_id).subquery()
+    pneus = db.session.execute(
+        select(Pneu.id, Pneu.numero_serie, Pneu.numero_fogo, Pneu.status,
+               Pneu.km_instalacao, Pneu.km_atual, Pneu.medida_sulco_mm, ultimas.c.ultima_leitura)
+        .outerjoin(ultimas, ultimas.c.pneu_id == Pneu.id)
+        .where(or_(*condicoes))
+    ).all()
+    por_fogo = defaultdict(list)
+    for pneu in pneus:
+        por_fogo[pneu.numero_fogo].append(pneu)
+    return {pneu.id: pneu for pneu in pneus}, {pneu.numero_serie: pneu for pneu in pneus}, por_fogo
+
+
+def _resolver_pneu(linha, por_id, por_serie, por_fogo):
+    if linha.get('pneu_id') not in (None, ''):
+        pneu = por_id.get(inteiro_ou_none(linha['pneu_id']))
+    elif linha.get('numero_serie'):
+        pneu = por_serie.get(str(linha['numero_serie']))
+    elif linha.get('numero_fogo'):
+        candidatos = por_fogo.get(str(linha['numero_fogo']), [])
+        # Números de fogo são reaproveitados: vale o único pneu em uso com o número
+        if len(candidatos) > 1:
+            candidatos = [pneu for pneu in candidatos if pneu.status == 'em_uso']
+            if len(candidatos) != 1:
+                raise ErroLeitura(f"Número de fogo {linha['numero_fogo']} identifica mais de um pneu")
+        pneu = candidatos[0] if candidatos else None
+    else:
+        raise ErroLeitura('Informe pneu_id, numero_serie ou numero_fogo')
+    if pneu is None:
+        raise ErroLeitura('Pneu não encontrado')
+    return pneu
+
+
+def registrar_leituras(linhas, usuario_id):
+    """
+    Aplica várias leituras (dicts com pneu_id, numero_serie ou numero_fogo,
+    km_atual e/ou medida_sulco_mm, data_leitura e observacoes opcionais) em
+    uma única transação, tudo ou nada, com as mesmas regras das rotas
+    individuais. Toda leitura vai para o histórico; o estado do pneu só muda
+    com leituras a partir da mais recente já gravada (as anteriores são
+    retroativas: só histórico, sem as regras do km atual). Retorna quantos
+    km e sulcos foram atualizados e quantas leituras foram retroativas.
+    Levanta LeiturasInvalidas com o erro de cada linha.
+    """
+    if not linhas:
+        raise ErroLeitura('Nenhuma leitura informada')
+    if len(linhas) > LIMITE_LEITURAS_LOTE:
+        raise ErroLeitura(f'Máximo de {LIMITE_LEITURAS_LOTE} leituras por lote')
+
+    por_id, por_serie, por_fogo = _buscar_pneus(linhas)
+
+    agora = datetime.utcnow()
+    erros, atualizacoes, historico, vistos = [], [], [], set()
+    km_atualizados = sulcos_atualizados = retroativas = 0
+    for numero, linha in enumerate(linhas, start=1):
+        try:
+            pneu = _resolver_pneu(linha, por_id, por_serie, por_fogo)
+            if pneu.id in vistos:
+                raise ErroLeitura('Pneu repetido no lote')
+            km_atual = _medida(linha, 'km_atual', 'KM atual')
+            sulco = _medida(linha, 'medida_sulco_mm', 'Medida do sulco')
+            if km_atual is None and sulco is None:
+                raise ErroLeitura('Informe km_atual e/ou medida_sulco_mm')
+            data_leitura = _data_leitura(linha.get('data_leitura'), agora)
+            atual = pneu.ultima_leitura is None or data_leitura >= pneu.ultima_leitura
+            if km_atual is not None and atual:
+                if pneu.status != 'em_uso':
+                    raise ErroLeitura('Apenas pneus em uso podem ter KM atualizada')
+                if pneu.km_instalacao is not None and km_atual < pneu.km_instalacao:
+                    raise ErroLeitura('KM atual não pode ser menor que KM de instalação')
+                if pneu.km_atual is not None and km_atual < pneu.km_atual:
+                    raise ErroLeitura(f'KM atual não pode ser menor que a última registrada ({pneu.km_atual:.0f})')
+        except ErroLeitura as e:
+            erros.append(f'Linha {numero}: {e}')
+            continue
+
+        vistos.add(pneu.id)
+        if atual:
+            km_atualizados += km_atual is not None
+            sulcos_atualizados += sulco is not None
+            km_atual = km_atual if km_atual is not None else pneu.km_atual
+            sulco = sulco if sulco is not None else pneu.medida_sulco_mm
+            # Mesmas chaves em todas as linhas: um único executemany
+            atualizacoes.append({'id': pneu.id, 'km_atual': km_atual, 'medida_sulco_mm': sulco,
+                                 'updated_at': agora})
+        else:
+            # Retroativa: o estado atual do pneu é posterior, a leitura vale só como histórico
+            retroativas += 1
+        historico.append({
+            'pneu_id': pneu.id,
+            'data_leitura': data_leitura,
+            'km_atual': km_atual,
+            'km_rodados': _km_rodados(km_atual, pneu.km_instalacao),
+            'medida_sulco_mm': sulco,
+            'origem': 'lote',
+            'usuario_id': usuario_id,
+            'observacoes': str(linha['observacoes'])[:200] if linha.get('observacoes') else None,
+            'created_at': agora,
+        })
+    if erros:
+        raise LeiturasInvalidas(erros)
+
+    if atualizacoes:
+        db.session.execute(update(Pneu), atualizacoes)
+    db.session.execute(insert(LeituraPneu), historico)
+    atualizar_previsoes(vistos)
+    return {'km_atualizados': km_atualizados, 'sulcos_atualizados': sulcos_atualizados,
+            'leituras_retroativas': retroativas}
@@ -0,0 +1,162 @@
+"""
+Instrumentação de SQL por requisição e métricas no formato Prometheus
+
+Para cada requisição são contabilizados o número de comandos SQL, o tempo
+total gasto no banco e o comando mais lento. Requisições acima de
+LENTIDAO_REQUISICAO_MS geram um log de aviso, e os histogramas por blueprint
+ficam disponíveis em /api/metrics (texto no formato de exposição do
+Prometheus). As métricas são por processo: com vários workers do gunicorn
+cada um expõe as suas.
+"""
+
+import logging
+import os
+import threading
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+LENTIDAO_REQUISICAO_MS = int(os.environ.get('LENTIDAO_REQUISICAO_MS', '500'))
+
+BUCKETS_DURACAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+# Rotas que não entram nas métricas
+ROTAS_IGNORADAS = {'/api/metrics'}
+
+
+class Histograma:
+    """Histograma cumulativo no estilo Prometheus, indexado por rótulos"""
+
+    def __init__(self, nome, descricao, buckets):
+        self.nome = nome
+        self.descricao = descricao
+        self.buckets = buckets
+        self._series = {}
+
+    def observar(self, rotulos, valor):
+        serie = self._series.get(rotulos)
+        if serie is None:
+            serie = self._series[rotulos] = {'buckets': [0] * len(self.buckets), 'soma': 0.0, 'contagem': 0}
+        for i, limite in enumerate(self.buckets):
+            if valor <= limite:
+                serie['buckets'][i] += 1
+        serie['soma'] += valor
+        serie['contagem'] += 1
+
+    def exportar(self):
+        linhas = [f'# HELP {self.nome} {self.descricao}', f'# TYPE {self.nome} histogram']
+        for rotulos, serie in sorted(self._series.items()):
+            base = _formatar_rotulos(rotulos)
+            for limite, quantidade in zip(self.buckets, serie['buckets']):
+                linhas.append(f'{self.nome}_bucket{{{base},le="{limite}"}} {quantidade}')
+            linhas.append(f'{self.nome}_bucket{{{base},le="+Inf"}} {serie["contagem"]}')
+            linhas.append(f'{self.nome}_sum{{{base}}} {serie["soma"]}')
+            linhas.append(f'{self.nome}_count{{{base}}} {serie["contagem"]}')
+        return linhas
+
+
+class Contador:
+    """Contador monotônico no estilo Prometheus, indexado por rótulos"""
+
+    def __init__(self, nome, descricao):
+        self.nome = nome
+        self.descricao = descricao
+        self._series = {}
+
+    def incrementar(self, rotulos, valor=1):
+        self._series[rotulos] = self._series.get(rotulos, 0) + valor
+
+    def exportar(self):
+        linhas = [f'# HELP {self.nome} {self.descricao}', f'# TYPE {self.nome} counter']
+        for rotulos, valor in sorted(self._series.items()):
+            linhas.append(f'{self.nome}{{{_formatar_rotulos(rotulos)}}} {valor}')
+        return linhas
+
+
+def _formatar_rotulos(rotulos):
+    return ','.join(f'{chave}="{valor}"' for chave, valor in rotulos)
+
+
+_lock = threading.Lock()
+requisicoes_total = Contador('cmms_http_requests_total', 'Requisições HTTP atendidas')
+duracao_requisicao = Histograma('cmms_http_request_duration_seconds',
+                                'Duração das requisições HTTP em segundos', BUCKETS_DURACAO)
+consultas_requisicao = Histograma('cmms_db_queries_per_request',
+                                  'Comandos SQL executados por requisição', BUCKETS_CONSULTAS)
+tempo_banco_requisicao = Histograma('cmms_db_time_per_request_seconds',
+                                    'Tempo gasto no banco por requisição em segundos', BUCKETS_DURACAO)
+
+
+def exportar_metricas():
+    """Texto no formato de exposição do Prometheus com todas as métricas"""
+    with _lock:
+        linhas = []
+        for metrica in (requisicoes_total, duracao_requisicao, consultas_requisicao, tempo_banco_requisicao):
+            linhas.extend(metrica.exportar())
+    return '\n'.join(linhas) + '\n'
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _antes_comando(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('inicio_comando', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _depois_comando(conn, cursor, statement, parameters, context, executemany):
+    inicios = conn.info.get('inicio_comando')
+    if not inicios:
+        return
+    duracao = time.perf_counter() - inicios.pop()
+    if not has_request_context():
+        return
+    sql = getattr(g, 'sql', None)
+    if sql is None:
+        return
+    sql['consultas'] += 1
+    sql['tempo'] += duracao
+    if duracao > sql['mais_lenta_tempo']:
+        sql['mais_lenta_tempo'] = duracao
+        sql['mais_lenta'] = statement
+
+
+def _inicio_requisicao():
+    g.inicio_requisicao = time.perf_counter()
+    g.sql = {'consultas': 0, 'tempo': 0.0, 'mais_lenta': None, 'mais_lenta_tempo': 0.0}
+
+
+def _fim_requisicao(response):
+    inicio = getattr(g, 'inicio_requisicao', None)
+    sql = getattr(g, 'sql', None)
+    if inicio is None or sql is None or request.path in ROTAS_IGNORADAS:
+        return response
+
+    duracao = time.perf_counter() - inicio
+    blueprint = request.blueprint or 'app'
+    rotulos = (('blueprint', blueprint),)
+
+    with _lock:
+        requisicoes_total.incrementar(rotulos + (('status', str(response.status_code)),))
+        duracao_requisicao.observar(rotulos, duracao)
+        consultas_requisicao.observar(rotulos, sql['consultas'])
+        tempo_banco_requisicao.observar(rotulos, sql['tempo'])
+
+    if duracao * 1000 >= LENTIDAO_REQUISICAO_MS:
+        mais_lenta = ' '.join((sql['mais_lenta'] or '').split())[:300]
+        logger.warning(
+            "Requisição lenta: %s %s -> %s em %.0f ms | %d comandos SQL, %.0f ms no banco | "
+            "mais lento (%.0f ms): %s",
+            request.method, request.path, response.status_code, duracao * 1000,
+            sql['consultas'], sql['tempo'] * 1000, sql['mais_lenta_tempo'] * 1000, mais_lenta
+        )
+    return response
+
+
+def registrar_metricas(app):
+    """Liga a instrumentação por requisição à aplicação"""
+    app.before_request(_inicio_requisicao)
+    app.after_request(_fim_requisicao)
@@ -0,0 +1,78 @@
+"""
+Numeração sequencial de ordens de serviço por ano (OS-AAAA-NNN)
+
+Os números são reservados incrementando a linha do ano em `sequencias_os`
+com um único UPDATE ... RETURNING. O UPDATE bloqueia a linha até o fim da
+transação, então requisições concorrentes recebem faixas distintas e um
+rollback devolve os números sem deixar lacunas.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from src.db import db
+from src.models.ordem_servico import OrdemServico
+from src.models.sequencia_os import SequenciaOS
+
+
+def formatar_numero_os(ano, numero):
+    return f"OS-{ano}-{numero:03d}"
+
+
+def _incrementar(ano, quantidade):
+    tabela = SequenciaOS.__table__
+    stmt = tabela.update()\
+        .where(tabela.c.ano == ano)\
+        .values(ultimo_numero=tabela.c.ultimo_numero + quantidade)\
+        .returning(tabela.c.ultimo_numero)
+    return db.session.execute(stmt).scalar()
+
+
+def _maior_numero_existente(ano):
+    # Bancos anteriores ao contador: continua a partir das OS já emitidas no ano
+    prefixo = formatar_numero_os(ano, 0)[:-3]
+    numeros = db.session.query(OrdemServico.numero_os)\
+        .filter(OrdemServico.numero_os.like(f'{prefixo}%'))
+    sufixos = (numero[len(prefixo):] for (numero,) in numeros)
+    return max((int(s) for s in sufixos if s.isdigit()), default=0)
+
+
+def _criar_contador(ano):
+    tabela = SequenciaOS.__table__
+    valores = {'ano': ano, 'ultimo_numero': _maior_numero_existente(ano)}
+    dialeto = db.engine.dialect.name
+    if dialeto == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as insert_dialeto
+    elif dialeto == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as insert_dialeto
+    else:
+        db.session.execute(insert(tabela).values(**valores))
+        return
+    # Outra transação pode ter criado o contador do ano ao mesmo tempo
+    db.session.execute(insert_dialeto(tabela).values(**valores).on_conflict_do_nothing(index_elements=['ano']))
+
+
+def reservar_numeros_os(quantidade=1, ano=None):
+    """
+    Reserva `quantidade` números de OS consecutivos para o ano informado
+    (padrão: ano corrente) e retorna a lista de numero_os formatados.
+
+    Deve ser chamada dentro da transação que insere as OS.
+    """
+    if quantidade <= 0:
+        return []
+    ano = ano or datetime.now().year
+
+    ultimo = _incrementar(ano, quantidade)
+    if ultimo is None:
+        _criar_contador(ano)
+        ultimo = _incrementar(ano, quantidade)
+
+    primeiro = ultimo - quantidade + 1
+    return [formatar_numero_os(ano, numero) for numero in range(primeiro, ultimo + 1)]
+
+
+def proximo_numero_os():
+    """Reserva e retorna um único número de OS"""
+    return reservar_numeros_os(1)[0]
@@ -0,0 +1,86 @@
+"""
+Utilitários de paginação por cursor (keyset)
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 500
+
+
+class CursorInvalido(ValueError):
+    """Cursor recebido do cliente não pôde ser interpretado"""
+
+
+def ler_limite(valor, padrao=LIMITE_PADRAO, maximo=LIMITE_MAXIMO):
+    """Converte o parâmetro `limit` da query string respeitando o máximo"""
+    if valor in (None, ''):
+        return padrao
+    try:
+        limite = int(valor)
+    except (TypeError, ValueError):
+        raise CursorInvalido('Parâmetro limit inválido')
+    if limite <= 0:
+        raise CursorInvalido('Parâmetro limit deve ser maior que zero')
+    return min(limite, maximo)
+
+
+def codificar_cursor(data, registro_id):
+    """Gera um cursor opaco a partir da chave (data, id) do último registro"""
+    payload = json.dumps([data.isoformat() if data else None, registro_id])
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def decodificar_cursor(cursor):
+    """Retorna a tupla (data, id) contida no cursor"""
+    try:
+        data_iso, registro_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        data = datetime.fromisoformat(data_iso) if data_iso else None
+        return data, int(registro_id)
+    except (ValueError, TypeError, UnicodeError):
+        raise CursorInvalido('Cursor inválido')
+
+
+def aplicar_keyset_desc(query, coluna_data, coluna_id, cursor):
+    """
+    Ordena a query por (coluna_data DESC, coluna_id DESC) e, se houver
+    cursor, filtra apenas os registros posteriores a ele.
+
+    `coluna_data` deve ser NOT NULL: a ordem e a comparação de linha
+    (coluna_data, coluna_id) < (data, id) percorrem um índice
+    (coluna_data, coluna_id) de trás para frente, sem ordenar as linhas.
+    """
+    if cursor:
+        data, registro_id = decodificar_cursor(cursor)
+        if data is None:
+            raise CursorInvalido('Cursor inválido')
+        query = query.filter(tuple_(coluna_data, coluna_id) < (data, registro_id))
+    return query.order_by(coluna_data.desc(), coluna_id.desc())
+
+
+def aplicar_keyset_id(query, coluna_id, cursor):
+    """
+    Ordena a query por coluna_id crescente e, se houver cursor, continua
+    após o último id (cursores gerados com data None).
+    """
+    if cursor:
+        _, registro_id = decodificar_cursor(cursor)
+        query = query.filter(coluna_id > registro_id)
+    return query.order_by(coluna_id)
+
+
+def paginar_keyset(query, limite, chave):
+    """
+    Executa a query buscando um registro a mais para saber se existe próxima
+    página. `chave` recebe uma linha e devolve a tupla (data, id) do cursor.
+    Retorna (linhas, next_cursor).
+    """
+    linhas = query.limit(limite + 1).all()
+    if len(linhas) <= limite:
+        return linhas, None
+    linhas = linhas[:limite]
+    return linhas, codificar_cursor(*chave(linhas[-1]))
@@ -0,0 +1,131 @@
+"""
+Leitura de planilhas (CSV/Excel) em lotes com memória limitada
+
+CSV é lido com `read_csv(chunksize=...)` direto do arquivo enviado, sem
+decodificar o conteúdo inteiro em memória; XLSX é percorrido linha a linha
+com o openpyxl em modo `read_only`. Os dois leitores produzem DataFrames com
+todas as células como texto (a conversão de tipos fica com a importação) e
+índice igual à posição da linha de dados na planilha, usado para numerar os
+erros ('Linha N'). XLS (formato antigo, até 65 mil linhas) continua sendo
+lido de uma vez pelo pandas e depois fatiado.
+"""
+
+import pandas as pd
+
+EXTENSOES_IMPORTACAO = ['csv', 'xlsx', 'xls']
+
+
+class ErroImportacao(ValueError):
+    """Arquivo que não pode ser importado (formato, leitura ou colunas)"""
+
+
+def extensao_arquivo(nome):
+    """Extensão do arquivo em minúsculas; ErroImportacao se o formato não é aceito"""
+    extensao = nome.rsplit('.', 1)[1].lower() if '.' in nome else ''
+    if extensao not in EXTENSOES_IMPORTACAO:
+        raise ErroImportacao('Formato de arquivo não suportado. Use CSV, XLS ou XLSX')
+    return extensao
+
+
+def _celula_texto(valor):
+    # Mesma representação do read_excel(dtype=str): números inteiros sem ".0"
+    if valor is None or isinstance(valor, str):
+        return valor
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor)
+
+
+def _lotes_csv(arquivo, tamanho_lote):
+    leitor = pd.read_csv(arquivo, sep=',', encoding='utf-8', on_bad_lines='skip',
+                         dtype=str, chunksize=tamanho_lote)
+    with leitor:
+        yield from leitor
+
+
+def _lotes_xlsx(arquivo, tamanho_lote):
+    from openpyxl import load_workbook
+
+    planilha = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        linhas = planilha.active.iter_rows(values_only=True)
+        cabecalho = next(linhas, None) or ()
+        colunas = [str(nome).strip() if nome is not None else f'Unnamed: {i}'
+                   for i, nome in enumerate(cabecalho)]
+
+        def _lote(valores, indices):
+            return pd.DataFrame(valores, columns=colunas, index=indices, dtype='object')
+
+        valores, indices, gerou = [], [], False
+        for indice, linha in enumerate(linhas):
+            # Linhas em branco (comuns no fim de planilhas formatadas) não contam
+            if not any(valor is not None and valor != '' for valor in linha):
+                continue
+            linha = [_celula_texto(valor) for valor in linha[:len(colunas)]]
+            valores.append(linha + [None] * (len(colunas) - len(linha)))
+            indices.append(indice)
+            if len(valores) >= tamanho_lote:
+                yield _lote(valores, indices)
+                valores, indices, gerou = [], [], True
+        if valores or not gerou:
+            yield _lote(valores, indices)
+    finally:
+        planilha.close()
+
+
+def _lotes_xls(arquivo, tamanho_lote):
+    df = pd.read_excel(arquivo, dtype=str)
+    if df.empty:
+        yield df
+    for inicio in range(0, len(df), tamanho_lote):
+        yield df.iloc[inicio:inicio + tamanho_lote]
+
+
+LEITORES = {
+    'csv': _lotes_csv,
+    'xlsx': _lotes_xlsx,
+    'xls': _lotes_xls,
+}
+
+
+def ler_planilha_em_lotes(arquivo, extensao, tamanho_lote):
+    """
+    Gera DataFrames de até `tamanho_lote` linhas (células como texto).
+    O primeiro lote sempre é gerado, mesmo vazio, para expor as colunas.
+    Falhas de leitura viram ErroImportacao.
+    """
+    # FileStorage do Flask: lê direto do stream do upload
+    arquivo = getattr(arquivo, 'stream', arquivo)
+    try:
+        yield from LEITORES[extensao](arquivo, tamanho_lote)
+    except ErroImportacao:
+        raise
+    except Exception as e:
+        raise ErroImportacao(f'Erro ao ler arquivo: {str(e)}')
+
+
+def estimar_linhas(caminho, extensao):
+    """
+    Número aproximado de linhas de dados de um arquivo em disco, sem lê-lo
+    para a memória (None se não for possível estimar). No CSV conta quebras
+    de linha, então campos com quebra de linha entre aspas inflam a conta.
+    """
+    try:
+        if extensao == 'csv':
+            quebras, ultimo = 0, b''
+            with open(caminho, 'rb') as arquivo:
+                for bloco in iter(lambda: arquivo.read(1 << 20), b''):
+                    quebras += bloco.count(b'\n')
+                    ultimo = bloco[-1:]
+            return max(quebras - (ultimo == b'\n'), 0)
+        if extensao == 'xlsx':
+            from openpyxl import load_workbook
+            planilha = load_workbook(caminho, read_only=True)
+            try:
+                total = planilha.active.max_row
+            finally:
+                planilha.close()
+            return total - 1 if total else None
+    except Exception:
+        return None
+    return None
@@ -0,0 +1,166 @@
+"""
+Previsão de desgaste de pneus
+
+Para cada pneu em uso, ajusta por mínimos quadrados uma reta sulco × km
+com as leituras da vida atual (desde a instalação ou a última recapagem)
+e projeta o km e a data em que o sulco chega ao limite legal (a data vem
+de uma segunda reta, km × dia, com as mesmas leituras).
+
+Os pneus são ajustados todos de uma vez com NumPy: as leituras viram
+vetores ordenados por pneu e as somas de cada pneu (n, Σx, Σ(x-x̄)²,
+Σ(x-x̄)·y) saem de np.bincount, sem laço em Python por pneu. O resultado
+fica em `previsoes_desgaste_pneus`, recalculado só para os pneus que
+receberam leituras (ou foram instalados/recapados) e apenas lido pelos
+alertas. Nada aqui faz commit.
+"""
+
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import case, delete, func, or_, select
+
+from src.db import db
+from src.models.leitura_pneu import LeituraPneu
+from src.models.pneu import Pneu
+from src.models.previsao_desgaste_pneu import PrevisaoDesgastePneu
+from src.utils.upsert import upsert
+
+# Profundidade mínima de sulco permitida (CONTRAN: 1,6 mm)
+SULCO_LIMITE_LEGAL_MM = float(os.environ.get('PNEU_SULCO_LIMITE_MM', '1.6'))
+
+# Leituras da vida atual necessárias para ajustar a reta
+MINIMO_LEITURAS = 3
+
+# Origem do eixo de tempo da reta km × dia
+EPOCA = datetime(1970, 1, 1)
+
+# Pneus recalculados por consulta
+LOTE_PNEUS = 1000
+
+# Alertas: limite legal previsto para os próximos dias ou km
+ANTECEDENCIA_ALERTA_DIAS = 30
+ANTECEDENCIA_ALERTA_KM = 5000
+ANTECEDENCIA_CRITICA_DIAS = 7
+
+# Início da vida atual: a instalação ou a recapagem, a mais recente
+INICIO_VIDA = case(
+    (db.and_(Pneu.data_recapagem.isnot(None),
+             or_(Pneu.data_instalacao.is_(None), Pneu.data_recapagem > Pneu.data_instalacao)),
+     Pneu.data_recapagem),
+    else_=Pneu.data_instalacao
+)
+
+COLUNAS_PREVISAO = [
+    'leituras', 'taxa_desgaste_mm_1000km', 'km_por_dia', 'sulco_ultima_leitura', 'km_ultima_leitura',
+    'km_restantes', 'km_limite', 'data_limite', 'ultima_leitura_em', 'calculado_em',
+]
+
+
+def _inclinacoes(grupo, x, y, total):
+    """Inclinação da reta de mínimos quadrados de y em x em cada grupo (nan sem variação em x)"""
+    n = np.bincount(grupo, minlength=total)
+    media_x = np.bincount(grupo, x, total) / np.maximum(n, 1)
+    # Centrado na média de cada grupo: evita cancelamento com km grandes
+    dx = x - media_x[grupo]
+    sxx = np.bincount(grupo, dx * dx, total)
+    sxy = np.bincount(grupo, dx * y, total)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return n, np.where(sxx > 0, sxy / sxx, np.nan)
+
+
+def ajustar_previsoes(leituras, agora=None):
+    """
+    Previsões a partir de leituras (pneu_id, km, sulco, data) ordenadas por
+    pneu e data. Retorna um dict por pneu com ajuste válido (desgaste
+    positivo e leituras suficientes).
+    """
+    if not leituras:
+        return []
+    agora = agora or datetime.utcnow()
+    pneu_ids = np.array([leitura[0] for leitura in leituras])
+    km = np.array([leitura[1] for leitura in leituras], dtype=float)
+    sulco = np.array([leitura[2] for leitura in leituras], dtype=float)
+    datas = [leitura[3] for leitura in leituras]
+    dias = np.array([(data - EPOCA).total_seconds() / 86400 for data in datas])
+
+    ids, grupo = np.unique(pneu_ids, return_inverse=True)
+    total = len(ids)
+    n, inclinacao_sulco = _inclinacoes(grupo, km, sulco, total)
+    _, km_por_dia = _inclinacoes(grupo, dias, km, total)
+
+    # Última leitura de cada pneu (as leituras vêm ordenadas por pneu e data)
+    ultimas = np.flatnonzero(np.r_[pneu_ids[1:] != pneu_ids[:-1], True])
+    taxa = -inclinacao_sulco  # mm por km
+    validos = (n >= MINIMO_LEITURAS) & (taxa > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        km_restantes = np.maximum(sulco[ultimas] - SULCO_LIMITE_LEGAL_MM, 0) / taxa
+        dias_restantes = np.where(km_por_dia > 0, km_restantes / km_por_dia, np.nan)
+
+    previsoes = []
+    for indice in np.flatnonzero(validos):
+        ultima = ultimas[indice]
+        dias_ate_limite = dias_restantes[indice]
+        data_limite = None
+        if np.isfinite(dias_ate_limite):
+            data_limite = (datas[ultima] + timedelta(days=min(float(dias_ate_limite), 36500))).date()
+        previsoes.append({
+            'pneu_id': int(ids[indice]),
+            'leituras': int(n[indice]),
+            'taxa_desgaste_mm_1000km': round(float(taxa[indice]) * 1000, 4),
+            'km_por_dia': round(float(km_por_dia[indice]), 1) if km_por_dia[indice] > 0 else None,
+            'sulco_ultima_leitura': float(sulco[ultima]),
+            'km_ultima_leitura': float(km[ultima]),
+            'km_restantes': round(float(km_restantes[indice]), 0),
+            'km_limite': round(float(km[ultima] + km_restantes[indice]), 0),
+            'data_limite': data_limite,
+            'ultima_leitura_em': datas[ultima],
+            'calculado_em': agora,
+        })
+    return previsoes
+
+
+def _leituras_vida_atual(pneu_ids):
+    return db.session.execute(
+        select(LeituraPneu.pneu_id, LeituraPneu.km_atual, LeituraPneu.medida_sulco_mm, LeituraPneu.data_leitura)
+        .join(Pneu, LeituraPneu.pneu_id == Pneu.id)
+        .where(LeituraPneu.pneu_id.in_(pneu_ids),
+               Pneu.status == 'em_uso',
+               LeituraPneu.km_atual.isnot(None),
+               LeituraPneu.medida_sulco_mm.isnot(None),
+               or_(INICIO_VIDA.is_(None), LeituraPneu.data_leitura >= INICIO_VIDA))
+        .order_by(LeituraPneu.pneu_id, LeituraPneu.data_leitura, LeituraPneu.id)
+    ).all()
+
+
+def atualizar_previsoes(pneu_ids):
+    """
+    Recalcula as previsões dos pneus informados (em lotes de LOTE_PNEUS);
+    pneus sem ajuste válido ficam sem previsão. Retorna quantas foram gravadas.
+    """
+    pneu_ids = sorted(set(pneu_ids))
+    gravadas = 0
+    for inicio in range(0, len(pneu_ids), LOTE_PNEUS):
+        lote = pneu_ids[inicio:inicio + LOTE_PNEUS]
+        previsoes = ajustar_previsoes(_leituras_vida_atual(lote))
+        db.session.execute(delete(PrevisaoDesgastePneu).where(
+            PrevisaoDesgastePneu.pneu_id.in_(list(set(lote) - {previsao['pneu_id'] for previsao in previsoes}))
+        ))
+        upsert(PrevisaoDesgastePneu.__table__, previsoes, ['pneu_id'], atualizar=COLUNAS_PREVISAO)
+        gravadas += len(previsoes)
+    return gravadas
+
+
+def pneus_desatualizados():
+    """Pneus em uso com leituras gravadas depois da última previsão (ou ainda sem previsão)"""
+    ultima_leitura = select(LeituraPneu.pneu_id, func.max(LeituraPneu.created_at).label('gravada_em'))\
+        .group_by(LeituraPneu.pneu_id).subquery()
+    return list(db.session.scalars(
+        select(Pneu.id)
+        .join(ultima_leitura, ultima_leitura.c.pneu_id == Pneu.id)
+        .outerjoin(PrevisaoDesgastePneu, PrevisaoDesgastePneu.pneu_id == Pneu.id)
+        .where(Pneu.status == 'em_uso',
+               or_(PrevisaoDesgastePneu.pneu_id.is_(None),
+                   ultima_leitura.c.gravada_em > PrevisaoDesgastePneu.calculado_em))
+        .order_by(Pneu.id)
+    ))
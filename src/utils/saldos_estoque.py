@@ -0,0 +1,414 @@
+"""
+Saldos de estoque por peça e local
+
+Toda alteração de quantidade passa por `registrar_movimentacao`, que grava
+a linha em `movimentacoes_estoque` (livro de lançamentos, só inserção) e
+ajusta os saldos no banco com UPDATE atômico, sem ler a quantidade para o
+Python e escrever de volta:
+
+- saída: UPDATE saldos_estoque SET quantidade = quantidade - :n
+  WHERE ... AND quantidade >= :n (nenhuma linha afetada = estoque insuficiente)
+- entrada: INSERT ... ON CONFLICT (peca_id, estoque_local_id)
+  DO UPDATE SET quantidade = quantidade + :n
+- Peca.quantidade (total de todos os locais) recebe o mesmo delta.
+
+Assim duas retiradas simultâneas não passam juntas pela verificação de
+saldo e nenhuma atualização se perde. Os bloqueios são sempre tomados na
+mesma ordem (saldos por peça e local crescentes, depois as peças), nos
+lançamentos avulsos e nos lotes, para evitar deadlock entre transferências
+opostas ou entre uma transferência e um lote. Nada aqui faz commit.
+"""
+
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import case, exists, func, insert, literal, select, tuple_, update
+
+from src.db import db
+from src.models.equipamento import Equipamento
+from src.models.estoque_local import EstoqueLocal
+from src.models.mecanico import Mecanico
+from src.models.movimentacao_estoque import MovimentacaoEstoque
+from src.models.ordem_servico import OrdemServico
+from src.models.peca import Peca
+from src.models.saldo_estoque import SaldoEstoque
+from src.utils.alertas import marcar_alterados
+from src.utils.conversao import inteiro_ou_none
+from src.utils.upsert import insert_do_dialeto
+
+TIPOS_MOVIMENTACAO = ['entrada', 'saida', 'transferencia']
+
+# Local usado quando a peça não tem estoque definido
+CODIGO_ESTOQUE_PADRAO = 'ALM_CENTRAL'
+
+# Linhas aceitas em uma movimentação em lote
+LIMITE_LINHAS_LOTE = 500
+
+# Campos do lançamento copiados da requisição
+CAMPOS_LANCAMENTO = ['numero_nf', 'equipamento_id', 'mecanico_id', 'setor', 'ordem_servico_id', 'observacoes']
+
+# Campos do lançamento que referenciam outro cadastro: campo -> (modelo, mensagem de id inválido, de inexistente)
+REFERENCIAS_LANCAMENTO = {
+    'equipamento_id': (Equipamento, 'Equipamento inválido', 'Equipamento não encontrado'),
+    'mecanico_id': (Mecanico, 'Mecânico inválido', 'Mecânico não encontrado'),
+    'ordem_servico_id': (OrdemServico, 'Ordem de serviço inválida', 'Ordem de serviço não encontrada'),
+}
+
+
+class ErroMovimentacao(ValueError):
+    """Movimentação inválida (tipo, quantidade, locais)"""
+
+
+class EstoqueInsuficiente(ErroMovimentacao):
+    def __init__(self, peca_id, estoque_local_id, disponivel):
+        self.peca_id = peca_id
+        self.estoque_local_id = estoque_local_id
+        self.disponivel = disponivel
+        super().__init__(f'Estoque insuficiente. Disponível: {disponivel}')
+
+
+class MovimentacoesInvalidas(ErroMovimentacao):
+    """Lote rejeitado; `erros` tem uma mensagem 'Linha N: ...' por linha com problema"""
+
+    def __init__(self, erros):
+        self.erros = erros
+        super().__init__('Movimentações inválidas')
+
+
+def estoque_central_id():
+    """Almoxarifado central (CODIGO_ESTOQUE_PADRAO) ou, sem ele, o primeiro local"""
+    local_id = db.session.scalar(select(EstoqueLocal.id).where(EstoqueLocal.codigo == CODIGO_ESTOQUE_PADRAO)) \
+        or db.session.scalar(select(func.min(EstoqueLocal.id)))
+    if not local_id:
+        raise ErroMovimentacao('Nenhum estoque (local) cadastrado')
+    return local_id
+
+
+def estoque_padrao_id(peca):
+    """Local da peça ou, sem ele, o almoxarifado central (ou o primeiro local)"""
+    return peca.estoque_local_id or estoque_central_id()
+
+
+def _validar_quantidade(quantidade):
+    try:
+        quantidade = int(quantidade)
+    except (TypeError, ValueError):
+        raise ErroMovimentacao('Quantidade inválida')
+    if quantidade <= 0:
+        raise ErroMovimentacao('Quantidade deve ser maior que zero')
+    return quantidade
+
+
+def _resolver_locais(tipo_movimentacao, estoque_origem_id, estoque_destino_id, padrao):
+    """(origem, destino) da movimentação; `padrao()` dá o local de entradas e saídas sem local"""
+    if tipo_movimentacao not in TIPOS_MOVIMENTACAO:
+        raise ErroMovimentacao('Tipo de movimentação inválido')
+    if tipo_movimentacao == 'entrada':
+        return estoque_origem_id, estoque_destino_id or padrao()
+    if tipo_movimentacao == 'saida':
+        return estoque_origem_id or padrao(), estoque_destino_id
+    if not estoque_origem_id or not estoque_destino_id or estoque_origem_id == estoque_destino_id:
+        raise ErroMovimentacao('Transferência exige estoques de origem e destino diferentes')
+    return estoque_origem_id, estoque_destino_id
+
+
+def saldo_atual(peca_id, estoque_local_id, bloquear=False):
+    """Saldo da peça no local (0 se não houver); `bloquear` usa SELECT ... FOR UPDATE"""
+    consulta = select(SaldoEstoque.quantidade).where(
+        SaldoEstoque.peca_id == peca_id, SaldoEstoque.estoque_local_id == estoque_local_id)
+    if bloquear:
+        consulta = consulta.with_for_update()
+    return db.session.scalar(consulta) or 0
+
+
+def _creditar(creditos, agora):
+    """Soma as quantidades de {(peca_id, estoque_local_id): quantidade} aos saldos (cria os que faltam)"""
+    if not creditos:
+        return
+    tabela = SaldoEstoque.__table__
+    stmt = insert_do_dialeto(tabela)
+    db.session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=['peca_id', 'estoque_local_id'],
+            set_={'quantidade': tabela.c.quantidade + stmt.excluded.quantidade, 'updated_at': agora},
+        ),
+        [{'peca_id': peca_id, 'estoque_local_id': local_id, 'quantidade': quantidade, 'updated_at': agora}
+         for (peca_id, local_id), quantidade in sorted(creditos.items())]
+    )
+
+
+def _debitar(peca_id, estoque_local_id, quantidade, agora):
+    tabela = SaldoEstoque.__table__
+    resultado = db.session.execute(
+        update(tabela)
+        .where(tabela.c.peca_id == peca_id, tabela.c.estoque_local_id == estoque_local_id,
+               tabela.c.quantidade >= quantidade)
+        .values(quantidade=tabela.c.quantidade - quantidade, updated_at=agora)
+    )
+    if resultado.rowcount == 0:
+        raise EstoqueInsuficiente(peca_id, estoque_local_id, saldo_atual(peca_id, estoque_local_id))
+
+
+def _ajustar_totais(deltas, agora):
+    """Aplica {peca_id: delta} a Peca.quantidade em um único UPDATE"""
+    deltas = {peca_id: delta for peca_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    tabela = Peca.__table__
+    db.session.execute(
+        update(tabela)
+        .where(tabela.c.id.in_(list(deltas)))
+        .values(quantidade=func.coalesce(tabela.c.quantidade, 0) + case(deltas, value=tabela.c.id),
+                updated_at=agora)
+    )
+    # O UPDATE do Core não passa pelos eventos do ORM: o alerta de estoque baixo é reavaliado no commit
+    marcar_alterados('peca', deltas)
+
+
+def registrar_movimentacao(peca, tipo_movimentacao, quantidade, usuario_id, motivo,
+                           estoque_origem_id=None, estoque_destino_id=None, **campos):
+    """
+    Aplica a movimentação aos saldos e adiciona o lançamento à sessão.
+
+    Entradas creditam `estoque_destino_id` e saídas debitam
+    `estoque_origem_id` (ambos padrão: estoque_padrao_id(peca));
+    transferências exigem os dois. `campos` vão para MovimentacaoEstoque
+    (numero_nf, equipamento_id, ordem_servico_id, observacoes, ...).
+    Levanta ErroMovimentacao / EstoqueInsuficiente.
+    """
+    quantidade = _validar_quantidade(quantidade)
+    estoque_origem_id, estoque_destino_id = _resolver_locais(
+        tipo_movimentacao, estoque_origem_id, estoque_destino_id, lambda: estoque_padrao_id(peca))
+
+    agora = datetime.utcnow()
+    if tipo_movimentacao == 'entrada':
+        _creditar({(peca.id, estoque_destino_id): quantidade}, agora)
+        _ajustar_totais({peca.id: quantidade}, agora)
+    elif tipo_movimentacao == 'saida':
+        _debitar(peca.id, estoque_origem_id, quantidade, agora)
+        _ajustar_totais({peca.id: -quantidade}, agora)
+    else:
+        # O total da peça não muda; saldos bloqueados em ordem crescente de local (a dos lotes)
+        if estoque_origem_id < estoque_destino_id:
+            _debitar(peca.id, estoque_origem_id, quantidade, agora)
+            _creditar({(peca.id, estoque_destino_id): quantidade}, agora)
+        else:
+            _creditar({(peca.id, estoque_destino_id): quantidade}, agora)
+            _debitar(peca.id, estoque_origem_id, quantidade, agora)
+
+    movimentacao = MovimentacaoEstoque(
+        peca_id=peca.id,
+        usuario_id=usuario_id,
+        tipo_movimentacao=tipo_movimentacao,
+        quantidade=quantidade,
+        motivo=motivo,
+        estoque_origem_id=estoque_origem_id,
+        estoque_destino_id=estoque_destino_id,
+        data_movimentacao=agora,
+        **campos
+    )
+    db.session.add(movimentacao)
+    return movimentacao
+
+
+def ajustar_por_contagem(peca, estoque_local_id, quantidade_fisica, usuario_id, observacoes='',
+                         motivo='Ajuste de inventário'):
+    """
+    Leva o saldo da peça no local à quantidade contada com uma entrada ou
+    saída de ajuste (`motivo`). O saldo é lido com SELECT ... FOR UPDATE,
+    então uma movimentação concorrente espera o ajuste terminar.
+    Retorna (quantidade_sistema, movimentacao ou None).
+    """
+    try:
+        quantidade_fisica = int(quantidade_fisica)
+    except (TypeError, ValueError):
+        raise ErroMovimentacao('Quantidade física inválida')
+    if quantidade_fisica < 0:
+        raise ErroMovimentacao('Quantidade física não pode ser negativa')
+
+    quantidade_sistema = saldo_atual(peca.id, estoque_local_id, bloquear=True)
+    diferenca = quantidade_fisica - quantidade_sistema
+    if diferenca == 0:
+        return quantidade_sistema, None
+
+    local = {'estoque_destino_id': estoque_local_id} if diferenca > 0 else {'estoque_origem_id': estoque_local_id}
+    movimentacao = registrar_movimentacao(
+        peca, 'entrada' if diferenca > 0 else 'saida', abs(diferenca), usuario_id,
+        f'{motivo} - Diferença: {diferenca}',
+        observacoes=f'Inventário: Sistema={quantidade_sistema}, Físico={quantidade_fisica}. {observacoes or ""}'.strip(),
+        **local
+    )
+    return quantidade_sistema, movimentacao
+
+
+def _travar_saldos(pares):
+    """
+    Saldos atuais {(peca_id, estoque_local_id): (id, quantidade)} dos pares,
+    bloqueados com SELECT ... FOR UPDATE em ordem de (peça, local), a mesma
+    dos lançamentos avulsos
+    """
+    if not pares:
+        return {}
+    linhas = db.session.execute(
+        select(SaldoEstoque.id, SaldoEstoque.peca_id, SaldoEstoque.estoque_local_id, SaldoEstoque.quantidade)
+        .where(tuple_(SaldoEstoque.peca_id, SaldoEstoque.estoque_local_id).in_(list(pares)))
+        .order_by(SaldoEstoque.peca_id, SaldoEstoque.estoque_local_id)
+        .with_for_update()
+    ).all()
+    return {(linha.peca_id, linha.estoque_local_id): (linha.id, linha.quantidade) for linha in linhas}
+
+
+def _validar_referencias(linha, existentes):
+    """Ids de REFERENCIAS_LANCAMENTO informados na linha, convertidos e conferidos com `existentes`"""
+    referencias = {}
+    for campo, (_, invalido, inexistente) in REFERENCIAS_LANCAMENTO.items():
+        if linha.get(campo) in (None, ''):
+            referencias[campo] = None
+            continue
+        valor = inteiro_ou_none(linha[campo])
+        if valor is None:
+            raise ErroMovimentacao(invalido)
+        if valor not in existentes[campo]:
+            raise ErroMovimentacao(inexistente)
+        referencias[campo] = valor
+    return referencias
+
+
+def registrar_movimentacoes(linhas, usuario_id):
+    """
+    Registra várias movimentações (ex.: itens de uma nota fiscal ou de uma
+    lista de separação) em uma única transação, tudo ou nada.
+
+    Cada linha é um dict com peca_id, tipo_movimentacao, quantidade, motivo,
+    estoque_origem_id/estoque_destino_id e CAMPOS_LANCAMENTO, com as mesmas
+    regras de registrar_movimentacao. Peças, locais, equipamentos, mecânicos
+    e OS citados são buscados em uma consulta cada e validados por linha.
+    As quantidades são somadas por (peça, local) e aplicadas com um
+    INSERT ... ON CONFLICT para as entradas, um UPDATE com CASE para as
+    saídas e um para os totais das peças; os lançamentos são gravados em
+    um único INSERT em lote. Retorna os ids dos lançamentos criados.
+    Levanta MovimentacoesInvalidas com o erro de cada linha.
+    """
+    if not linhas:
+        raise ErroMovimentacao('Nenhuma movimentação informada')
+    if len(linhas) > LIMITE_LINHAS_LOTE:
+        raise ErroMovimentacao(f'Máximo de {LIMITE_LINHAS_LOTE} movimentações por lote')
+
+    peca_ids = {inteiro_ou_none(linha.get('peca_id')) for linha in linhas} - {None}
+    locais_pecas = dict(db.session.execute(
+        select(Peca.id, Peca.estoque_local_id).where(Peca.id.in_(list(peca_ids)))
+    ).all()) if peca_ids else {}
+    locais_informados = {inteiro_ou_none(linha.get(campo)) for linha in linhas
+                         for campo in ('estoque_origem_id', 'estoque_destino_id')} - {None}
+    locais_existentes = set(db.session.scalars(
+        select(EstoqueLocal.id).where(EstoqueLocal.id.in_(list(locais_informados)))
+    )) if locais_informados else set()
+    # Equipamentos, mecânicos e OS citados: uma consulta por cadastro
+    referencias_existentes = {}
+    for campo, (modelo, _, _) in REFERENCIAS_LANCAMENTO.items():
+        informados = {inteiro_ou_none(linha.get(campo)) for linha in linhas} - {None}
+        referencias_existentes[campo] = set(db.session.scalars(
+            select(modelo.id).where(modelo.id.in_(list(informados)))
+        )) if informados else set()
+    central = []
+
+    def _local_padrao(peca_id):
+        if locais_pecas[peca_id]:
+            return locais_pecas[peca_id]
+        if not central:
+            central.append(estoque_central_id())
+        return central[0]
+
+    agora = datetime.utcnow()
+    erros, lancamentos = [], []
+    creditos, debitos, deltas = defaultdict(int), defaultdict(int), defaultdict(int)
+    debitos_linhas = defaultdict(list)
+    for numero, linha in enumerate(linhas, start=1):
+        try:
+            peca_id = inteiro_ou_none(linha.get('peca_id'))
+            if peca_id not in locais_pecas:
+                raise ErroMovimentacao('Peça não encontrada')
+            tipo = linha.get('tipo_movimentacao')
+            quantidade = _validar_quantidade(linha.get('quantidade'))
+            if not linha.get('motivo'):
+                raise ErroMovimentacao('Motivo é obrigatório')
+            informados = [inteiro_ou_none(linha.get('estoque_origem_id')), inteiro_ou_none(linha.get('estoque_destino_id'))]
+            if any(local is not None and local not in locais_existentes for local in informados):
+                raise ErroMovimentacao('Estoque (local) não encontrado')
+            origem, destino = _resolver_locais(tipo, *informados, lambda: _local_padrao(peca_id))
+            referencias = _validar_referencias(linha, referencias_existentes)
+        except ErroMovimentacao as e:
+            erros.append(f'Linha {numero}: {e}')
+            continue
+
+        if tipo != 'saida':
+            creditos[(peca_id, destino)] += quantidade
+        if tipo != 'entrada':
+            debitos[(peca_id, origem)] += quantidade
+            debitos_linhas[(peca_id, origem)].append(numero)
+        deltas[peca_id] += quantidade if tipo == 'entrada' else -quantidade if tipo == 'saida' else 0
+
+        lancamento = {campo: linha.get(campo) for campo in CAMPOS_LANCAMENTO}
+        lancamento.update(referencias)
+        lancamento.update(peca_id=peca_id, usuario_id=usuario_id, tipo_movimentacao=tipo,
+                          quantidade=quantidade, motivo=linha['motivo'], estoque_origem_id=origem,
+                          estoque_destino_id=destino, data_movimentacao=agora)
+        lancamentos.append(lancamento)
+
+    if erros:
+        raise MovimentacoesInvalidas(erros)
+
+    # Entradas primeiro: uma saída do mesmo lote pode usar o que acabou de entrar
+    _travar_saldos(set(creditos) | set(debitos))
+    _creditar(creditos, agora)
+    if debitos:
+        saldos = _travar_saldos(set(debitos))
+        insuficientes = []
+        for par, quantidade in debitos.items():
+            disponivel = saldos[par][1] if par in saldos else 0
+            if disponivel < quantidade:
+                insuficientes.extend((numero, disponivel) for numero in debitos_linhas[par])
+        if insuficientes:
+            raise MovimentacoesInvalidas([f'Linha {numero}: Estoque insuficiente. Disponível: {disponivel}'
+                                          for numero, disponivel in sorted(insuficientes)])
+
+        tabela = SaldoEstoque.__table__
+        retiradas = {saldos[par][0]: quantidade for par, quantidade in debitos.items()}
+        resultado = db.session.execute(
+            update(tabela)
+            .where(tabela.c.id.in_(list(retiradas)),
+                   tabela.c.quantidade >= case(retiradas, value=tabela.c.id))
+            .values(quantidade=tabela.c.quantidade - case(retiradas, value=tabela.c.id), updated_at=agora)
+        )
+        if resultado.rowcount != len(retiradas):
+            # Não acontece com os saldos bloqueados; protege bancos sem FOR UPDATE
+            raise ErroMovimentacao('Saldo alterado durante a movimentação; tente novamente')
+
+    _ajustar_totais(deltas, agora)
+
+    tabela = MovimentacaoEstoque.__table__
+    # Sem sort_by_parameter_order: no SQLite ele volta a um INSERT por linha
+    return sorted(db.session.scalars(insert(tabela).returning(tabela.c.id), lancamentos))
+
+
+def criar_saldos_iniciais():
+    """
+    Cria o saldo das peças com quantidade e sem nenhum saldo por local
+    (cadastros anteriores à tabela de saldos ou dados inseridos direto
+    em `pecas`), no local da peça ou no estoque padrão. Retorna quantas.
+    """
+    local_padrao = func.coalesce(
+        select(EstoqueLocal.id).where(EstoqueLocal.codigo == CODIGO_ESTOQUE_PADRAO).scalar_subquery(),
+        select(func.min(EstoqueLocal.id)).scalar_subquery(),
+    )
+    local = func.coalesce(Peca.estoque_local_id, local_padrao)
+    origem = select(Peca.id, local, Peca.quantidade, literal(datetime.utcnow())).where(
+        Peca.quantidade > 0,
+        local.isnot(None),
+        ~exists().where(SaldoEstoque.peca_id == Peca.id),
+    )
+    resultado = db.session.execute(
+        insert(SaldoEstoque.__table__).from_select(
+            ['peca_id', 'estoque_local_id', 'quantidade', 'updated_at'], origem)
+    )
+    return resultado.rowcount
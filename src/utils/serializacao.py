@@ -0,0 +1,75 @@
+"""
+Serialização rápida para endpoints de listagem
+
+Em vez de materializar objetos ORM e chamar `to_dict()` (que dispara lazy
+loads de relacionamentos e formata cada data em Python), as listagens
+selecionam apenas as colunas necessárias, com joins explícitos, e montam os
+dicts direto das tuplas. Datas e datetimes seguem como objetos e são
+convertidos para ISO 8601 pelo encoder (orjson, quando instalado), com a
+mesma saída de `isoformat()`.
+"""
+
+import decimal
+import json
+from datetime import date, datetime
+
+from flask import Response
+from sqlalchemy import case, func
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson é opcional
+    orjson = None
+
+
+def _converter(valor):
+    # Tipos que o encoder não serializa nativamente; Decimal como string, igual ao jsonify
+    if isinstance(valor, decimal.Decimal):
+        return str(valor)
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    raise TypeError(f'Tipo não serializável: {type(valor).__name__}')
+
+
+def dumps(payload):
+    """Serializa o payload em bytes JSON"""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_converter, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, default=_converter, ensure_ascii=False).encode('utf-8')
+
+
+class RespostaJSON(Response):
+    """Resposta JSON serializada com orjson (ou json da biblioteca padrão)"""
+
+    default_mimetype = 'application/json'
+
+    def __init__(self, payload, status=200, **kwargs):
+        super().__init__(dumps(payload), status=status, **kwargs)
+
+
+def selecionar(query, campos):
+    """Troca as entidades da query pelas colunas de `campos` (dict nome -> coluna), rotuladas pelo nome"""
+    return query.with_entities(*(coluna.label(nome) for nome, coluna in campos.items()))
+
+
+def contar_se(condicao):
+    """Agregado condicional: COUNT de linhas que satisfazem a condição (SUM de CASE, uma coluna por condição)"""
+    return func.sum(case((condicao, 1), else_=0))
+
+
+def linhas_para_dicts(linhas):
+    return [dict(linha._mapping) for linha in linhas]
+
+
+def projetar(query, campos):
+    """Executa `query` selecionando apenas as colunas de `campos` e retorna uma lista de dicts"""
+    return linhas_para_dicts(selecionar(query, campos).all())
+
+
+def campos_do_modelo(modelo, excluir=()):
+    """Mapeia nome -> coluna para todas as colunas do modelo"""
+    return {
+        coluna.key: getattr(modelo, coluna.key)
+        for coluna in modelo.__table__.columns
+        if coluna.key not in excluir
+    }
@@ -0,0 +1,43 @@
+"""
+INSERT ... ON CONFLICT em lote (PostgreSQL e SQLite)
+"""
+
+from sqlalchemy import func
+
+from src.db import db
+
+
+def insert_do_dialeto(tabela):
+    """INSERT com suporte a ON CONFLICT para o banco em uso"""
+    dialeto = db.engine.dialect.name
+    if dialeto == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialeto == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise RuntimeError(f'INSERT ... ON CONFLICT não suportado no banco {dialeto}')
+    return insert(tabela)
+
+
+def upsert(tabela, registros, chaves, atualizar=(), preservar_se_nulo=()):
+    """
+    Insere `registros` (lista de dicts com as mesmas chaves) em um único
+    INSERT ... ON CONFLICT (chaves) DO UPDATE executado em lote.
+
+    Em conflito, as colunas de `atualizar` recebem o valor novo e as de
+    `preservar_se_nulo` só são alteradas quando o valor novo não é nulo.
+    Sem colunas a atualizar, o conflito é ignorado (DO NOTHING).
+    """
+    if not registros:
+        return
+    stmt = insert_do_dialeto(tabela)
+    valores = {coluna: stmt.excluded[coluna] for coluna in atualizar}
+    valores.update({
+        coluna: func.coalesce(stmt.excluded[coluna], tabela.c[coluna])
+        for coluna in preservar_se_nulo
+    })
+    if valores:
+        stmt = stmt.on_conflict_do_update(index_elements=list(chaves), set_=valores)
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=list(chaves))
+    db.session.execute(stmt, registros)
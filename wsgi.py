@@ -0,0 +1,10 @@
+"""
+Entry point WSGI para produção
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+    uvicorn --interface wsgi --workers 4 wsgi:app
+"""
+
+from src.main import create_app
+
+app = create_app()